@@ -0,0 +1,275 @@
+"""Read-only JSON API delivering live collection snippets."""
+
+import hashlib
+import json
+
+import django
+import wagtail.models
+from django.utils.translation import gettext_lazy as _
+
+import collection_snippets.counts
+import collection_snippets.filters
+import collection_snippets.instrumentation
+import collection_snippets.models
+import collection_snippets.pagination
+import collection_snippets.transfer
+
+# Fields determining the representation of a snippet, compared for ETags.
+VERSION_FIELDS = [
+    "pk",
+    "live_revision_id",
+    "last_published_at",
+    "collection_id",
+    "locale_id",
+]
+
+
+def get_page_size():
+    """Get the number of snippets per page if no limit is requested."""
+    return getattr(django.conf.settings, "COLLECTION_SNIPPETS_API_PAGE_SIZE", 20)
+
+
+def get_max_page_size():
+    """Get the maximum number of snippets per page."""
+    return getattr(django.conf.settings, "COLLECTION_SNIPPETS_API_MAX_PAGE_SIZE", 100)
+
+
+def get_default_api_fields(model):
+    """Get the names of the title and the snippet type's own fields except relations."""
+    snippet_fields = {
+        field.name for field in collection_snippets.models.AbstractSnippet._meta.fields
+    }
+    return [
+        field.name
+        for field in model._meta.concrete_fields
+        if field.name == "title"
+        or not (field.primary_key or field.is_relation or field.name in snippet_fields)
+    ]
+
+
+def get_api_fields(model):
+    """Get the fields of a snippet type that are delivered, by name.
+
+    Snippet types list them in ``api_fields``, and deliver the fields of
+    ``get_default_api_fields()`` without it. Collection and locale are always
+    delivered.
+    """
+    names = getattr(model, "api_fields", None)
+    if names is None:
+        names = get_default_api_fields(model)
+    return {name: model._meta.get_field(name) for name in names}
+
+
+def get_etag(model, versions, fields, *extra):
+    """Get a strong ETag of snippet versions represented with the selected fields."""
+    data = json.dumps(
+        [model._meta.label_lower, versions, fields, extra],
+        cls=django.core.serializers.json.DjangoJSONEncoder,
+    )
+    return django.utils.cache.quote_etag(hashlib.sha1(data.encode()).hexdigest())
+
+
+class BadRequest(Exception):
+    """Invalid query parameters, reported to the client."""
+
+
+class SnippetAPIViewMixin(collection_snippets.instrumentation.InstrumentedViewMixin):
+    """Mixin for API views of live snippets of a snippet type."""
+
+    http_method_names = ["get", "head", "options"]
+
+    def dispatch(self, request, *args, **kwargs):
+        """Report invalid query parameters."""
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except BadRequest as error:
+            return django.http.JsonResponse({"message": str(error)}, status=400)
+
+    @django.utils.functional.cached_property
+    def model(self):
+        """The requested snippet type."""
+        try:
+            model = django.apps.apps.get_model(
+                self.kwargs["app_label"], self.kwargs["model_name"]
+            )
+        except LookupError:
+            raise django.http.Http404
+        if model not in collection_snippets.models.get_snippet_models():
+            raise django.http.Http404
+        return model
+
+    @django.utils.functional.cached_property
+    def api_fields(self):
+        """Fields of the snippet type that are delivered, by name."""
+        return get_api_fields(self.model)
+
+    def get_fields(self):
+        """Get the names of the selected fields, in a stable order."""
+        api_fields = ["collection", "locale", *self.api_fields]
+        if not (value := self.request.GET.get("fields")):
+            return api_fields
+        fields = {name.strip() for name in value.split(",") if name.strip()}
+        if unknown := fields.difference(api_fields, {"id"}):
+            raise BadRequest(
+                _("Unknown fields: %(fields)s") % {"fields": ", ".join(sorted(unknown))}
+            )
+        return [name for name in api_fields if name in fields]
+
+    def get_queryset(self):
+        """Get the live snippets of the snippet type."""
+        return self.model._base_manager.filter(live=True)
+
+    def get_versions(self, snippets):
+        """Get the version fields of loaded snippets."""
+        return [
+            [getattr(snippet, name) for name in VERSION_FIELDS] for snippet in snippets
+        ]
+
+    def is_not_modified(self, etag):
+        """Check whether the client's copy has the ETag."""
+        etags = django.utils.cache.parse_etags(
+            self.request.headers.get("If-None-Match", "")
+        )
+        return "*" in etags or etag in etags
+
+    def load_snippets(self, pks, fields):
+        """Load the selected fields of snippets, in the given order."""
+        snippets = self.get_queryset().only("pk", *fields).in_bulk(pks)
+        return [snippets[pk] for pk in pks if pk in snippets]
+
+    def serialize(self, snippet, fields):
+        """Serialize the selected fields of a snippet."""
+        data = {"id": snippet.pk}
+        for name in fields:
+            if name == "collection":
+                data[name] = snippet.collection_id
+            elif name == "locale":
+                data[name] = self.language_codes[snippet.locale_id]
+            else:
+                data[name] = collection_snippets.transfer.get_field_value(
+                    self.api_fields[name], snippet
+                )
+        return data
+
+    @django.utils.functional.cached_property
+    def language_codes(self):
+        """Language codes of all locales, by ID."""
+        return dict(wagtail.models.Locale.objects.values_list("id", "language_code"))
+
+    def render_json(self, data, etag):
+        """Render JSON data with its ETag."""
+        response = django.http.JsonResponse(data)
+        response["ETag"] = etag
+        return response
+
+    def render_not_modified(self, etag):
+        """Tell the client its copy is still valid."""
+        response = django.http.HttpResponseNotModified()
+        response["ETag"] = etag
+        return response
+
+
+class SnippetListView(SnippetAPIViewMixin, django.views.View):
+    """List live snippets of a snippet type, by collection and locale.
+
+    Pages are requested by cursor and seek by primary key, so deep pages cost
+    as much as the first. The ETag is derived from the version fields of the
+    page's snippets, which are loaded first, so conditional requests for an
+    unchanged page don't load any other field.
+    """
+
+    def get(self, request, **kwargs):
+        """Respond with a page of snippets, or tell the client it's unchanged."""
+        fields = self.get_fields()
+        page = self.get_page(self.filter_queryset(self.get_queryset()))
+        etag = get_etag(
+            self.model,
+            self.get_versions(page.object_list),
+            fields,
+            page.previous_cursor,
+            page.next_cursor,
+        )
+        if self.is_not_modified(etag):
+            return self.render_not_modified(etag)
+        snippets = self.load_snippets([snippet.pk for snippet in page], fields)
+        return self.render_json(
+            {
+                "meta": {
+                    "previous_cursor": page.previous_cursor,
+                    "next_cursor": page.next_cursor,
+                },
+                "items": [self.serialize(snippet, fields) for snippet in snippets],
+            },
+            etag,
+        )
+
+    def filter_queryset(self, queryset):
+        """Filter snippets by collection and locale."""
+        if collection_id := self.request.GET.get("collection"):
+            try:
+                collection = wagtail.models.Collection.objects.get(pk=collection_id)
+            except (ValueError, wagtail.models.Collection.DoesNotExist):
+                raise BadRequest(_("Unknown collection."))
+            queryset = collection_snippets.counts.filter_collection(
+                queryset,
+                collection,
+                collection_snippets.filters.is_including_descendants(self.request.GET),
+            )
+        if language_code := self.request.GET.get("locale"):
+            try:
+                locale = wagtail.models.Locale.objects.get(language_code=language_code)
+            except wagtail.models.Locale.DoesNotExist:
+                raise BadRequest(_("Unknown locale."))
+            queryset = queryset.filter(locale=locale)
+        return queryset
+
+    def get_limit(self):
+        """Get the requested number of snippets per page."""
+        try:
+            limit = int(self.request.GET.get("limit") or get_page_size())
+        except ValueError:
+            raise BadRequest(_("The limit must be a number."))
+        if not 0 < limit <= get_max_page_size():
+            raise BadRequest(
+                _("The limit must be between 1 and %(max)s.")
+                % {"max": get_max_page_size()}
+            )
+        return limit
+
+    def get_page(self, queryset):
+        """Get a page of the version fields of snippets by cursor."""
+        paginator = collection_snippets.pagination.KeysetPaginator(
+            queryset.only(*VERSION_FIELDS).order_by("pk"), self.get_limit()
+        )
+        with collection_snippets.instrumentation.phase("pagination"):
+            try:
+                return paginator.page(self.request.GET.get("cursor") or 1)
+            except django.core.paginator.InvalidPage as error:
+                raise BadRequest(str(error))
+
+
+class SnippetDetailView(SnippetAPIViewMixin, django.views.View):
+    """Retrieve a live snippet.
+
+    The ETag is derived from the snippet's version fields, so conditional
+    requests for an unchanged snippet don't load any other field.
+    """
+
+    def get(self, request, pk, **kwargs):
+        """Respond with the snippet, or tell the client it's unchanged."""
+        fields = self.get_fields()
+        try:
+            snippet = self.get_queryset().only(*VERSION_FIELDS).get(pk=pk)
+        except (
+            ValueError,
+            django.core.exceptions.ValidationError,
+            self.model.DoesNotExist,
+        ):
+            raise django.http.Http404
+        etag = get_etag(self.model, self.get_versions([snippet]), fields)
+        if self.is_not_modified(etag):
+            return self.render_not_modified(etag)
+        snippets = self.load_snippets([snippet.pk], fields)
+        if not snippets:
+            raise django.http.Http404
+        return self.render_json(self.serialize(snippets[0], fields), etag)
@@ -0,0 +1,18 @@
+"""URL endpoints of the delivery API."""
+
+import django
+
+import collection_snippets.api
+
+urlpatterns = [
+    django.urls.path(
+        "<str:app_label>/<str:model_name>/",
+        collection_snippets.api.SnippetListView.as_view(),
+        name="collectionsnippets_api_list",
+    ),
+    django.urls.path(
+        "<str:app_label>/<str:model_name>/<str:pk>/",
+        collection_snippets.api.SnippetDetailView.as_view(),
+        name="collectionsnippets_api_detail",
+    ),
+]
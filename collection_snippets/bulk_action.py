@@ -1,10 +1,293 @@
 """Bulk actions for snippets."""
 
+import logging
+import uuid
+
 import django
+import wagtail.admin.messages
+import wagtail.admin.views.bulk_action
+import wagtail.hooks
+import wagtail.models
+import wagtail.search.backends
+import wagtail.search.index
+import wagtail.signals
 import wagtail.snippets.bulk_actions.snippet_bulk_action
 from django.utils.translation import gettext_lazy as _, ngettext
 
+import collection_snippets.counts
+import collection_snippets.frontend_cache
+import collection_snippets.instrumentation
 import collection_snippets.models
+import collection_snippets.permissions
+import collection_snippets.routers
+
+logger = logging.getLogger(__name__)
+
+
+def get_publishable_models():
+    """Get the collection snippet types with draft state, which can be published."""
+    return [
+        model
+        for model in collection_snippets.models.get_snippet_models()
+        if issubclass(model, wagtail.models.DraftStateMixin)
+    ]
+
+
+def get_chunk_size():
+    """Get the number of snippets updated per transaction by bulk actions."""
+    return getattr(django.conf.settings, "COLLECTION_SNIPPETS_BULK_CHUNK_SIZE", 1000)
+
+
+def iter_pk_chunks(queryset, chunk_size=None):
+    """Iterate over the primary keys of a queryset in chunks, ordered by primary key.
+
+    Chunks are fetched by keyset, so rows leaving the queryset while iterating,
+    e.g. because they were updated, don't shift later chunks.
+    """
+    queryset = queryset.order_by("pk")
+    chunk_size = chunk_size or get_chunk_size()
+    last_pk = None
+    while True:
+        chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        pks = list(chunk.values_list("pk", flat=True)[:chunk_size])
+        if not pks:
+            return
+        yield pks
+        last_pk = pks[-1]
+
+
+def move_to_collection(queryset, collection, chunk_size=None, progress=None, user=None):
+    """Move snippets to a collection in chunks, each in its own transaction.
+
+    Model instances are only loaded to update the search index. Each chunk logs
+    the move for every snippet, updates the reference index and purges the
+    frontend cache with a constant number of queries. The optional progress
+    callback is called with the number of snippets moved so far after each chunk.
+    """
+    model = queryset.model
+    base_model = collection_snippets.models.get_base_model(model)
+    content_type = django.contrib.contenttypes.models.ContentType.objects.get_for_model(
+        model, for_concrete_model=False
+    )
+    log_uuid = uuid.uuid4()
+    num_moved = 0
+    for pks in iter_pk_chunks(queryset, chunk_size):
+        with django.db.transaction.atomic():
+            snippets = list(
+                base_model.objects.filter(pk__in=pks)
+                .exclude(collection=collection)
+                .values_list(
+                    "pk", "title", "locale_id", "collection_id", "collection__name"
+                )
+            )
+            moved_pks = [pk for pk, *_ in snippets]
+            base_model.objects.filter(pk__in=moved_pks).update(collection=collection)
+            collection_snippets.counts.schedule_invalidation()
+            timestamp = django.utils.timezone.now()
+            wagtail.models.ModelLogEntry.objects.bulk_create(
+                wagtail.models.ModelLogEntry(
+                    content_type=content_type,
+                    object_id=str(pk),
+                    label=title,
+                    action="collectionsnippets.add_to_collection",
+                    data={
+                        "source": {"id": source_id, "title": source_name},
+                        "destination": {"id": collection.pk, "title": collection.name},
+                    },
+                    timestamp=timestamp,
+                    uuid=log_uuid,
+                    user=user,
+                )
+                for pk, title, _locale_id, source_id, source_name in snippets
+            )
+            wagtail.models.ReferenceIndex.objects.filter(
+                base_content_type=wagtail.models.ReferenceIndex._get_base_content_type(
+                    model
+                ),
+                object_id__in=[str(pk) for pk in moved_pks],
+                to_content_type=wagtail.models.ReferenceIndex._get_base_content_type(
+                    wagtail.models.Collection
+                ),
+                model_path="collection",
+            ).update(to_object_id=str(collection.pk))
+            collection_snippets.frontend_cache.purge_snippets(
+                model,
+                [(pk, locale_id) for pk, _title, locale_id, *_ in snippets],
+                {collection.pk, *(source_id for *_, source_id, _name in snippets)},
+            )
+        update_search_index(model, moved_pks)
+        num_moved += len(moved_pks)
+        logger.info("Moved %d snippets to collection %s", num_moved, collection.pk)
+        if progress:
+            progress(num_moved)
+    return num_moved
+
+
+def get_content_fields(model):
+    """Get the names of the fields of a snippet type stored in revisions."""
+    return [
+        field.name
+        for field in model._meta.concrete_fields
+        if not field.primary_key
+        and not (field.remote_field and field.remote_field.parent_link)
+    ]
+
+
+def update_search_index(model, pks):
+    """Update the search index of snippets."""
+    if not (pks and wagtail.search.index.class_is_indexed(model)):
+        return
+    backends = list(wagtail.search.backends.get_search_backends(with_auto_update=True))
+    if backends:
+        objects = list(model._default_manager.filter(pk__in=pks))
+        for backend in backends:
+            backend.add_bulk(model, objects)
+
+
+def publish_snippets(queryset, chunk_size=None, progress=None, user=None):
+    """Publish the latest revisions of snippets in chunks, each in its own transaction.
+
+    Snippets without revisions get one, created in bulk. Live snippets without
+    unpublished changes are skipped, as are snippets scheduled to go live later,
+    which are published by the scheduler. The published signal is sent for every
+    snippet, but pages displaying them are purged from the frontend cache once.
+    """
+    model = queryset.model
+    content_type = django.contrib.contenttypes.models.ContentType.objects.get_for_model(
+        model, for_concrete_model=False
+    )
+    fields = get_content_fields(model)
+    log_uuid = uuid.uuid4()
+    num_published = 0
+    with collection_snippets.frontend_cache.coalesce_purges():
+        for pks in iter_pk_chunks(queryset, chunk_size):
+            with django.db.transaction.atomic():
+                now = django.utils.timezone.now()
+                snippets = []
+                for snippet in (
+                    model._base_manager.filter(pk__in=pks)
+                    .filter(
+                        django.db.models.Q(live=False)
+                        | django.db.models.Q(has_unpublished_changes=True)
+                    )
+                    .select_related("latest_revision")
+                ):
+                    revision = snippet.latest_revision
+                    if revision is not None and snippet.has_unpublished_changes:
+                        snippet = snippet.with_content_json(revision.content)
+                    snippet.latest_revision = revision
+                    if snippet.go_live_at is None or snippet.go_live_at <= now:
+                        snippets.append(snippet)
+                new_revisions = wagtail.models.Revision.objects.bulk_create(
+                    wagtail.models.Revision(
+                        content_type=snippet.get_content_type(),
+                        base_content_type=snippet.get_base_content_type(),
+                        object_id=str(snippet.pk),
+                        content=snippet.serializable_data(),
+                        object_str=str(snippet),
+                        user=user,
+                        created_at=now,
+                    )
+                    for snippet in snippets
+                    if snippet.latest_revision is None
+                )
+                new_revisions = iter(new_revisions)
+                for snippet in snippets:
+                    if snippet.latest_revision is None:
+                        snippet.latest_revision = next(new_revisions)
+                    snippet.live = True
+                    snippet.has_unpublished_changes = False
+                    snippet.live_revision = snippet.latest_revision
+                    snippet.expired = False
+                    snippet.first_published_at = snippet.first_published_at or now
+                    snippet.last_published_at = now
+                model._base_manager.bulk_update(snippets, fields)
+                published_pks = [snippet.pk for snippet in snippets]
+                wagtail.models.Revision.objects.filter(
+                    content_type=content_type,
+                    object_id__in=[str(pk) for pk in published_pks],
+                    approved_go_live_at__isnull=False,
+                ).update(approved_go_live_at=None)
+                wagtail.models.ModelLogEntry.objects.bulk_create(
+                    wagtail.models.ModelLogEntry(
+                        content_type=content_type,
+                        object_id=str(snippet.pk),
+                        label=str(snippet),
+                        action="wagtail.publish",
+                        revision=snippet.live_revision,
+                        content_changed=True,
+                        timestamp=now,
+                        uuid=log_uuid,
+                        user=user,
+                    )
+                    for snippet in snippets
+                )
+                for snippet in snippets:
+                    wagtail.models.ReferenceIndex.create_or_update_for_object(snippet)
+                    wagtail.signals.published.send(
+                        sender=model, instance=snippet, revision=snippet.live_revision
+                    )
+            update_search_index(model, published_pks)
+            num_published += len(published_pks)
+            logger.info("Published %d snippets", num_published)
+            if progress:
+                progress(num_published)
+    return num_published
+
+
+def unpublish_snippets(queryset, chunk_size=None, progress=None, user=None):
+    """Unpublish live snippets in chunks, each in its own transaction.
+
+    The unpublished signal is sent for every snippet, but pages displaying them
+    are purged from the frontend cache once.
+    """
+    model = queryset.model
+    content_type = django.contrib.contenttypes.models.ContentType.objects.get_for_model(
+        model, for_concrete_model=False
+    )
+    log_uuid = uuid.uuid4()
+    num_unpublished = 0
+    with collection_snippets.frontend_cache.coalesce_purges():
+        for pks in iter_pk_chunks(queryset, chunk_size):
+            with django.db.transaction.atomic():
+                snippets = list(model._base_manager.filter(pk__in=pks, live=True))
+                unpublished_pks = [snippet.pk for snippet in snippets]
+                model._base_manager.filter(pk__in=unpublished_pks).update(
+                    live=False, has_unpublished_changes=True, live_revision=None
+                )
+                timestamp = django.utils.timezone.now()
+                wagtail.models.ModelLogEntry.objects.bulk_create(
+                    wagtail.models.ModelLogEntry(
+                        content_type=content_type,
+                        object_id=str(snippet.pk),
+                        label=str(snippet),
+                        action="wagtail.unpublish",
+                        timestamp=timestamp,
+                        uuid=log_uuid,
+                        user=user,
+                    )
+                    for snippet in snippets
+                )
+                for snippet in snippets:
+                    snippet.live = False
+                    snippet.has_unpublished_changes = True
+                    snippet.live_revision = None
+                    wagtail.signals.unpublished.send(sender=model, instance=snippet)
+            update_search_index(model, unpublished_pks)
+            num_unpublished += len(unpublished_pks)
+            logger.info("Unpublished %d snippets", num_unpublished)
+            if progress:
+                progress(num_unpublished)
+    return num_unpublished
+
+
+def as_queryset(objects):
+    """Get the objects of a bulk action as a queryset, or None if there are none."""
+    if isinstance(objects, django.db.models.QuerySet):
+        return objects
+    if not objects:
+        return None
+    return type(objects[0])._default_manager.filter(pk__in=[obj.pk for obj in objects])
 
 
 class CollectionForm(django.forms.Form):
@@ -13,17 +296,155 @@ class CollectionForm(django.forms.Form):
     def __init__(self, *args, **kwargs):
         """Initialize form with collection field."""
         user = kwargs.pop("user", None)
+        permission_policy = kwargs.pop(
+            "permission_policy", collection_snippets.models.permission_policy
+        )
         super().__init__(*args, **kwargs)
         self.fields["collection"] = django.forms.ModelChoiceField(
             label=_("Collection"),
-            queryset=collection_snippets.models.permission_policy.collections_user_has_permission_for(
-                user, "add"
+            queryset=permission_policy.collections_user_has_permission_for(user, "add"),
+        )
+
+
+class CollectionBulkActionMixin(
+    collection_snippets.instrumentation.InstrumentedViewMixin
+):
+    """Mixin for bulk actions checking collection permissions of the whole selection.
+
+    The collections permitted for the user are resolved once, so splitting the
+    selected objects into allowed and disallowed ones needs no further queries.
+    Selecting all snippets in the listing applies the action to a queryset of
+    them, without loading them.
+    """
+
+    permission_actions = ["change"]
+
+    @django.utils.functional.classproperty
+    def models(cls):
+        """Collection snippet types, looked up once the bulk actions are used."""
+        return collection_snippets.models.get_snippet_models()
+
+    def dispatch(self, request, *args, **kwargs):
+        """Keep all queries of bulk actions on the primary database."""
+        with collection_snippets.routers.use_primary():
+            return super().dispatch(request, *args, **kwargs)
+
+    @django.utils.functional.cached_property
+    def permission_policy(self):
+        """Permission policy of the snippet type."""
+        return self.model.snippet_viewset.permission_policy
+
+    @django.utils.functional.cached_property
+    def permitted_collection_ids(self):
+        """Collection IDs the user has permission for, or None for all collections."""
+        user = self.request.user
+        if not (user.is_active and user.is_authenticated):
+            return frozenset()
+        if user.is_superuser:
+            return None
+        return self.permission_policy.get_collection_ids(user, self.permission_actions)
+
+    def check_perm(self, obj):
+        """Check permissions for the request user."""
+        return (
+            self.permitted_collection_ids is None
+            or obj.collection_id in self.permitted_collection_ids
+        )
+
+    def filter_permitted(self, queryset):
+        """Filter a queryset to the snippets the user has permission for."""
+        if self.permitted_collection_ids is None:
+            return queryset
+        return queryset.filter(
+            collection_snippets.permissions.path_filter(
+                self.permission_policy.get_collection_paths(
+                    self.request.user, self.permission_actions
+                ),
+                "collection__path",
+            )
+        )
+
+    @django.utils.functional.cached_property
+    def is_select_all(self):
+        """Whether all snippets in the listing are selected."""
+        return "all" in self.request.GET.getlist("id")
+
+    def get_listing_queryset(self):
+        """Get the snippets matching the active filters and search of the index view."""
+        index_view = self.model.snippet_viewset.index_view
+        view = index_view.view_class(**index_view.view_initkwargs)
+        view.setup(self.request)
+        queryset = view.filter_queryset(view.get_base_queryset())
+        if view.is_searching:
+            results = view.search_queryset(queryset)
+            if not isinstance(results, django.db.models.QuerySet):
+                # Search results can't be filtered or updated, so select them by ID.
+                results = queryset.filter(pk__in=[obj.pk for obj in results])
+            queryset = results
+        return queryset
+
+    def get_all_objects_in_listing_query(self, parent_id):
+        """Get the snippets matching the active filters of the index view."""
+        return self.get_listing_queryset().values_list("pk", flat=True)
+
+    def get_actionable_objects(self):
+        """Keep all snippets in the listing as queryset instead of loading them."""
+        if not self.is_select_all:
+            return super().get_actionable_objects()
+        return self.filter_permitted(self.get_listing_queryset()), {
+            "items_with_no_access": []
+        }
+
+    def get_context_data(self, **kwargs):
+        """Count the snippets instead of listing them if all of them are selected."""
+        if not self.is_select_all:
+            return super().get_context_data(**kwargs)
+        listing = self.get_listing_queryset()
+        select_all_count = self.filter_permitted(listing).count()
+        # Skip BulkAction.get_context_data(), which loads every selected object.
+        return {
+            **super(wagtail.admin.views.bulk_action.BulkAction, self).get_context_data(
+                **kwargs
             ),
+            "model_opts": self.model._meta,
+            "header_icon": self.model.snippet_viewset.icon,
+            "items": [],
+            "items_with_no_access": [],
+            "select_all_count": select_all_count,
+            "select_all_no_access_count": listing.count() - select_all_count,
+            "next": self.next_url,
+            "submit_url": self.request.path + "?" + self.request.META["QUERY_STRING"],
+        }
+
+    def form_valid(self, form):
+        """Update all snippets in the listing without an enclosing transaction."""
+        if not self.is_select_all:
+            return super().form_valid(form)
+        # BulkAction.form_valid() runs the action in a single transaction, which
+        # would hold locks on all rows until the very last chunk has been updated.
+        self.cleaned_form = form
+        objects, _objects_without_access = self.get_actionable_objects()
+        for hook in wagtail.hooks.get_hooks("before_bulk_action"):
+            result = hook(self.request, self.action_type, objects, self)
+            if hasattr(result, "status_code"):
+                return result
+        num_parent_objects, num_child_objects = self.execute_action(
+            objects, **self.get_execution_context()
+        )
+        for hook in wagtail.hooks.get_hooks("after_bulk_action"):
+            result = hook(self.request, self.action_type, objects, self)
+            if hasattr(result, "status_code"):
+                return result
+        wagtail.admin.messages.success(
+            self.request,
+            self.get_success_message(num_parent_objects, num_child_objects),
         )
+        return django.shortcuts.redirect(self.next_url)
 
 
 class AddToCollectionBulkAction(
-    wagtail.snippets.bulk_actions.snippet_bulk_action.SnippetBulkAction
+    CollectionBulkActionMixin,
+    wagtail.snippets.bulk_actions.snippet_bulk_action.SnippetBulkAction,
 ):
     """Bulk action for adding snippets to collections."""
 
@@ -35,29 +456,30 @@ class AddToCollectionBulkAction(
     form_class = CollectionForm
     collection = None
 
-    def check_perm(self, obj):
-        """Check permissions for the request user."""
-        return collection_snippets.models.permission_policy.user_has_permission_for_instance(
-            self.request.user, "change", obj
-        )
-
     def get_form_kwargs(self):
-        """Add request user to form kwargs."""
-        return {**super().get_form_kwargs(), "user": self.request.user}
+        """Add request user and permission policy to form kwargs."""
+        return {
+            **super().get_form_kwargs(),
+            "user": self.request.user,
+            "permission_policy": self.permission_policy,
+        }
 
     def get_execution_context(self):
         """Pass collection from form to execution context."""
-        return {"collection": self.cleaned_form.cleaned_data["collection"]}
+        return {
+            "collection": self.cleaned_form.cleaned_data["collection"],
+            "user": self.request.user,
+        }
 
     @classmethod
-    def execute_action(cls, objects, collection=None, **kwargs):
+    def execute_action(cls, objects, collection=None, user=None, **kwargs):
         """Update selected snippets."""
         if collection is None:
             return None
-        num_parent_objects = collection_snippets.models.Snippet.objects.filter(
-            pk__in=[obj.pk for obj in objects]
-        ).update(collection=collection)
-        return num_parent_objects, 0
+        if (objects := as_queryset(objects)) is None:
+            return 0, 0
+        with collection_snippets.instrumentation.phase("move"):
+            return move_to_collection(objects, collection, user=user), 0
 
     def get_success_message(self, num_parent_objects, num_child_objects):
         """Display a success message."""
@@ -67,3 +489,81 @@ class AddToCollectionBulkAction(
             "%(num_parent_objects)d snippets have been added to %(collection)s",
             num_parent_objects,
         ) % {"num_parent_objects": num_parent_objects, "collection": collection.name}
+
+
+class PublishBulkAction(
+    CollectionBulkActionMixin,
+    wagtail.snippets.bulk_actions.snippet_bulk_action.SnippetBulkAction,
+):
+    """Bulk action for publishing snippets."""
+
+    display_name = _("Publish")
+    action_type = "publish"
+    aria_label = _("Publish selected snippets")
+    template_name = "collectionsnippets/confirm_bulk_publish.html"
+    action_priority = 40
+    permission_actions = ["publish"]
+
+    @django.utils.functional.classproperty
+    def models(cls):
+        """Collection snippet types that can be published."""
+        return get_publishable_models()
+
+    def get_execution_context(self):
+        """Pass the request user to the execution context."""
+        return {**super().get_execution_context(), "user": self.request.user}
+
+    @classmethod
+    def execute_action(cls, objects, user=None, **kwargs):
+        """Publish selected snippets."""
+        if (objects := as_queryset(objects)) is None:
+            return 0, 0
+        with collection_snippets.instrumentation.phase("publish"):
+            return publish_snippets(objects, user=user), 0
+
+    def get_success_message(self, num_parent_objects, num_child_objects):
+        """Display a success message."""
+        return ngettext(
+            "%(num_parent_objects)d snippet has been published",
+            "%(num_parent_objects)d snippets have been published",
+            num_parent_objects,
+        ) % {"num_parent_objects": num_parent_objects}
+
+
+class UnpublishBulkAction(
+    CollectionBulkActionMixin,
+    wagtail.snippets.bulk_actions.snippet_bulk_action.SnippetBulkAction,
+):
+    """Bulk action for unpublishing snippets."""
+
+    display_name = _("Unpublish")
+    action_type = "unpublish"
+    aria_label = _("Unpublish selected snippets")
+    template_name = "collectionsnippets/confirm_bulk_unpublish.html"
+    action_priority = 50
+    permission_actions = ["publish"]
+
+    @django.utils.functional.classproperty
+    def models(cls):
+        """Collection snippet types that can be published."""
+        return get_publishable_models()
+
+    def get_execution_context(self):
+        """Pass the request user to the execution context."""
+        return {**super().get_execution_context(), "user": self.request.user}
+
+    @classmethod
+    def execute_action(cls, objects, user=None, **kwargs):
+        """Unpublish selected snippets."""
+        if (objects := as_queryset(objects)) is None:
+            return 0, 0
+        with collection_snippets.instrumentation.phase("publish"):
+            return unpublish_snippets(objects, user=user), 0
+
+    def get_success_message(self, num_parent_objects, num_child_objects):
+        """Display a success message."""
+        return ngettext(
+            "%(num_parent_objects)d snippet has been unpublished",
+            "%(num_parent_objects)d snippets have been unpublished",
+            num_parent_objects,
+        ) % {"num_parent_objects": num_parent_objects}
@@ -0,0 +1,116 @@
+"""Cache tag (surrogate key) invalidation for snippets."""
+
+import functools
+import logging
+import urllib.error
+import urllib.request
+
+import django
+import wagtail.models
+
+import collection_snippets.instrumentation
+
+logger = logging.getLogger(__name__)
+
+REQUEST_ATTRIBUTE = "collection_snippets_cache_tags"
+
+
+def get_snippet_tag(model, pk):
+    """Get the cache tag identifying a snippet."""
+    return f"snippet-{model._meta.app_label}-{model._meta.model_name}-{pk}"
+
+
+def get_cache_tags(obj):
+    """Get the cache tags identifying a snippet or collection."""
+    if isinstance(obj, wagtail.models.Collection):
+        return [f"collection-{obj.pk}"]
+    return [get_snippet_tag(type(obj), obj.pk)]
+
+
+def add_cache_tags(request, *objects):
+    """Tag the response to a request with the cache tags of snippets or collections."""
+    if not hasattr(request, REQUEST_ATTRIBUTE):
+        setattr(request, REQUEST_ATTRIBUTE, set())
+    tags = getattr(request, REQUEST_ATTRIBUTE)
+    for obj in objects:
+        tags.update(get_cache_tags(obj))
+
+
+class BaseBackend:
+    """Base class of cache tag purge backends."""
+
+    def __init__(self, params):
+        """Initialize the backend with its settings."""
+
+    def purge_tags(self, tags):
+        """Purge all responses tagged with any of the tags."""
+        raise NotImplementedError
+
+
+class InMemoryBackend(BaseBackend):
+    """Backend recording purged tags in memory, e.g. for tests."""
+
+    def __init__(self, params):
+        """Initialize the backend without purged tags."""
+        self.purged_tags = []
+
+    def purge_tags(self, tags):
+        """Record the purged tags."""
+        self.purged_tags.extend(tags)
+
+
+class PurgeRequest(urllib.request.Request):
+    """HTTP request with the PURGE method."""
+
+    def get_method(self):
+        """Use the PURGE method."""
+        return "PURGE"
+
+
+class HTTPBackend(BaseBackend):
+    """Backend sending the tags in the header of a PURGE request, e.g. to Varnish."""
+
+    def __init__(self, params):
+        """Initialize the backend with the cache location, header name and timeout."""
+        self.location = params["LOCATION"]
+        self.header = params.get("HEADER", "xkey-purge")
+        self.timeout = params.get("TIMEOUT", 5)
+
+    def purge_tags(self, tags):
+        """Send one PURGE request for all tags, logging failures.
+
+        Purges run after changes are committed, often on the thread of the
+        editor's request, so a slow cache can only delay them by the timeout.
+        """
+        request = PurgeRequest(self.location, headers={self.header: " ".join(tags)})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout):
+                pass
+        except (urllib.error.URLError, TimeoutError) as error:
+            logger.error("Couldn't purge cache tags %s: %s", tags, error)
+
+
+@functools.cache
+def get_backends():
+    """Get the configured cache tag purge backends, created once."""
+    return {
+        name: django.utils.module_loading.import_string(config["BACKEND"])(config)
+        for name, config in getattr(
+            django.conf.settings, "COLLECTION_SNIPPETS_CACHE_TAG_BACKENDS", {}
+        ).items()
+    }
+
+
+@django.dispatch.receiver(django.core.signals.setting_changed)
+def backend_settings_changed(setting, **kwargs):
+    """Create the backends again when their settings change, e.g. in tests."""
+    if setting == "COLLECTION_SNIPPETS_CACHE_TAG_BACKENDS":
+        get_backends.cache_clear()
+
+
+def purge_tags(tags):
+    """Purge responses tagged with any of the tags from all backends."""
+    with collection_snippets.instrumentation.record("purge"):
+        for name, backend in get_backends().items():
+            logger.info("[%s] Purging cache tags: %s", name, " ".join(tags))
+            backend.purge_tags(tags)
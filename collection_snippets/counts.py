@@ -0,0 +1,204 @@
+"""Snippet counts across snippet types."""
+
+import collections
+import hashlib
+import uuid
+
+import django
+import wagtail.models
+
+import collection_snippets.models
+
+CACHE_PREFIX = "collection_snippets:counts"
+COUNT_ACTIONS = {"add", "change", "delete", "view"}
+
+
+def get_count_cache():
+    """Get the cache configured for snippet counts, if any."""
+    if alias := getattr(django.conf.settings, "COLLECTION_SNIPPETS_COUNT_CACHE", None):
+        return django.core.cache.caches[alias]
+    return None
+
+
+def get_cache_version(cache):
+    """Get the token that namespaces all currently valid cached counts."""
+    return cache.get_or_set(
+        f"{CACHE_PREFIX}:version", lambda: uuid.uuid4().hex, timeout=None
+    )
+
+
+def invalidate_count_cache():
+    """Invalidate all cached snippet counts."""
+    if cache := get_count_cache():
+        cache.set(f"{CACHE_PREFIX}:version", uuid.uuid4().hex, timeout=None)
+
+
+def schedule_invalidation():
+    """Invalidate cached counts once the current transaction is committed."""
+    if get_count_cache() is not None:
+        django.db.transaction.on_commit(invalidate_count_cache)
+
+
+def count_querysets(querysets):
+    """Count several querysets, possibly of different models, in a single query."""
+    if not querysets:
+        return []
+    counted = [
+        queryset.order_by()
+        .annotate(index=django.db.models.Value(index))
+        .values("index")
+        .annotate(count=django.db.models.Count("pk"))
+        for index, queryset in enumerate(querysets)
+    ]
+    counts = [0] * len(querysets)
+    for row in counted[0].union(*counted[1:], all=True):
+        counts[row["index"]] = row["count"]
+    return counts
+
+
+def filter_collection(queryset, collection, include_descendants=False):
+    """Filter snippets by collection, including descendants by materialized path."""
+    if include_descendants:
+        return queryset.filter(collection__path__startswith=collection.path)
+    return queryset.filter(collection=collection)
+
+
+def get_snippet_queryset(user, model, collection=None, include_descendants=False):
+    """Get the snippets of a model the user can access, filtered by collection.
+
+    Without a user, all snippets are included.
+    """
+    if not hasattr(model, "collection"):
+        return model.objects.all()
+    if user is None:
+        queryset = model.objects.all()
+    else:
+        policy = model.snippet_viewset.permission_policy
+        queryset = policy.instances_user_has_any_permission_for(user, COUNT_ACTIONS)
+    if collection is not None:
+        queryset = filter_collection(queryset, collection, include_descendants)
+    return queryset
+
+
+def get_collection_usage(collection, models=None, user=None, include_descendants=True):
+    """Count the snippets of every snippet type in a collection and its descendants.
+
+    All snippet types are counted in a single query. Given a user, only the
+    snippets the user can access are counted.
+    """
+    if models is None:
+        models = collection_snippets.models.get_snippet_models()
+    querysets = [
+        get_snippet_queryset(user, model, collection, include_descendants)
+        for model in models
+    ]
+    return dict(zip(models, count_querysets(querysets)))
+
+
+def get_collection_usage_by_collection(collection, models=None, user=None):
+    """Count the snippets of every snippet type in each collection of a subtree.
+
+    All snippet types are counted in a single grouped query. Returns the
+    collections of the subtree in tree order, each with the counts of its own
+    snippets by model.
+    """
+    if models is None:
+        models = collection_snippets.models.get_snippet_models()
+    counted = [
+        get_snippet_queryset(user, model, collection, include_descendants=True)
+        .order_by()
+        .annotate(index=django.db.models.Value(index))
+        .values("index", "collection_id")
+        .annotate(count=django.db.models.Count("pk"))
+        for index, model in enumerate(models)
+    ]
+    counts = collections.defaultdict(dict)
+    if counted:
+        for row in counted[0].union(*counted[1:], all=True):
+            counts[row["collection_id"]][models[row["index"]]] = row["count"]
+    return [
+        (
+            subtree_collection,
+            {model: counts[subtree_collection.pk].get(model, 0) for model in models},
+        )
+        for subtree_collection in wagtail.models.Collection.objects.filter(
+            path__startswith=collection.path
+        ).order_by("path")
+    ]
+
+
+def get_snippet_counts(user, models, collection_id=None, include_descendants=False):
+    """Count the snippets of several models the user can access.
+
+    Counts are optionally cached for a short time, keyed by the user's
+    collection permissions and the collection filter, until snippets are
+    added, moved or deleted, or collections change.
+    """
+    cache = get_count_cache()
+    if cache is not None:
+        policies = {
+            collection_snippets.models.get_base_model(model)._meta.label_lower: (
+                model.snippet_viewset.permission_policy
+            )
+            for model in models
+            if hasattr(model, "collection")
+        }
+        signature = hashlib.sha1(
+            "|".join(
+                f"{label}:{policy.get_permission_signature(user, COUNT_ACTIONS)}"
+                for label, policy in sorted(policies.items())
+            ).encode()
+        ).hexdigest()
+        labels = ",".join(sorted(model._meta.label_lower for model in models))
+        key = "{}:{}:{}:{}:{}:{}".format(
+            CACHE_PREFIX,
+            get_cache_version(cache),
+            signature,
+            hashlib.sha1(labels.encode()).hexdigest(),
+            collection_id or "",
+            int(include_descendants),
+        )
+        if (counts := cache.get(key)) is not None:
+            return {model: counts[model._meta.label_lower] for model in models}
+    collection = None
+    if collection_id:
+        collection = wagtail.models.Collection.objects.filter(pk=collection_id).first()
+        if collection is None:
+            return dict.fromkeys(models, 0)
+    counts = get_collection_usage(collection, models, user, include_descendants)
+    if cache is not None:
+        cache.set(
+            key,
+            {model._meta.label_lower: count for model, count in counts.items()},
+            getattr(
+                django.conf.settings, "COLLECTION_SNIPPETS_COUNT_CACHE_TIMEOUT", 60
+            ),
+        )
+    return counts
+
+
+@django.dispatch.receiver(django.db.models.signals.post_save)
+def snippet_saved(sender, created, update_fields=None, **kwargs):
+    """Invalidate cached counts when snippets are added or may have moved."""
+    if issubclass(sender, collection_snippets.models.AbstractSnippet) and (
+        created or update_fields is None or "collection" in update_fields
+    ):
+        schedule_invalidation()
+
+
+@django.dispatch.receiver(django.db.models.signals.post_delete)
+def snippet_deleted(sender, **kwargs):
+    """Invalidate cached counts when snippets are deleted."""
+    if issubclass(sender, collection_snippets.models.AbstractSnippet):
+        schedule_invalidation()
+
+
+@django.dispatch.receiver(
+    django.db.models.signals.post_save, sender="wagtailcore.Collection"
+)
+@django.dispatch.receiver(
+    django.db.models.signals.post_delete, sender="wagtailcore.Collection"
+)
+def collection_changed(**kwargs):
+    """Invalidate cached counts when collections, and thus subtrees, change."""
+    schedule_invalidation()
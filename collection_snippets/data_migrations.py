@@ -0,0 +1,88 @@
+"""Helpers for data migrations of collection snippets."""
+
+import functools
+
+import django
+
+
+def _get_content_type(apps, model):
+    """Get or create the content type of a historical model."""
+    content_type_model = apps.get_model("contenttypes", "ContentType")
+    return content_type_model.objects.get_or_create(
+        app_label=model._meta.app_label, model=model._meta.model_name
+    )[0]
+
+
+def copy_snippets(apps, schema_editor, source, target, batch_size=1000):
+    """Copy snippets of a multi-table inheritance snippet type to a single-table one.
+
+    Rows are copied in batches, keeping their IDs, so revisions, log entries and
+    reference index entries are moved over to the target type unchanged. The
+    source snippets are left in place, to be deleted once references to them
+    have been updated.
+    """
+    source_model = apps.get_model(source)
+    target_model = apps.get_model(target)
+    snippet_model = apps.get_model("collectionsnippets", "Snippet")
+    revision_model = apps.get_model("wagtailcore", "Revision")
+    log_entry_model = apps.get_model("wagtailcore", "ModelLogEntry")
+    reference_model = apps.get_model("wagtailcore", "ReferenceIndex")
+    db_alias = schema_editor.connection.alias
+
+    source_type = _get_content_type(apps, source_model)
+    target_type = _get_content_type(apps, target_model)
+    snippet_type = _get_content_type(apps, snippet_model)
+    source_fields = {field.attname for field in source_model._meta.concrete_fields}
+    field_names = [
+        field.attname
+        for field in target_model._meta.concrete_fields
+        if field.attname in source_fields
+    ]
+    pk_name = snippet_model._meta.pk.attname
+    if pk_name not in field_names:
+        field_names.append(pk_name)
+
+    queryset = source_model.objects.using(db_alias).order_by("pk").values(*field_names)
+    last_pk = None
+    while True:
+        rows = list(
+            (queryset if last_pk is None else queryset.filter(pk__gt=last_pk))[
+                :batch_size
+            ]
+        )
+        if not rows:
+            break
+        last_pk = rows[-1][pk_name]
+        with django.db.transaction.atomic(using=db_alias):
+            target_model.objects.using(db_alias).bulk_create(
+                target_model(**{**row, target_model._meta.pk.attname: row[pk_name]})
+                for row in rows
+            )
+            object_ids = [str(row[pk_name]) for row in rows]
+            revision_model.objects.using(db_alias).filter(
+                content_type=source_type, object_id__in=object_ids
+            ).update(content_type=target_type, base_content_type=target_type)
+            log_entry_model.objects.using(db_alias).filter(
+                content_type=source_type, object_id__in=object_ids
+            ).update(content_type=target_type)
+            reference_model.objects.using(db_alias).filter(
+                content_type=source_type, object_id__in=object_ids
+            ).update(content_type=target_type, base_content_type=target_type)
+            reference_model.objects.using(db_alias).filter(
+                to_content_type=snippet_type, to_object_id__in=object_ids
+            ).update(to_content_type=target_type)
+
+
+def copy_snippets_operation(source, target, batch_size=1000):
+    """Build a migration operation copying snippets from ``source`` to ``target``.
+
+    Use it in a migration of the target's app, after the target model is
+    created, e.g. ``copy_snippets_operation("news.NewsSnippet", "news.NewsItem")``.
+    Reversing the migration doesn't move anything back.
+    """
+    return django.db.migrations.RunPython(
+        functools.partial(
+            copy_snippets, source=source, target=target, batch_size=batch_size
+        ),
+        django.db.migrations.RunPython.noop,
+    )
@@ -0,0 +1,155 @@
+"""Collection filters for snippet listings and the snippet chooser."""
+
+import django
+import django_filters
+from django.utils.translation import gettext_lazy as _
+
+import collection_snippets.counts
+
+
+def get_collection_choices(collections):
+    """Get indented choices of already loaded collections, without further queries."""
+    min_depth = min((collection.depth for collection in collections), default=2)
+    return [
+        (collection.pk, collection.get_indented_name(min_depth, html=True))
+        for collection in collections
+    ]
+
+
+def include_descendants_field():
+    """Build the field selecting whether subcollections are included."""
+    return django.forms.BooleanField(
+        label=_("Include subcollections"),
+        required=False,
+        widget=django.forms.CheckboxInput(
+            attrs={"data-chooser-modal-search-filter": True}
+        ),
+    )
+
+
+def is_including_descendants(data):
+    """Check whether query parameters include subcollections."""
+    return include_descendants_field().to_python(data.get("include_descendants"))
+
+
+def filter_collection(
+    queryset, collections, collection, include_descendants, searching
+):
+    """Filter snippets by one of the loaded collections, optionally with descendants.
+
+    Search backends can only filter on indexed fields, so descendants are then
+    matched by the IDs of the loaded collections below it instead of by path.
+    """
+    if include_descendants and searching:
+        return queryset.filter(
+            collection_id__in=[
+                descendant.pk
+                for descendant in collections.values()
+                if descendant.path.startswith(collection.path)
+            ]
+        )
+    return collection_snippets.counts.filter_collection(
+        queryset, collection, include_descendants
+    )
+
+
+class CollectionFilter(django_filters.ChoiceFilter):
+    """Filter by collection, optionally including its descendants.
+
+    Choices are built from a list of collections that is only loaded once, and
+    descendants are matched by the prefix of their materialized path.
+    """
+
+    def __init__(self, *args, collections, **kwargs):
+        """Initialize the filter with the collections to choose from."""
+        self.collections = {
+            str(collection.pk): collection for collection in collections
+        }
+        self.include_descendants = self.searching = False
+        super().__init__(*args, choices=get_collection_choices(collections), **kwargs)
+
+    def filter(self, qs, value):
+        """Filter snippets by the selected collection."""
+        if value in django_filters.constants.EMPTY_VALUES:
+            return qs
+        return filter_collection(
+            qs,
+            self.collections,
+            self.collections[str(value)],
+            self.include_descendants,
+            self.searching,
+        )
+
+
+class CollectionFilterSetMixin:
+    """Mixin for filter sets adding a collection filter including subcollections."""
+
+    def add_collection_filter(self, collections):
+        """Add the collection filters if there are multiple collections."""
+        if len(collections) < 2:
+            return
+        self.filters["collection_id"] = CollectionFilter(
+            label=_("Collection"), collections=collections
+        )
+        self.filters["include_descendants"] = django_filters.BooleanFilter(
+            label=_("Include subcollections"),
+            field_name="include_descendants",
+            # Filters added after initialization have no parent to look up
+            # methods by name on.
+            method=self.filter_include_descendants,
+            widget=django.forms.CheckboxInput,
+        )
+
+    def filter_include_descendants(self, queryset, name, value):
+        """Leave filtering to the collection filter."""
+        return queryset
+
+    def filter_queryset(self, queryset):
+        """Pass the subcollection and search mode to the collection filter."""
+        if "collection_id" in self.filters:
+            collection_filter = self.filters["collection_id"]
+            collection_filter.include_descendants = bool(
+                self.form.cleaned_data.get("include_descendants")
+            )
+            collection_filter.searching = bool(self.data.get("q"))
+        return super().filter_queryset(queryset)
+
+
+class CollectionFilterMixin(django.forms.Form):
+    """Mixin for chooser filter forms, to filter by collection and subcollections.
+
+    Replaces Wagtail's collection filter, building the choices from the
+    collections passed by the view without further queries.
+    """
+
+    def __init__(self, *args, collections=None, **kwargs):
+        """Add the collection fields if collections are given."""
+        super().__init__(*args, **kwargs)
+        if collections:
+            collections = list(collections)
+            self.collections = {
+                str(collection.pk): collection for collection in collections
+            }
+            self.fields["collection_id"] = django.forms.ChoiceField(
+                label=_("Collection"),
+                choices=[("", _("All collections"))]
+                + get_collection_choices(collections),
+                required=False,
+                widget=django.forms.Select(
+                    attrs={"data-chooser-modal-search-filter": True}
+                ),
+            )
+            self.fields["include_descendants"] = include_descendants_field()
+
+    def filter(self, objects):
+        """Filter snippets by the selected collection."""
+        if collection_id := self.cleaned_data.get("collection_id"):
+            self.is_filtering_by_collection = True
+            objects = filter_collection(
+                objects,
+                self.collections,
+                self.collections[collection_id],
+                self.cleaned_data.get("include_descendants"),
+                bool(self.cleaned_data.get("q")),
+            )
+        return super().filter(objects)
@@ -0,0 +1,96 @@
+"""Cache of rendered snippet fragments, invalidated when snippets are published."""
+
+import hashlib
+import json
+import uuid
+
+import django
+
+CACHE_PREFIX = "collection_snippets:fragments"
+
+
+def get_fragment_cache():
+    """Get the cache configured for rendered snippets, if any."""
+    if alias := getattr(
+        django.conf.settings, "COLLECTION_SNIPPETS_FRAGMENT_CACHE", None
+    ):
+        return django.core.cache.caches[alias]
+    return None
+
+
+def get_fragment_cache_timeout():
+    """Get the timeout of rendered snippets."""
+    return getattr(
+        django.conf.settings, "COLLECTION_SNIPPETS_FRAGMENT_CACHE_TIMEOUT", 3600
+    )
+
+
+def _get_version_key(model, pk):
+    """Get the key of the token versioning all rendered fragments of a snippet."""
+    return f"{CACHE_PREFIX}:{model._meta.label_lower}:{pk}:version"
+
+
+def get_context_hash(context):
+    """Get a stable hash of the extra context of a rendered snippet.
+
+    Only values that can be serialized to JSON, e.g. strings and numbers, are
+    accepted, as other objects can't be told apart reliably.
+    """
+    try:
+        data = json.dumps(
+            context or {},
+            sort_keys=True,
+            cls=django.core.serializers.json.DjangoJSONEncoder,
+        )
+    except TypeError as error:
+        raise TypeError(
+            f"The context of cached snippets must be serializable to JSON: {error}"
+        ) from error
+    return hashlib.sha1(data.encode()).hexdigest()
+
+
+def get_fragment_key(cache, snippet, template_name, context=None):
+    """Get the cache key of a snippet rendered with a template and extra context."""
+    version = cache.get_or_set(
+        _get_version_key(type(snippet), snippet.pk),
+        lambda: uuid.uuid4().hex,
+        timeout=None,
+    )
+    return "{}:{}:{}:{}:{}:{}:{}:{}".format(
+        CACHE_PREFIX,
+        snippet._meta.label_lower,
+        snippet.pk,
+        snippet.locale_id,
+        snippet.live_revision_id,
+        version,
+        template_name,
+        get_context_hash(context),
+    )
+
+
+def render_snippet(snippet, template_name, context=None, request=None):
+    """Render a snippet with a template, reusing the HTML until it is published.
+
+    The snippet is available in the template as ``snippet``. The cached HTML is
+    shared by all requests, so the template and extra context must not depend
+    on the current user or request. The HTML is cached per extra context, which
+    must be serializable to JSON.
+    """
+    template_context = {**(context or {}), "snippet": snippet}
+    if (cache := get_fragment_cache()) is None:
+        return django.template.loader.render_to_string(
+            template_name, template_context, request
+        )
+    key = get_fragment_key(cache, snippet, template_name, context)
+    if (html := cache.get(key)) is None:
+        html = django.template.loader.render_to_string(
+            template_name, template_context, request
+        )
+        cache.set(key, str(html), get_fragment_cache_timeout())
+    return django.utils.safestring.mark_safe(html)
+
+
+def invalidate_snippet(model, pk):
+    """Invalidate all rendered fragments of a snippet."""
+    if (cache := get_fragment_cache()) is not None:
+        cache.delete(_get_version_key(model, pk))
@@ -0,0 +1,279 @@
+"""Frontend cache invalidation for snippets."""
+
+import collections
+import concurrent.futures
+import contextlib
+import contextvars
+import logging
+import threading
+import time
+
+import django
+import wagtail.contrib.frontend_cache.utils
+import wagtail.models
+
+import collection_snippets.cache_tags
+import collection_snippets.instrumentation
+
+CHUNK_SIZE = 1000
+
+logger = logging.getLogger(__name__)
+
+_pending_purges = contextvars.ContextVar("pending_purges", default=None)
+
+
+def _chunks(items, size=CHUNK_SIZE):
+    """Split a list into lists of at most the given size."""
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def get_referencing_objects(model, pks):
+    """Load objects referencing snippets, with one query per content type.
+
+    Yields each referencing object with the set of snippet primary keys it references.
+    """
+    targets = collections.defaultdict(set)
+    for chunk in _chunks([str(pk) for pk in pks]):
+        references = (
+            wagtail.models.ReferenceIndex.objects.filter(
+                to_content_type=wagtail.models.ReferenceIndex._get_base_content_type(
+                    model
+                ),
+                to_object_id__in=chunk,
+            )
+            .order_by()
+            .values_list("base_content_type_id", "object_id", "to_object_id")
+            .distinct()
+        )
+        for content_type_id, object_id, to_object_id in references:
+            targets[(content_type_id, object_id)].add(to_object_id)
+    object_ids = collections.defaultdict(list)
+    for content_type_id, object_id in targets:
+        object_ids[content_type_id].append(object_id)
+    for content_type_id, ids in object_ids.items():
+        source_model = (
+            django.contrib.contenttypes.models.ContentType.objects.get_for_id(
+                content_type_id
+            ).model_class()
+        )
+        if source_model is None:
+            continue
+        queryset = source_model._default_manager.all()
+        if issubclass(source_model, wagtail.models.Page):
+            queryset = queryset.specific()
+        elif any(
+            field.name == "site" and field.many_to_one
+            for field in source_model._meta.get_fields()
+        ):
+            queryset = queryset.select_related("site__root_page")
+        for chunk in _chunks(ids):
+            for source in queryset.filter(pk__in=chunk):
+                yield source, targets[(content_type_id, str(source.pk))]
+
+
+def get_pages_to_purge(model, keys):
+    """Get all pages displaying any of the snippets, each page once.
+
+    Snippets are given as (pk, locale_id) pairs. Pages referencing a snippet
+    are purged directly. For objects referencing a snippet from a site, e.g.
+    site settings, all pages of the site in the snippet's locale are purged.
+    """
+    locale_ids = {str(pk): locale_id for pk, locale_id in keys}
+    pages = {}
+    localized_roots = {}
+    for source, pks in get_referencing_objects(model, list(locale_ids)):
+        if hasattr(source, "full_url"):
+            pages[source.pk] = source
+        elif site := getattr(source, "site", None):
+            for locale_id in {locale_ids[pk] for pk in pks}:
+                if (site.pk, locale_id) in localized_roots:
+                    continue
+                localized_roots[(site.pk, locale_id)] = localized_root = (
+                    site.root_page.get_translation_or_none(locale_id)
+                )
+                if localized_root:
+                    for page in localized_root.get_descendants(
+                        inclusive=True
+                    ).specific():
+                        pages[page.pk] = page
+    return pages.values()
+
+
+def get_urls_to_purge(model, keys):
+    """Get the URLs of all pages displaying any of the snippets, each URL once."""
+    batch = wagtail.contrib.frontend_cache.utils.PurgeBatch()
+    batch.add_pages(get_pages_to_purge(model, keys))
+    return list(dict.fromkeys(batch.urls))
+
+
+def purge_urls(urls):
+    """Purge URLs from the frontend cache in batches of bounded size."""
+    batch_size = getattr(
+        django.conf.settings, "COLLECTION_SNIPPETS_PURGE_BATCH_SIZE", 500
+    )
+    with collection_snippets.instrumentation.record("purge"):
+        for chunk in _chunks(urls, batch_size):
+            wagtail.contrib.frontend_cache.utils.PurgeBatch(chunk).purge()
+
+
+def purge_snippets_now(model, keys):
+    """Purge all pages displaying snippets, given as (pk, locale_id) pairs."""
+    with collection_snippets.instrumentation.record("purge"):
+        purge_urls(get_urls_to_purge(model, keys))
+
+
+class PurgeQueue:
+    """Coalescing queue purging changed snippets from a background thread.
+
+    Snippets are collected for a short delay, so a burst of publishes only
+    purges each page once. Pages and URLs are resolved in the worker thread,
+    outside of the request.
+    """
+
+    def __init__(self, delay=None):
+        """Initialize an empty queue."""
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._scheduled = False
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="collection-snippets-purge"
+        )
+        self.metrics = {
+            "flushes": 0,
+            "purged_snippets": 0,
+            "purged_urls": 0,
+            "last_flush_seconds": None,
+            "max_flush_seconds": None,
+        }
+
+    @property
+    def depth(self):
+        """Number of snippets waiting to be purged."""
+        return len(self._pending)
+
+    def get_metrics(self):
+        """Get queue depth and flush statistics."""
+        with self._lock:
+            return {"depth": len(self._pending), **self.metrics}
+
+    def add(self, model, keys):
+        """Queue snippets, given as (pk, locale_id) pairs, and schedule a flush."""
+        with self._lock:
+            self._pending.update(dict.fromkeys((model, *key) for key in keys))
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._executor.submit(self._flush_later)
+
+    def _flush_later(self):
+        """Wait for more snippets to coalesce, then flush the queue."""
+        time.sleep(
+            self.delay
+            if self.delay is not None
+            else getattr(django.conf.settings, "COLLECTION_SNIPPETS_PURGE_DELAY", 1.0)
+        )
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Purging snippets from the frontend cache failed")
+        finally:
+            django.db.connections.close_all()
+
+    def flush(self):
+        """Purge all queued snippets now."""
+        with self._lock:
+            pending = list(self._pending)
+            self._pending.clear()
+            self._scheduled = False
+        if not pending:
+            return
+        start = time.monotonic()
+        keys_by_model = collections.defaultdict(list)
+        for model, pk, locale_id in pending:
+            keys_by_model[model].append((pk, locale_id))
+        with collection_snippets.instrumentation.record("purge", snippets=len(pending)):
+            urls = list(
+                dict.fromkeys(
+                    url
+                    for model, keys in keys_by_model.items()
+                    for url in get_urls_to_purge(model, keys)
+                )
+            )
+            purge_urls(urls)
+        duration = time.monotonic() - start
+        with self._lock:
+            self.metrics["flushes"] += 1
+            self.metrics["purged_snippets"] += len(pending)
+            self.metrics["purged_urls"] += len(urls)
+            self.metrics["last_flush_seconds"] = duration
+            self.metrics["max_flush_seconds"] = max(
+                duration, self.metrics["max_flush_seconds"] or 0
+            )
+
+
+purge_queue = PurgeQueue()
+
+
+def purge_snippets(model, keys, collection_ids=()):
+    """Purge all pages displaying snippets once the transaction is committed.
+
+    Snippets are given as (pk, locale_id) pairs. In cache tag mode, the tags of
+    the snippets and the given collections are purged instead.
+    """
+    if not (keys := list(keys)):
+        return
+    if (pending := _pending_purges.get()) is not None:
+        pending[model][0].update(keys)
+        pending[model][1].update(collection_ids)
+        return
+    if (
+        getattr(django.conf.settings, "COLLECTION_SNIPPETS_PURGE_MODE", "urls")
+        == "tags"
+    ):
+        tags = [
+            *(
+                collection_snippets.cache_tags.get_snippet_tag(model, pk)
+                for pk, _ in keys
+            ),
+            *(f"collection-{collection_id}" for collection_id in collection_ids),
+        ]
+        django.db.transaction.on_commit(
+            lambda: collection_snippets.cache_tags.purge_tags(tags)
+        )
+    elif getattr(django.conf.settings, "COLLECTION_SNIPPETS_PURGE_QUEUE", False):
+        django.db.transaction.on_commit(lambda: purge_queue.add(model, keys))
+    else:
+        django.db.transaction.on_commit(lambda: purge_snippets_now(model, keys))
+
+
+@contextlib.contextmanager
+def coalesce_purges():
+    """Collect snippets purged within the context and purge them together at the end.
+
+    Pages displaying several of the snippets are only purged once, e.g. when a
+    bulk action publishes many snippets and each of them sends a signal.
+    """
+    if _pending_purges.get() is not None:
+        yield
+        return
+    pending = collections.defaultdict(lambda: (set(), set()))
+    token = _pending_purges.set(pending)
+    try:
+        yield
+    finally:
+        # Purge snippets changed before an error too, purges of rolled back
+        # changes are discarded with their transaction.
+        _pending_purges.reset(token)
+        for model, (keys, collection_ids) in pending.items():
+            purge_snippets(model, keys, collection_ids)
+
+
+def purge_snippet(instance):
+    """Purge all pages displaying a snippet once the transaction is committed.
+
+    In cache tag mode, only the snippet's tag is purged. The tags of its
+    collection are purged when snippets are moved between collections.
+    """
+    purge_snippets(type(instance), [(instance.pk, instance.locale_id)])
@@ -0,0 +1,202 @@
+"""Opt-in query count and timing instrumentation."""
+
+import contextlib
+import contextvars
+import logging
+import time
+
+import asgiref.sync
+import django
+
+logger = logging.getLogger(__name__)
+
+instrumented = django.dispatch.Signal()
+"""Signal sent with the ``record`` of every instrumented request or operation."""
+
+_current_recorder = contextvars.ContextVar("collection_snippets_recorder", default=None)
+_disabled = contextlib.nullcontext()
+
+
+def is_enabled():
+    """Check whether instrumentation is enabled."""
+    return getattr(django.conf.settings, "COLLECTION_SNIPPETS_INSTRUMENTATION", False)
+
+
+def get_sinks():
+    """Get the callables receiving instrumentation records."""
+    return [
+        django.utils.module_loading.import_string(path)
+        for path in getattr(
+            django.conf.settings,
+            "COLLECTION_SNIPPETS_INSTRUMENTATION_SINKS",
+            ["collection_snippets.instrumentation.log_sink"],
+        )
+    ]
+
+
+def log_sink(record):
+    """Log an instrumentation record."""
+    logger.info(
+        "%s: %.3fs, %d queries (%.3fs)",
+        record["name"],
+        record["seconds"],
+        record["queries"],
+        record["db_seconds"],
+        extra={"instrumentation": record},
+    )
+
+
+def signal_sink(record):
+    """Send an instrumentation record with the ``instrumented`` signal."""
+    instrumented.send(sender=None, record=record)
+
+
+class Recorder:
+    """Record query counts, database time and phase timings of an operation."""
+
+    def __init__(self, name, **tags):
+        """Initialize an empty record."""
+        self.name = name
+        self.tags = tags
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.phases = {}
+        self.active = set()
+
+    def __call__(self, execute, sql, params, many, context):
+        """Count and time a database query (used as execute wrapper)."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_seconds += time.perf_counter() - start
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Record time and queries of a phase, adding up repeated phases."""
+        if name in self.active:
+            yield self
+            return
+        self.active.add(name)
+        start, queries, db_seconds = time.perf_counter(), self.queries, self.db_seconds
+        try:
+            yield self
+        finally:
+            self.active.discard(name)
+            phase = self.phases.setdefault(
+                name, {"seconds": 0.0, "queries": 0, "db_seconds": 0.0}
+            )
+            phase["seconds"] += time.perf_counter() - start
+            phase["queries"] += self.queries - queries
+            phase["db_seconds"] += self.db_seconds - db_seconds
+
+
+def count_queries(recorder, stack):
+    """Count the queries of this thread's connections until the stack is closed."""
+    for connection in django.db.connections.all():
+        stack.enter_context(connection.execute_wrapper(recorder))
+
+
+@contextlib.contextmanager
+def _record(name, tags):
+    """Record an operation and pass the record to all sinks."""
+    recorder = Recorder(name, **tags)
+    token = _current_recorder.set(recorder)
+    start = time.perf_counter()
+    try:
+        with contextlib.ExitStack() as stack:
+            count_queries(recorder, stack)
+            yield recorder
+    finally:
+        _current_recorder.reset(token)
+        record = {
+            "name": recorder.name,
+            **recorder.tags,
+            "seconds": time.perf_counter() - start,
+            "queries": recorder.queries,
+            "db_seconds": recorder.db_seconds,
+            "phases": recorder.phases,
+        }
+        for sink in get_sinks():
+            try:
+                sink(record)
+            except Exception:
+                logger.exception("Instrumentation sink %r failed", sink)
+
+
+def record(name, **tags):
+    """Record an operation, or a phase of the operation currently recorded."""
+    if (recorder := _current_recorder.get()) is not None:
+        return recorder.phase(name)
+    if not is_enabled():
+        return _disabled
+    return _record(name, tags)
+
+
+def phase(name):
+    """Record a phase of the operation currently recorded, if any."""
+    if (recorder := _current_recorder.get()) is None:
+        return _disabled
+    return recorder.phase(name)
+
+
+class InstrumentedViewMixin:
+    """Record query counts and phase timings of a view's requests."""
+
+    def record_request(self, request):
+        """Start recording a request to this view."""
+        return record(
+            type(self).__name__,
+            path=request.path,
+            user_id=getattr(request.user, "pk", None),
+        )
+
+    def setup(self, request, *args, **kwargs):
+        """Start recording before the view is set up.
+
+        Views set up within a recorded request, e.g. to reuse their queryset,
+        are recorded as part of it and don't start a recording of their own.
+        Recording stops if setting up the view fails, e.g. with a 404, as the
+        view isn't dispatched then.
+        """
+        if _current_recorder.get() is None:
+            self._instrumentation = contextlib.ExitStack()
+            self._instrumentation.enter_context(self.record_request(request))
+        try:
+            with phase("setup"):
+                super().setup(request, *args, **kwargs)
+        except BaseException:
+            if (stack := self.__dict__.pop("_instrumentation", None)) is not None:
+                stack.close()
+            raise
+
+    def dispatch(self, request, *args, **kwargs):
+        """Render the response while recording and stop recording."""
+        if self.view_is_async:
+            return self.dispatch_async(request, *args, **kwargs)
+        with self.__dict__.pop("_instrumentation", None) or self.record_request(
+            request
+        ):
+            response = super().dispatch(request, *args, **kwargs)
+            if _current_recorder.get() is not None and hasattr(response, "render"):
+                with phase("render"):
+                    response.render()
+            return response
+
+    async def dispatch_async(self, request, *args, **kwargs):
+        """Await the response of an async view while recording and stop recording.
+
+        Queries of async views run in the thread of the request's synchronous
+        code, including those of the async ORM, so they are counted there.
+        """
+        with self.__dict__.pop("_instrumentation", None) or self.record_request(
+            request
+        ):
+            queries = contextlib.ExitStack()
+            if (recorder := _current_recorder.get()) is not None:
+                await asgiref.sync.sync_to_async(count_queries)(recorder, queries)
+            try:
+                return await super().dispatch(request, *args, **kwargs)
+            finally:
+                await asgiref.sync.sync_to_async(queries.close)()
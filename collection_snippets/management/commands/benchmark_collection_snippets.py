@@ -0,0 +1,401 @@
+"""Benchmark collection snippet views and signals on a synthetic dataset."""
+
+import contextlib
+import json
+import math
+import random
+import statistics
+import time
+import uuid
+
+import django
+import django.contrib.auth.models
+import django.core.management.base
+import django.test
+import django.test.utils
+import wagtail
+import wagtail.models
+import wagtail.snippets.models
+
+import collection_snippets.frontend_cache
+import collection_snippets.models
+import collection_snippets.views
+
+DATASET_OPTIONS = [
+    "model",
+    "snippets",
+    "collections",
+    "collection_branching",
+    "groups",
+    "user_groups",
+    "locales",
+    "references",
+    "repeat",
+    "seed",
+]
+
+
+class Rollback(Exception):
+    """Raised to roll back the generated dataset."""
+
+
+class Command(django.core.management.base.BaseCommand):
+    """Benchmark collection snippet views and signals on a synthetic dataset.
+
+    The dataset is generated inside a transaction that is rolled back at the
+    end, unless --keep is given. Names of generated users, groups and pages
+    are unique to each run, so kept datasets don't collide. Wall time and query
+    counts of every scenario are written as JSON, so results of two runs can be
+    compared with a diff.
+    """
+
+    help = __doc__.splitlines()[0]
+
+    def add_arguments(self, parser):
+        """Add dataset size and output arguments."""
+        parser.add_argument(
+            "--model",
+            help="Snippet model to generate, as app_label.ModelName. Its own "
+            "fields must have defaults. Defaults to the first registered "
+            "collection snippet model.",
+        )
+        parser.add_argument("--snippets", type=int, default=10000)
+        parser.add_argument("--collections", type=int, default=500)
+        parser.add_argument("--collection-branching", type=int, default=4)
+        parser.add_argument("--groups", type=int, default=100)
+        parser.add_argument("--user-groups", type=int, default=5)
+        parser.add_argument("--locales", type=int, default=1)
+        parser.add_argument(
+            "--references",
+            type=int,
+            default=1000,
+            help="Number of pages referencing a single snippet.",
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--output", help="Write results to this JSON file.")
+        parser.add_argument(
+            "--keep", action="store_true", help="Keep the generated dataset."
+        )
+
+    def handle(self, *args, **options):
+        """Generate the dataset, run all scenarios and report the results."""
+        self.options = options
+        self.random = random.Random(options["seed"])
+        self.model = self.get_model(options["model"])
+        self.run_id = uuid.uuid4().hex[:8]
+        with self.test_environment():
+            try:
+                with django.db.transaction.atomic():
+                    self.generate()
+                    results = self.run_scenarios()
+                    if not options["keep"]:
+                        raise Rollback
+            except Rollback:
+                pass
+
+        report = {
+            "environment": {
+                "database": django.db.connection.vendor,
+                "django": django.get_version(),
+                "wagtail": wagtail.__version__,
+            },
+            "options": {
+                **{key: options[key] for key in DATASET_OPTIONS},
+                "model": self.model._meta.label,
+            },
+            "results": results,
+        }
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+    def get_model(self, label):
+        """Get the snippet model to benchmark."""
+        if label:
+            return django.apps.apps.get_model(label)
+        for model in wagtail.snippets.models.get_snippet_models():
+            if issubclass(model, collection_snippets.models.AbstractSnippet):
+                return model
+        raise django.core.management.base.CommandError(
+            "No collection snippet model is registered, use --model."
+        )
+
+    @contextlib.contextmanager
+    def test_environment(self):
+        """Set up Django's test environment, unless the test runner already did."""
+        try:
+            django.test.utils.setup_test_environment()
+        except RuntimeError:
+            yield
+            return
+        try:
+            yield
+        finally:
+            django.test.utils.teardown_test_environment()
+
+    def log(self, message):
+        """Report progress."""
+        if self.options["verbosity"] > 1:
+            self.stderr.write(message)
+
+    def generate(self):
+        """Generate locales, collections, groups, users, snippets and references."""
+        self.generate_locales()
+        self.generate_collections()
+        self.generate_groups()
+        self.generate_snippets()
+        self.generate_references()
+
+    def generate_locales(self):
+        """Create locales for the first configured content languages."""
+        self.locales = [wagtail.models.Locale.get_default()]
+        for language_code, _name in getattr(
+            django.conf.settings, "WAGTAIL_CONTENT_LANGUAGES", []
+        ):
+            if len(self.locales) >= self.options["locales"]:
+                break
+            locale, _created = wagtail.models.Locale.objects.get_or_create(
+                language_code=language_code
+            )
+            if locale not in self.locales:
+                self.locales.append(locale)
+
+    def generate_collections(self):
+        """Create a tree of collections with the given branching factor."""
+        self.log("Generating collections")
+        self.collections = [wagtail.models.Collection.get_first_root_node()]
+        for index in range(self.options["collections"]):
+            parent = self.collections[index // self.options["collection_branching"]]
+            # Adding children changes the path and child count of their parent,
+            # so nodes created earlier are stale.
+            parent.refresh_from_db()
+            self.collections.append(
+                parent.add_child(name=f"Benchmark collection {self.run_id} {index}")
+            )
+
+    def generate_groups(self):
+        """Create groups with collection permissions and an editor in some of them."""
+        self.log("Generating groups")
+        base_model = collection_snippets.models.get_base_model(self.model)
+        snippet_permissions = list(
+            django.contrib.auth.models.Permission.objects.filter(
+                content_type=django.contrib.contenttypes.models.ContentType.objects.get_for_model(
+                    base_model
+                ),
+                codename__in=[
+                    django.contrib.auth.get_permission_codename(
+                        action, base_model._meta
+                    )
+                    for action in ["add", "change", "choose"]
+                ],
+            )
+        )
+        model_permissions = list(
+            django.contrib.auth.models.Permission.objects.filter(
+                content_type=django.contrib.contenttypes.models.ContentType.objects.get_for_model(
+                    self.model
+                )
+            )
+        )
+        admin_permission = django.contrib.auth.models.Permission.objects.get(
+            content_type__app_label="wagtailadmin", codename="access_admin"
+        )
+        groups = django.contrib.auth.models.Group.objects.bulk_create(
+            django.contrib.auth.models.Group(
+                name=f"Benchmark group {self.run_id} {index}"
+            )
+            for index in range(self.options["groups"])
+        )
+        wagtail.models.GroupCollectionPermission.objects.bulk_create(
+            wagtail.models.GroupCollectionPermission(
+                group=group, collection=collection, permission=permission
+            )
+            for group in groups
+            for collection in self.random.sample(
+                self.collections[1:], min(3, len(self.collections) - 1)
+            )
+            for permission in snippet_permissions
+        )
+        for group in groups:
+            group.permissions.add(admin_permission, *model_permissions)
+        user_model = django.contrib.auth.get_user_model()
+        self.editor = user_model.objects.create_user(
+            **{user_model.USERNAME_FIELD: f"benchmark-editor-{self.run_id}"},
+            password="benchmark",
+        )
+        self.editor.groups.add(
+            *self.random.sample(groups, min(self.options["user_groups"], len(groups)))
+        )
+        self.superuser = user_model.objects.create_superuser(
+            **{user_model.USERNAME_FIELD: f"benchmark-superuser-{self.run_id}"},
+            email="benchmark@example.com",
+            password="benchmark",
+        )
+
+    def generate_snippets(self):
+        """Create snippets spread over all collections and locales."""
+        self.log("Generating snippets")
+        batch_size = self.options["batch_size"]
+        base_model = collection_snippets.models.get_base_model(self.model)
+        parent_link = self.model._meta.get_ancestor_link(base_model)
+        self.snippet_pks = []
+        for start in range(0, self.options["snippets"], batch_size):
+            parents = base_model.objects.bulk_create(
+                base_model(
+                    title=f"Benchmark snippet {index}",
+                    collection=self.random.choice(self.collections),
+                    locale=self.locales[index % len(self.locales)],
+                )
+                for index in range(
+                    start, min(start + batch_size, self.options["snippets"])
+                )
+            )
+            if parent_link is None:
+                self.snippet_pks.extend(parent.pk for parent in parents)
+                continue
+            # Multi-table inheritance children can't be bulk created, so insert
+            # the child rows of the bulk created parents directly.
+            self.model._base_manager._insert(
+                [self.model(**{parent_link.attname: parent.pk}) for parent in parents],
+                fields=self.model._meta.local_concrete_fields,
+            )
+            self.snippet_pks.extend(parent.pk for parent in parents)
+
+    def generate_references(self):
+        """Create pages all referencing the same snippet."""
+        self.log("Generating references")
+        self.referenced_snippet = self.model.objects.get(pk=self.snippet_pks[0])
+        root_page = wagtail.models.Site.objects.get(is_default_site=True).root_page
+        pages = [
+            root_page.add_child(
+                instance=wagtail.models.Page(
+                    title=f"Benchmark page {index}",
+                    slug=f"benchmark-page-{self.run_id}-{index}",
+                )
+            )
+            for index in range(self.options["references"])
+        ]
+        page_content_type = (
+            django.contrib.contenttypes.models.ContentType.objects.get_for_model(
+                wagtail.models.Page
+            )
+        )
+        wagtail.models.ReferenceIndex.objects.bulk_create(
+            wagtail.models.ReferenceIndex(
+                content_type=page_content_type,
+                base_content_type=page_content_type,
+                object_id=str(page.pk),
+                to_content_type=wagtail.models.ReferenceIndex._get_base_content_type(
+                    self.model
+                ),
+                to_object_id=str(self.referenced_snippet.pk),
+                model_path="benchmark",
+                content_path="benchmark",
+                content_path_hash=wagtail.models.ReferenceIndex._get_content_path_hash(
+                    "benchmark"
+                ),
+            )
+            for page in pages
+        )
+
+    def measure(self, func):
+        """Run a scenario repeatedly, recording wall time and queries of each run."""
+        timings = []
+        for _ in range(self.options["repeat"]):
+            with django.test.utils.CaptureQueriesContext(
+                django.db.connection
+            ) as context:
+                start = time.perf_counter()
+                func()
+                timings.append(time.perf_counter() - start)
+        return {
+            "seconds": round(statistics.median(timings), 6),
+            "min_seconds": round(min(timings), 6),
+            "queries": len(context.captured_queries),
+            "db_seconds": round(
+                sum(float(query["time"]) for query in context.captured_queries), 6
+            ),
+        }
+
+    def get(self, user, url, **params):
+        """Return a scenario requesting an admin URL as a user."""
+        client = django.test.Client()
+        client.force_login(user)
+
+        def scenario():
+            response = client.get(url, params)
+            if response.status_code != 200:
+                raise django.core.management.base.CommandError(
+                    f"GET {url} returned {response.status_code}"
+                )
+
+        return scenario
+
+    def get_last_page(self, user):
+        """Get the number of the last page of the snippet listing as a user."""
+        viewset = self.model.snippet_viewset
+        count = viewset.permission_policy.instances_user_has_any_permission_for(
+            user, viewset.index_view.view_class.any_permission_required
+        ).count()
+        return max(math.ceil(count / viewset.list_per_page), 1)
+
+    def filter_snippets(self):
+        """Apply the snippet filter set as the editor."""
+        request = django.test.RequestFactory().get(
+            "/", {"collection_id": self.collections[1].pk}
+        )
+        request.user = django.contrib.auth.get_user_model().objects.get(
+            pk=self.editor.pk
+        )
+        collection_snippets.views.SnippetFilter(
+            request.GET,
+            queryset=self.model.objects.all(),
+            request=request,
+        ).qs.count()
+
+    def purge_urls(self):
+        """Resolve the URLs purged when the referenced snippet changes."""
+        collection_snippets.frontend_cache.get_urls_to_purge(
+            self.model,
+            [(self.referenced_snippet.pk, self.referenced_snippet.locale_id)],
+        )
+
+    def run_scenarios(self):
+        """Measure all views and signals."""
+        viewset = self.model.snippet_viewset
+        index_url = django.urls.reverse(viewset.get_url_name("list"))
+        choose_results_url = django.urls.reverse(
+            viewset.chooser_viewset.get_url_name("choose_results")
+        )
+        model_index_url = django.urls.reverse("wagtailsnippets:index")
+        collection_id = self.collections[1].pk
+        scenarios = {}
+        for role, user in [("editor", self.editor), ("superuser", self.superuser)]:
+            scenarios.update(
+                {
+                    f"index.{role}": self.get(user, index_url),
+                    f"index.{role}.collection": self.get(
+                        user, index_url, collection_id=collection_id
+                    ),
+                    f"index.{role}.last_page": self.get(
+                        user, index_url, p=self.get_last_page(user)
+                    ),
+                    f"choose_results.{role}": self.get(user, choose_results_url),
+                    f"choose_results.{role}.search": self.get(
+                        user, choose_results_url, q="snippet 1"
+                    ),
+                    f"model_index.{role}": self.get(user, model_index_url),
+                }
+            )
+        scenarios["snippet_filter.editor"] = self.filter_snippets
+        scenarios["snippet_changed.urls"] = self.purge_urls
+        results = {}
+        for name, scenario in scenarios.items():
+            self.log(f"Measuring {name}")
+            results[name] = self.measure(scenario)
+        return results
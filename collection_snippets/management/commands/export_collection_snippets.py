@@ -0,0 +1,55 @@
+"""Export the snippets of a collection subtree as JSON lines."""
+
+import django
+import django.core.management.base
+import wagtail.models
+
+import collection_snippets.transfer
+
+
+class Command(django.core.management.base.BaseCommand):
+    """Export the snippets of a collection subtree as JSON lines.
+
+    Every collection snippet in the collection and its descendants is written
+    as one JSON object per line, with its collection as the names of the path
+    from the exported collection and its locale as language code. Snippets are
+    streamed in chunks, so memory use doesn't depend on their number.
+    """
+
+    help = __doc__.splitlines()[0]
+
+    def add_arguments(self, parser):
+        """Add collection, output and chunk size arguments."""
+        parser.add_argument("collection_id", type=int)
+        parser.add_argument(
+            "--output", help="Write snippets to this file instead of stdout."
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            help="Number of snippets loaded per query. Defaults to "
+            "COLLECTION_SNIPPETS_BULK_CHUNK_SIZE.",
+        )
+
+    def handle(self, *args, **options):
+        """Write the snippets of the collection subtree."""
+        try:
+            root = wagtail.models.Collection.objects.get(pk=options["collection_id"])
+        except wagtail.models.Collection.DoesNotExist:
+            raise django.core.management.base.CommandError(
+                f"Collection {options['collection_id']} does not exist."
+            )
+        lines = collection_snippets.transfer.export_snippets(
+            root, options["chunk_size"]
+        )
+        if not options["output"]:
+            for line in lines:
+                self.stdout.write(line)
+            return
+        count = 0
+        with open(options["output"], "w") as file:
+            for line in lines:
+                file.write(line + "\n")
+                count += 1
+        if options["verbosity"] > 0:
+            self.stderr.write(f"Exported {count} snippets to {options['output']}")
@@ -0,0 +1,74 @@
+"""Import snippets exported with export_collection_snippets."""
+
+import sys
+
+import django
+import django.core.management.base
+import wagtail.models
+
+import collection_snippets.transfer
+
+
+class Command(django.core.management.base.BaseCommand):
+    """Import snippets exported with export_collection_snippets.
+
+    The exported collection tree is recreated below the parent collection.
+    Snippets are matched by translation key and locale, so importing a file
+    again updates the snippets instead of duplicating them. Snippets are
+    created and updated in batches and reference and search indexes are updated
+    in a single pass at the end.
+    """
+
+    help = __doc__.splitlines()[0]
+
+    def add_arguments(self, parser):
+        """Add input, parent collection and batch size arguments."""
+        parser.add_argument("input", help="JSON lines file, or - for stdin.")
+        parser.add_argument(
+            "--parent",
+            type=int,
+            help="ID of the collection to import into. Defaults to the root "
+            "collection.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of snippets created or updated per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        """Import the snippets and update the indexes."""
+        if options["parent"] is None:
+            parent = wagtail.models.Collection.get_first_root_node()
+        else:
+            try:
+                parent = wagtail.models.Collection.objects.get(pk=options["parent"])
+            except wagtail.models.Collection.DoesNotExist:
+                raise django.core.management.base.CommandError(
+                    f"Collection {options['parent']} does not exist."
+                )
+        importer = collection_snippets.transfer.SnippetImporter(
+            parent, options["batch_size"]
+        )
+        try:
+            if options["input"] == "-":
+                importer.import_lines(sys.stdin)
+            else:
+                with open(options["input"]) as file:
+                    importer.import_lines(file)
+        except django.core.exceptions.ObjectDoesNotExist as error:
+            raise django.core.management.base.CommandError(
+                f"Snippets refer to a missing object: {error}"
+            )
+        if options["verbosity"] > 0:
+            self.stderr.write(
+                f"Created {importer.created} and updated {importer.updated} "
+                "snippets, updating indexes"
+            )
+        importer.update_indexes(options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {importer.created + importer.updated} snippets"
+            )
+        )
@@ -0,0 +1,203 @@
+"""Delete old revisions of collection snippets."""
+
+import django
+import django.core.management.base
+import wagtail.models
+import wagtail.snippets.models
+
+import collection_snippets.models
+
+
+def get_retention():
+    """Get the number of revisions to keep per snippet type, by model label."""
+    return {
+        label.lower(): keep
+        for label, keep in getattr(
+            django.conf.settings, "COLLECTION_SNIPPETS_REVISION_RETENTION", {}
+        ).items()
+    }
+
+
+class Command(django.core.management.base.BaseCommand):
+    """Delete old revisions of collection snippets.
+
+    The latest revisions of every snippet are kept, as well as its live and
+    latest revision, revisions scheduled to be published and revisions in
+    moderation. Snippets are processed in chunks, so memory use and transaction
+    size don't depend on the number of revisions.
+    """
+
+    help = __doc__.splitlines()[0]
+
+    def add_arguments(self, parser):
+        """Add retention, chunk size and dry run arguments."""
+        parser.add_argument(
+            "models",
+            nargs="*",
+            metavar="app_label.ModelName",
+            help="Snippet models to prune. Defaults to all registered collection "
+            "snippet models.",
+        )
+        parser.add_argument(
+            "--keep",
+            type=int,
+            help="Number of revisions to keep per snippet, for snippet models "
+            "missing from COLLECTION_SNIPPETS_REVISION_RETENTION. Models without "
+            "a retention are skipped.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Number of snippets whose revisions are pruned per transaction.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count the revisions that would be deleted.",
+        )
+
+    def handle(self, *args, **options):
+        """Prune the revisions of all selected snippet models."""
+        self.options = options
+        retention = get_retention()
+        for model in self.get_models(options["models"]):
+            keep = retention.get(model._meta.label_lower, options["keep"])
+            if keep is None:
+                self.log(f"{model._meta.label}: no retention configured, skipped")
+                continue
+            if keep < 0:
+                raise django.core.management.base.CommandError(
+                    f"{model._meta.label}: retention must not be negative."
+                )
+            deleted, protected = self.prune(model, keep)
+            if options["dry_run"]:
+                self.stdout.write(
+                    f"{model._meta.label}: {deleted} revisions would be deleted"
+                )
+                continue
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{model._meta.label}: deleted {deleted} revisions, ignored "
+                    f"{protected} revisions with protected relations"
+                )
+            )
+
+    def get_models(self, labels):
+        """Get the snippet models to prune."""
+        if not labels:
+            return [
+                model
+                for model in wagtail.snippets.models.get_snippet_models()
+                if issubclass(model, collection_snippets.models.AbstractSnippet)
+            ]
+        models = []
+        for label in labels:
+            try:
+                model = django.apps.apps.get_model(label)
+            except (LookupError, ValueError) as error:
+                raise django.core.management.base.CommandError(str(error))
+            if not issubclass(model, collection_snippets.models.AbstractSnippet):
+                raise django.core.management.base.CommandError(
+                    f"{label} is not a collection snippet model."
+                )
+            models.append(model)
+        return models
+
+    def log(self, message):
+        """Report progress."""
+        if self.options["verbosity"] > 0:
+            self.stderr.write(message)
+
+    def get_purgeable_revisions(self, model, keep, snippets):
+        """Get the revisions of a chunk of snippets beyond the ones to keep."""
+        content_type = (
+            django.contrib.contenttypes.models.ContentType.objects.get_for_model(model)
+        )
+        revisions = wagtail.models.Revision.objects.filter(
+            content_type=content_type,
+            object_id__in=[str(pk) for pk, _live, _latest in snippets],
+        )
+        # Rank revisions per snippet, newest first, and only select those beyond
+        # the ones to keep.
+        ranked = (
+            revisions.annotate(
+                rank=django.db.models.Window(
+                    django.db.models.functions.RowNumber(),
+                    partition_by=[django.db.models.F("object_id")],
+                    order_by=[
+                        django.db.models.F("created_at").desc(),
+                        django.db.models.F("id").desc(),
+                    ],
+                )
+            )
+            .filter(rank__gt=keep)
+            .values_list("id", flat=True)
+        )
+        referenced = {
+            revision_id
+            for _pk, *revision_ids in snippets
+            for revision_id in revision_ids
+            if revision_id is not None
+        }
+        purgeable = (
+            wagtail.models.Revision.objects.filter(id__in=list(ranked))
+            .exclude(id__in=referenced)
+            .exclude(approved_go_live_at__isnull=False)
+        )
+        if getattr(django.conf.settings, "WAGTAIL_WORKFLOW_ENABLED", True):
+            purgeable = purgeable.exclude(
+                task_states__workflow_state__status__in=[
+                    wagtail.models.WorkflowState.STATUS_IN_PROGRESS,
+                    wagtail.models.WorkflowState.STATUS_NEEDS_CHANGES,
+                ]
+            )
+        return list(purgeable.values_list("id", flat=True))
+
+    def delete_revisions(self, revision_ids):
+        """Delete revisions, one by one if some have protected relations."""
+        try:
+            with django.db.transaction.atomic():
+                wagtail.models.Revision.objects.filter(id__in=revision_ids).delete()
+            return len(revision_ids), 0
+        except django.db.models.ProtectedError:
+            pass
+        deleted = protected = 0
+        for revision in wagtail.models.Revision.objects.filter(id__in=revision_ids):
+            try:
+                revision.delete()
+                deleted += 1
+            except django.db.models.ProtectedError:
+                protected += 1
+        return deleted, protected
+
+    def prune(self, model, keep):
+        """Prune the revisions of a snippet model in chunks of snippets."""
+        snippets = model._base_manager.order_by("pk").values_list(
+            "pk", "live_revision_id", "latest_revision_id"
+        )
+        chunk_size = self.options["chunk_size"]
+        scanned = deleted = protected = 0
+        last_pk = None
+        while True:
+            chunk = list(
+                (snippets if last_pk is None else snippets.filter(pk__gt=last_pk))[
+                    :chunk_size
+                ]
+            )
+            if not chunk:
+                break
+            last_pk = chunk[-1][0]
+            revision_ids = self.get_purgeable_revisions(model, keep, chunk)
+            if revision_ids and not self.options["dry_run"]:
+                chunk_deleted, chunk_protected = self.delete_revisions(revision_ids)
+                deleted += chunk_deleted
+                protected += chunk_protected
+            else:
+                deleted += len(revision_ids)
+            scanned += len(chunk)
+            self.log(
+                f"{model._meta.label}: {scanned} snippets scanned, {deleted} "
+                f"revisions {'to delete' if self.options['dry_run'] else 'deleted'}"
+            )
+        return deleted, protected
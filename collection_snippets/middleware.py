@@ -0,0 +1,55 @@
+"""Middleware."""
+
+import django
+
+import collection_snippets.cache_tags
+import collection_snippets.routers
+
+
+class CacheTagMiddleware:
+    """Add cache tags collected while rendering a response as a response header."""
+
+    def __init__(self, get_response):
+        """Initialize middleware."""
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """Set the cache tag header if any tags were added to the request."""
+        response = self.get_response(request)
+        if tags := getattr(
+            request, collection_snippets.cache_tags.REQUEST_ATTRIBUTE, None
+        ):
+            header = getattr(
+                django.conf.settings,
+                "COLLECTION_SNIPPETS_CACHE_TAG_HEADER",
+                "Surrogate-Key",
+            )
+            separator = getattr(
+                django.conf.settings, "COLLECTION_SNIPPETS_CACHE_TAG_SEPARATOR", " "
+            )
+            response[header] = separator.join(sorted(tags))
+        return response
+
+
+class ReplicaPinMiddleware:
+    """Read from the primary database for a while after changing data.
+
+    Replicas lag behind the primary, so editors get listings including their
+    own changes for ``COLLECTION_SNIPPETS_REPLICA_PIN_SECONDS`` after a
+    successful request changing data.
+    """
+
+    def __init__(self, get_response):
+        """Initialize middleware."""
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """Pin the client to the primary after a successful unsafe request."""
+        response = self.get_response(request)
+        if (
+            collection_snippets.routers.get_replica_alias() is not None
+            and request.method not in {"GET", "HEAD", "OPTIONS", "TRACE"}
+            and response.status_code < 400
+        ):
+            collection_snippets.routers.pin_to_primary(response)
+        return response
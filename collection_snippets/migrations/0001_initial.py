@@ -11,7 +11,9 @@ from django.db import migrations, models
 class Migration(migrations.Migration):
     initial = True
 
-    dependencies = []
+    dependencies = [
+        ("wagtailcore", "0070_rename_pagerevision_revision"),
+    ]
 
     operations = [
         migrations.CreateModel(
@@ -0,0 +1,33 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("collectionsnippets", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="snippet",
+            index=models.Index(
+                fields=["collection", "locale", "id"],
+                name="collsnip_collection_locale_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="snippet",
+            index=models.Index(
+                condition=models.Q(("go_live_at__isnull", False)),
+                fields=["go_live_at"],
+                name="collsnip_go_live_at_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="snippet",
+            index=models.Index(
+                condition=models.Q(("expire_at__isnull", False), ("live", True)),
+                fields=["expire_at"],
+                name="collsnip_live_expire_at_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("collectionsnippets", "0002_snippet_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="snippet",
+            options={
+                "permissions": [
+                    ("choose_snippet", "Can choose snippet"),
+                    ("publish_snippet", "Can publish snippet"),
+                ]
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.14 on 2026-10-17 03:22
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("collectionsnippets", "0003_snippet_publish_permission"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="snippet",
+            options={
+                "default_permissions": ("add", "change", "delete", "view", "choose"),
+                "permissions": [("publish_snippet", "Can publish snippet")],
+            },
+        ),
+    ]
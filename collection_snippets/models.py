@@ -1,26 +1,41 @@
 """Snippet models."""
 
+import functools
+
 import django
 import wagtail.contrib.settings.context_processors
+import wagtail.hooks
 import wagtail.models
-import wagtail.permission_policies.collections
+import wagtail.search.index
 import wagtail.snippets.models
 from django.utils.translation import gettext_lazy as _
 
+import collection_snippets.fragments
+import collection_snippets.frontend_cache
+import collection_snippets.instrumentation
+import collection_snippets.permissions
+import collection_snippets.routers
+
 
-class Snippet(
+class AbstractSnippet(
     wagtail.models.CollectionMember,
     wagtail.models.DraftStateMixin,
     wagtail.models.RevisionMixin,
     wagtail.models.PreviewableMixin,
     wagtail.models.TranslatableMixin,
+    wagtail.search.index.Indexed,
     django.db.models.Model,
 ):
-    """Base translatable snippet class with revisions and preview, using collections."""
+    """Abstract translatable snippet with revisions and preview, using collections.
+
+    Every snippet type based on it has its own table and its own permissions,
+    so listings don't join a shared parent table.
+    """
 
     class Meta(wagtail.models.TranslatableMixin.Meta):
         # noqa: D106 (skipping nested class docstring)
-        permissions = [("choose_snippet", "Can choose snippet")]
+        abstract = True
+        default_permissions = ("add", "change", "delete", "view", "choose")
 
     title = django.db.models.CharField(
         max_length=255,
@@ -28,6 +43,14 @@ class Snippet(
         help_text=_("The internal title used in the administrative interface."),
     )
 
+    search_fields = [
+        wagtail.search.index.SearchField("title"),
+        wagtail.search.index.AutocompleteField("title"),
+        wagtail.search.index.FilterField("collection"),
+        wagtail.search.index.FilterField("locale"),
+        wagtail.search.index.FilterField("live"),
+    ]
+
     panels = [
         wagtail.admin.panels.FieldPanel("collection"),
         wagtail.admin.panels.FieldPanel("title"),
@@ -50,38 +73,133 @@ class Snippet(
 
     def get_preview_template(self, request, mode_name):
         """Provide a template for the preview."""
-        return [
-            f"{self._meta.app_label}/previews/{self._meta.model_name}.html",
+        return get_preview_template_name(type(self))
+
+
+@functools.cache
+def get_preview_template_name(model):
+    """Resolve the preview template of a snippet type once."""
+    return django.template.loader.select_template(
+        [
+            f"{model._meta.app_label}/previews/{model._meta.model_name}.html",
             "collectionsnippets/preview.html",
         ]
+    ).template.name
+
+
+class AbstractMultiTableSnippet(AbstractSnippet):
+    """Abstract base of the snippet table shared through multi-table inheritance.
+
+    Multi-table children of ``Snippet`` without their own Meta look it up on
+    their bases and find this one before ``AbstractSnippet.Meta``, so they don't
+    get its translation uniqueness on fields that aren't local to them, nor
+    permissions of their own.
+    """
+
+    class Meta:
+        # noqa: D106 (skipping nested class docstring)
+        abstract = True
+
+
+class Snippet(AbstractMultiTableSnippet):
+    """Base translatable snippet class with revisions and preview, using collections."""
+
+    class Meta(AbstractSnippet.Meta):
+        # noqa: D106 (skipping nested class docstring)
+        permissions = [("publish_snippet", "Can publish snippet")]
+        indexes = [
+            # Listings and choosers filter by collection and locale.
+            django.db.models.Index(
+                fields=["collection", "locale", "id"],
+                name="collsnip_collection_locale_idx",
+            ),
+            # Scheduled publishing only looks at snippets with a schedule.
+            django.db.models.Index(
+                fields=["go_live_at"],
+                condition=django.db.models.Q(go_live_at__isnull=False),
+                name="collsnip_go_live_at_idx",
+            ),
+            django.db.models.Index(
+                fields=["expire_at"],
+                condition=django.db.models.Q(live=True, expire_at__isnull=False),
+                name="collsnip_live_expire_at_idx",
+            ),
+        ]
+
+
+def get_snippet_models():
+    """Get all registered collection snippet types."""
+    return [
+        model
+        for model in wagtail.snippets.models.get_snippet_models()
+        if issubclass(model, AbstractSnippet) and not model._meta.abstract
+    ]
+
+
+def get_base_model(model):
+    """Get the model holding the collection and permissions of a snippet type."""
+    return Snippet if issubclass(model, Snippet) else model
+
+
+def get_permissions_formset(model):
+    """Build the group collection permissions formset of a snippet type."""
+    permission_types = [
+        (django.contrib.auth.get_permission_codename(action, model._meta), *labels)
+        for action, *labels in [
+            ("add", _("Add"), _("Add/edit snippets you own")),
+            ("change", _("Edit"), _("Edit any snippet")),
+            ("publish", _("Publish"), _("Publish any snippet")),
+            ("choose", _("Choose"), _("Select snippets in choosers")),
+        ]
+    ]
+    formset = (
+        wagtail.admin.forms.collections.collection_member_permission_formset_factory(
+            model,
+            permission_types,
+            "collectionsnippets/snippet_type_permissions_formset.html",
+        )
+    )
+    return type(
+        formset.__name__,
+        (formset,),
+        {"verbose_name_plural": model._meta.verbose_name_plural},
+    )
 
 
 @django.dispatch.receiver((wagtail.signals.published, wagtail.signals.unpublished))
+@collection_snippets.routers.use_primary()
 def snippet_changed(instance, **kwargs):
     """When a snippet changed, purge the cache for all pages displaying the snippet."""
-    if isinstance(instance, Snippet) is False:
+    if isinstance(instance, AbstractSnippet) is False:
         return
-    batch = wagtail.contrib.frontend_cache.utils.PurgeBatch()
-    references = wagtail.models.ReferenceIndex.get_references_to(instance)
-    for source, _ in references.group_by_source_object():
-        if hasattr(source, "full_url"):
-            batch.add_page(source)
-        elif hasattr(source, "site"):
-            if localized_root := source.site.root_page.get_translation_or_none(
-                instance.locale
-            ):
-                batch.add_pages(localized_root.get_descendants(inclusive=True))
-    batch.purge()
+    with collection_snippets.instrumentation.record(
+        "snippet_changed", model=instance._meta.label, pk=instance.pk
+    ):
+        django.db.transaction.on_commit(
+            functools.partial(
+                collection_snippets.fragments.invalidate_snippet,
+                type(instance),
+                instance.pk,
+            )
+        )
+        collection_snippets.frontend_cache.purge_snippet(instance)
 
 
 def register_snippet(model):
-    """Register snippets with the collection snippets admin viewset."""
+    """Register snippets with the collection snippets admin viewset.
+
+    Snippet types with their own permissions also get their own collection
+    permissions panel in the group settings.
+    """
     wagtail.snippets.models.register_snippet(
         model, viewset="collection_snippets.views.ViewSet"
     )
+    if get_base_model(model) is model:
+        wagtail.hooks.register(
+            "register_group_permission_panel",
+            functools.partial(get_permissions_formset, model),
+        )
     return model
 
 
-permission_policy = wagtail.permission_policies.collections.CollectionPermissionPolicy(
-    Snippet
-)
+permission_policy = collection_snippets.permissions.CollectionPermissionPolicy(Snippet)
@@ -0,0 +1,207 @@
+"""Keyset pagination of snippet listings."""
+
+import json
+
+import django
+from django.utils.translation import gettext_lazy as _
+
+SALT = "collection_snippets.pagination"
+
+
+def is_enabled():
+    """Check whether listings are paginated by keyset instead of offset."""
+    return getattr(django.conf.settings, "COLLECTION_SNIPPETS_KEYSET_PAGINATION", False)
+
+
+class CursorSerializer:
+    """Serialize cursors to JSON, including dates and decimals."""
+
+    def dumps(self, obj):
+        """Serialize a cursor."""
+        return json.dumps(
+            obj,
+            separators=(",", ":"),
+            cls=django.core.serializers.json.DjangoJSONEncoder,
+        ).encode("latin-1")
+
+    def loads(self, data):
+        """Deserialize a cursor."""
+        return json.loads(data.decode("latin-1"))
+
+
+def encode_cursor(number, direction, value, pk):
+    """Encode the position of a page as a signed token.
+
+    Tokens aren't timestamped, so the same position always gets the same token.
+    """
+    return django.core.signing.Signer(salt=SALT).sign_object(
+        [number, direction, value, pk], serializer=CursorSerializer
+    )
+
+
+def decode_cursor(token):
+    """Decode a signed token into the position of a page."""
+    try:
+        number, direction, value, pk = django.core.signing.Signer(
+            salt=SALT
+        ).unsign_object(token, serializer=CursorSerializer)
+    except (django.core.signing.BadSignature, TypeError, ValueError):
+        raise django.core.paginator.PageNotAnInteger(_("Invalid page cursor."))
+    if direction not in {"after", "before"} or not isinstance(number, int):
+        raise django.core.paginator.PageNotAnInteger(_("Invalid page cursor."))
+    return number, direction, value, pk
+
+
+def after(name, descending, value, pk):
+    """Filter rows following the key (value, pk), with nulls sorted lowest."""
+    operator = "lt" if descending else "gt"
+    following_pk = django.db.models.Q(**{f"pk__{operator}": pk})
+    if name == "pk":
+        return following_pk
+    if value is None:
+        following = django.db.models.Q(**{f"{name}__isnull": True}) & following_pk
+        if not descending:
+            following |= django.db.models.Q(**{f"{name}__isnull": False})
+        return following
+    following = django.db.models.Q(**{f"{name}__{operator}": value})
+    following |= django.db.models.Q(**{name: value}) & following_pk
+    if descending:
+        following |= django.db.models.Q(**{f"{name}__isnull": True})
+    return following
+
+
+def order_by(name, descending):
+    """Order rows by the key (name, pk), with nulls sorted lowest."""
+    pk = django.db.models.F("pk")
+    if name == "pk":
+        return [pk.desc() if descending else pk.asc()]
+    if descending:
+        return [django.db.models.F(name).desc(nulls_last=True), pk.desc()]
+    return [django.db.models.F(name).asc(nulls_first=True), pk.asc()]
+
+
+class KeysetPage(django.core.paginator.Page):
+    """Page linking to its neighbours by cursor tokens instead of numbers."""
+
+    def __init__(self, object_list, number, paginator, previous_cursor, next_cursor):
+        """Initialize the page with the cursors of its neighbours."""
+        super().__init__(object_list, number, paginator)
+        self.previous_cursor = previous_cursor
+        self.next_cursor = next_cursor
+
+    def has_next(self):
+        """Check whether a following page exists."""
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        """Check whether a preceding page exists."""
+        return self.previous_cursor is not None
+
+    def next_page_number(self):
+        """Return the cursor of the following page, used in pagination links."""
+        return self.next_cursor
+
+    def previous_page_number(self):
+        """Return the cursor of the preceding page, used in pagination links."""
+        return self.previous_cursor
+
+
+class KeysetPaginator(django.core.paginator.Paginator):
+    """Paginator seeking pages by the ordering key instead of an offset.
+
+    Rows are ordered by a single field or annotation and the primary key, so a
+    page is fetched with an indexed range filter and every page costs the same.
+    Pages are requested by cursor tokens, while page numbers are still accepted
+    for the first page and old links. Querysets with other orderings are
+    paginated by offset.
+    """
+
+    def __init__(self, object_list, per_page, **kwargs):
+        """Initialize the paginator and detect the ordering key."""
+        super().__init__(object_list, per_page, **kwargs)
+        self.key = self.get_key(object_list)
+
+    @staticmethod
+    def get_key(queryset):
+        """Return (name, descending) of the queryset's ordering key, if supported."""
+        if not isinstance(queryset, django.db.models.QuerySet):
+            return None
+        terms = list(queryset.query.order_by)
+        if not terms:
+            return None
+        term = terms.pop(0)
+        if isinstance(term, str):
+            name, descending = term.lstrip("-"), term.startswith("-")
+        elif isinstance(term, django.db.models.OrderBy) and isinstance(
+            term.expression, django.db.models.F
+        ):
+            name, descending = term.expression.name, term.descending
+        else:
+            return None
+        pk_names = {"pk", queryset.model._meta.pk.attname}
+        if name in pk_names:
+            name = "pk"
+        elif name not in queryset.query.annotations:
+            try:
+                field = queryset.model._meta.get_field(name)
+            except django.core.exceptions.FieldDoesNotExist:
+                return None
+            if field.is_relation:
+                return None
+        tiebreakers = {f"-{pk_name}" if descending else pk_name for pk_name in pk_names}
+        if name != "pk" and terms and not (len(terms) == 1 and terms[0] in tiebreakers):
+            return None
+        return name, descending
+
+    def page(self, number):
+        """Return the page at a page number or cursor token."""
+        if self.key is None:
+            return super().page(number)
+        name, descending = self.key
+        queryset = self.object_list
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            number, direction, value, pk = decode_cursor(number)
+            if direction == "before":
+                queryset = queryset.filter(after(name, not descending, value, pk))
+                rows = list(
+                    queryset.order_by(*order_by(name, not descending))[
+                        : self.per_page + 1
+                    ]
+                )
+                has_previous = len(rows) > self.per_page
+                rows = rows[: self.per_page][::-1]
+                return self._get_keyset_page(rows, number, has_previous, True)
+            queryset = queryset.filter(after(name, descending, value, pk))
+            offset = 0
+        else:
+            # The first page exists without counting rows.
+            if number != 1 or not self.allow_empty_first_page:
+                number = self.validate_number(number)
+            offset = (number - 1) * self.per_page
+        rows = list(
+            queryset.order_by(*order_by(name, descending))[
+                offset : offset + self.per_page + 1
+            ]
+        )
+        has_next = len(rows) > self.per_page
+        return self._get_keyset_page(
+            rows[: self.per_page], number, number > 1, has_next
+        )
+
+    def _get_keyset_page(self, rows, number, has_previous, has_next):
+        """Build a page of rows with cursors to its neighbours."""
+        name, _descending = self.key
+        previous_cursor = next_cursor = None
+        if rows and has_previous:
+            first = rows[0]
+            previous_cursor = encode_cursor(
+                max(number - 1, 1), "before", getattr(first, name), first.pk
+            )
+        if rows and has_next:
+            last = rows[-1]
+            next_cursor = encode_cursor(
+                number + 1, "after", getattr(last, name), last.pk
+            )
+        return KeysetPage(rows, number, self, previous_cursor, next_cursor)
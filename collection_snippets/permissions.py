@@ -0,0 +1,311 @@
+"""Collection permission policy with per-request memoization and shared caching."""
+
+import functools
+import hashlib
+import operator
+import uuid
+
+import django
+import wagtail.models
+import wagtail.permission_policies.collections
+
+import collection_snippets.instrumentation
+
+CACHE_PREFIX = "collection_snippets:permissions"
+
+
+def path_filter(paths, field_name="path"):
+    """Build a filter matching collection paths starting with any of the given paths."""
+    return functools.reduce(
+        operator.or_,
+        (django.db.models.Q(**{f"{field_name}__startswith": path}) for path in paths),
+        django.db.models.Q(pk__in=[]),
+    )
+
+
+def root_paths(paths):
+    """Reduce collection paths to the top-most ones, dropping their descendants."""
+    roots = []
+    for path in sorted(paths):
+        if not roots or not path.startswith(roots[-1]):
+            roots.append(path)
+    return tuple(roots)
+
+
+def get_permission_cache():
+    """Get the cache configured for group collection permissions, if any."""
+    if alias := getattr(
+        django.conf.settings, "COLLECTION_SNIPPETS_PERMISSION_CACHE", None
+    ):
+        return django.core.cache.caches[alias]
+    return None
+
+
+def get_permission_cache_timeout():
+    """Get the timeout of cached group collection permissions."""
+    return getattr(
+        django.conf.settings, "COLLECTION_SNIPPETS_PERMISSION_CACHE_TIMEOUT", 3600
+    )
+
+
+def get_cache_version(cache):
+    """Get the token that namespaces all currently valid cache entries."""
+    return cache.get_or_set(
+        f"{CACHE_PREFIX}:version", lambda: uuid.uuid4().hex, timeout=None
+    )
+
+
+def invalidate_permission_cache():
+    """Invalidate all cached group collection permissions."""
+    if cache := get_permission_cache():
+        cache.set(f"{CACHE_PREFIX}:version", uuid.uuid4().hex, timeout=None)
+
+
+def _compute_group_permissions(group_ids, content_type):
+    """Expand the collection permissions of groups to collection ID closures."""
+    rows = wagtail.models.GroupCollectionPermission.objects.filter(
+        group_id__in=group_ids, permission__content_type=content_type
+    ).values_list("group_id", "permission__codename", "collection__path")
+    granted = {group_id: {} for group_id in group_ids}
+    for group_id, codename, path in rows:
+        granted[group_id].setdefault(codename, set()).add(path)
+    all_paths = root_paths(
+        path
+        for codenames in granted.values()
+        for paths in codenames.values()
+        for path in paths
+    )
+    collections = (
+        wagtail.models.Collection.objects.filter(path_filter(all_paths)).values_list(
+            "pk", "path"
+        )
+        if all_paths
+        else []
+    )
+    return {
+        group_id: {
+            codename: {
+                "paths": (roots := root_paths(paths)),
+                "ids": frozenset(
+                    pk for pk, path in collections if path.startswith(roots)
+                ),
+            }
+            for codename, paths in codenames.items()
+        }
+        for group_id, codenames in granted.items()
+    }
+
+
+def get_group_permissions(cache, user, content_type):
+    """Get the cached collection permissions of all groups of a user."""
+    timeout = get_permission_cache_timeout()
+    prefix = f"{CACHE_PREFIX}:{get_cache_version(cache)}"
+    user_key = f"{prefix}:user:{user.pk}"
+    group_ids = cache.get(user_key)
+    if group_ids is None:
+        group_ids = list(user.groups.values_list("pk", flat=True))
+        cache.set(user_key, group_ids, timeout)
+    keys = {
+        f"{prefix}:group:{group_id}:{content_type.pk}": group_id
+        for group_id in group_ids
+    }
+    cached = cache.get_many(keys)
+    if missing := [group_id for key, group_id in keys.items() if key not in cached]:
+        computed = _compute_group_permissions(missing, content_type)
+        computed = {
+            key: computed[group_id]
+            for key, group_id in keys.items()
+            if group_id in computed
+        }
+        cache.set_many(computed, timeout)
+        cached.update(computed)
+    return list(cached.values())
+
+
+class CollectionPermissionPolicy(
+    wagtail.permission_policies.collections.CollectionPermissionPolicy
+):
+    """Collection permission policy answering repeated lookups from memory.
+
+    The user's collection permissions are fetched once and resolved results are
+    memoized on the user object, so every view, filter and bulk action handling
+    the same request shares them.
+    """
+
+    resolved_cache_name = "_collection_snippets_permission_cache"
+
+    def _get_resolved_cache(self, user):
+        """Return the memo of resolved permissions for this user and auth model."""
+        if not hasattr(user, self.resolved_cache_name):
+            setattr(user, self.resolved_cache_name, {})
+        return getattr(user, self.resolved_cache_name).setdefault(
+            self.auth_model._meta.label_lower, {}
+        )
+
+    def _get_shared_permissions(self, user, actions):
+        """Return the user's group permissions for the actions from the shared cache."""
+        if (cache := get_permission_cache()) is None:
+            return None
+        memo = self._get_resolved_cache(user)
+        if "groups" not in memo:
+            memo["groups"] = get_group_permissions(cache, user, self._content_type)
+        codenames = {
+            django.contrib.auth.get_permission_codename(action, self.auth_model._meta)
+            for action in actions
+        }
+        return [
+            granted
+            for group in memo["groups"]
+            for codename, granted in group.items()
+            if codename in codenames
+        ]
+
+    def get_collection_paths(self, user, actions):
+        """Return the top-most collection paths granting any of the given actions."""
+        cache = self._get_resolved_cache(user)
+        key = ("paths", frozenset(actions))
+        if key not in cache:
+            with collection_snippets.instrumentation.phase("permissions"):
+                if (shared := self._get_shared_permissions(user, actions)) is not None:
+                    paths = (path for granted in shared for path in granted["paths"])
+                else:
+                    paths = (
+                        permission.collection.path
+                        for permission in self._get_user_permission_objects_for_actions(
+                            user, actions
+                        )
+                    )
+                cache[key] = root_paths(set(paths))
+        return cache[key]
+
+    def get_collection_ids(self, user, actions):
+        """Return the IDs of all collections granting any of the given actions."""
+        cache = self._get_resolved_cache(user)
+        key = ("ids", frozenset(actions))
+        if key not in cache:
+            with collection_snippets.instrumentation.phase("permissions"):
+                if (shared := self._get_shared_permissions(user, actions)) is not None:
+                    cache[key] = frozenset().union(
+                        *(granted["ids"] for granted in shared)
+                    )
+                elif paths := self.get_collection_paths(user, actions):
+                    cache[key] = frozenset(
+                        wagtail.models.Collection.objects.filter(
+                            path_filter(paths)
+                        ).values_list("pk", flat=True)
+                    )
+                else:
+                    cache[key] = frozenset()
+        return cache[key]
+
+    def get_permission_signature(self, user, actions):
+        """Return a string identifying the user's collection set for the actions."""
+        if not (user.is_active and user.is_authenticated):
+            return "none"
+        if user.is_superuser:
+            return "all"
+        return hashlib.sha1(
+            "|".join(self.get_collection_paths(user, actions)).encode()
+        ).hexdigest()
+
+    def _check_collection_perm(self, user, actions, collection_id=None):
+        """Check permissions against the memoized collection set."""
+        if not (user.is_active and user.is_authenticated):
+            return False
+        if user.is_superuser:
+            return True
+        if collection_id is None:
+            return bool(self.get_collection_paths(user, actions))
+        return collection_id in self.get_collection_ids(user, actions)
+
+    def user_has_permission(self, user, action):
+        """Check the user has the permission in any collection."""
+        return self._check_collection_perm(user, [action])
+
+    def user_has_any_permission(self, user, actions):
+        """Check the user has any of the permissions in any collection."""
+        return self._check_collection_perm(user, actions)
+
+    def user_has_permission_for_instance(self, user, action, instance):
+        """Check the user has the permission for the instance’s collection."""
+        return self._check_collection_perm(user, [action], instance.collection_id)
+
+    def user_has_any_permission_for_instance(self, user, actions, instance):
+        """Check the user has any of the permissions for the instance’s collection."""
+        return self._check_collection_perm(user, actions, instance.collection_id)
+
+    def collections_user_has_any_permission_for(self, user, actions):
+        """Get collections in which the user has any of the permissions."""
+        if user.is_active and user.is_superuser:
+            return wagtail.models.Collection.objects.all()
+        if not user.is_authenticated:
+            return wagtail.models.Collection.objects.none()
+        return wagtail.models.Collection.objects.filter(
+            path_filter(self.get_collection_paths(user, actions))
+        )
+
+    def instances_user_has_any_permission_for(self, user, actions):
+        """Get instances in collections in which the user has any of the permissions."""
+        if not (user.is_active and user.is_authenticated):
+            return self.model.objects.none()
+        if user.is_superuser:
+            return self.model.objects.all()
+        return self.model.objects.filter(
+            path_filter(self.get_collection_paths(user, actions), "collection__path")
+        )
+
+    def indexed_instances_user_has_any_permission_for(self, user, actions):
+        """Get instances the user has any of the permissions for, filtered by ID.
+
+        Search backends can only filter on indexed fields of the model itself, so
+        the permitted collections are given by ID instead of by path.
+        """
+        if not (user.is_active and user.is_authenticated):
+            return self.model.objects.none()
+        if user.is_superuser:
+            return self.model.objects.all()
+        return self.model.objects.filter(
+            collection_id__in=self.get_collection_ids(user, actions)
+        )
+
+
+def clear_cache(user):
+    """Forget the memoized collection permissions of a user."""
+    for name in (
+        CollectionPermissionPolicy.permission_cache_name,
+        CollectionPermissionPolicy.resolved_cache_name,
+    ):
+        if hasattr(user, name):
+            delattr(user, name)
+
+
+def _schedule_invalidation():
+    """Invalidate cached permissions once the current transaction is committed."""
+    if get_permission_cache() is not None:
+        django.db.transaction.on_commit(invalidate_permission_cache)
+
+
+@django.dispatch.receiver(
+    django.db.models.signals.post_save, sender="wagtailcore.GroupCollectionPermission"
+)
+@django.dispatch.receiver(
+    django.db.models.signals.post_delete, sender="wagtailcore.GroupCollectionPermission"
+)
+@django.dispatch.receiver(
+    django.db.models.signals.post_save, sender="wagtailcore.Collection"
+)
+@django.dispatch.receiver(
+    django.db.models.signals.post_delete, sender="wagtailcore.Collection"
+)
+def collection_permissions_changed(**kwargs):
+    """Invalidate cached permissions when group permissions or collections change."""
+    _schedule_invalidation()
+
+
+@django.dispatch.receiver(django.db.models.signals.m2m_changed)
+def group_membership_changed(sender, action, **kwargs):
+    """Invalidate cached permissions when users are added to or removed from groups."""
+    if action in {"post_add", "post_remove", "post_clear"} and (
+        sender is django.contrib.auth.get_user_model().groups.through
+    ):
+        _schedule_invalidation()
@@ -0,0 +1,82 @@
+"""In-process cache of rendered snippet previews."""
+
+import collections
+import hashlib
+import threading
+
+import django
+
+
+def get_preview_cache_size():
+    """Get the maximum number of rendered previews kept per process."""
+    return getattr(django.conf.settings, "COLLECTION_SNIPPETS_PREVIEW_CACHE_SIZE", 128)
+
+
+class LRUCache:
+    """Thread-safe mapping dropping the least recently used entries."""
+
+    def __init__(self):
+        """Initialize an empty cache."""
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+
+    def get(self, key):
+        """Get an entry and mark it as recently used."""
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def set(self, key, value, maxsize):
+        """Add an entry, dropping the least recently used ones beyond maxsize."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+
+preview_cache = LRUCache()
+
+
+def get_revision_key(revision_id, preview_mode, user):
+    """Get the cache key of a revision preview."""
+    return ("revision", revision_id, preview_mode, user.pk)
+
+
+def get_form_state_key(model, pk, post_data, preview_mode, in_preview_panel, user):
+    """Get the cache key of a live preview, hashing the submitted form state."""
+    return (
+        "form",
+        model._meta.label_lower,
+        pk,
+        hashlib.sha1(post_data.encode()).hexdigest(),
+        preview_mode,
+        in_preview_panel,
+        user.pk,
+    )
+
+
+def serve_cached_preview(key, render):
+    """Serve a preview from the cache, rendering and caching it on a miss."""
+    if (maxsize := get_preview_cache_size()) <= 0:
+        return render()
+    if (cached := preview_cache.get(key)) is not None:
+        content, status, headers = cached
+        return django.http.HttpResponse(content, status=status, headers=headers)
+    response = render()
+    if hasattr(response, "render") and not response.is_rendered:
+        response.render()
+    if response.status_code == 200 and not response.streaming:
+        preview_cache.set(
+            key,
+            (response.content, response.status_code, dict(response.items())),
+            maxsize,
+        )
+    return response
@@ -0,0 +1,97 @@
+"""Opt-in routing of read-only snippet listing queries to a read replica."""
+
+import contextlib
+import contextvars
+
+import django
+
+COOKIE_NAME = "collection_snippets_primary"
+SALT = "collection_snippets.routers"
+
+_replica_alias = contextvars.ContextVar("collection_snippets_replica", default=None)
+
+
+def get_replica_alias():
+    """Get the database alias of the read replica, if configured."""
+    return getattr(django.conf.settings, "COLLECTION_SNIPPETS_REPLICA_DATABASE", None)
+
+
+def get_pin_seconds():
+    """Get the number of seconds editors read from the primary after a change."""
+    return getattr(django.conf.settings, "COLLECTION_SNIPPETS_REPLICA_PIN_SECONDS", 10)
+
+
+def is_pinned(request):
+    """Check whether the request's user recently changed data."""
+    return (
+        request.get_signed_cookie(
+            COOKIE_NAME, default=None, salt=SALT, max_age=get_pin_seconds()
+        )
+        is not None
+    )
+
+
+def pin_to_primary(response):
+    """Let the user read from the primary until the replica caught up."""
+    response.set_signed_cookie(
+        COOKIE_NAME,
+        "1",
+        salt=SALT,
+        max_age=get_pin_seconds(),
+        httponly=True,
+        samesite="Lax",
+    )
+
+
+@contextlib.contextmanager
+def read_replica(request=None):
+    """Send read queries to the replica, unless the request's user is pinned."""
+    alias = get_replica_alias()
+    if alias is not None and request is not None and is_pinned(request):
+        alias = None
+    token = _replica_alias.set(alias)
+    try:
+        yield
+    finally:
+        _replica_alias.reset(token)
+
+
+@contextlib.contextmanager
+def use_primary():
+    """Send all queries to the primary, even within ``read_replica()``."""
+    token = _replica_alias.set(None)
+    try:
+        yield
+    finally:
+        _replica_alias.reset(token)
+
+
+class ReplicaRouter:
+    """Database router sending reads within ``read_replica()`` to the replica.
+
+    Reads in transactions on the primary stay on the primary, and objects read
+    from the replica are written to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        """Read from the replica within ``read_replica()``."""
+        alias = _replica_alias.get()
+        if alias is None:
+            return None
+        if django.db.connections[django.db.DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        """Write objects read from the replica to the primary."""
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db == get_replica_alias():
+            return django.db.DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Allow relations between objects of the primary and the replica."""
+        aliases = {django.db.DEFAULT_DB_ALIAS, get_replica_alias()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
@@ -0,0 +1,27 @@
+"""Template tags for collection snippets."""
+
+import django
+
+import collection_snippets.cache_tags
+import collection_snippets.fragments
+
+register = django.template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def cache_tags(context, *objects):
+    """Tag the current response with the cache tags of snippets or collections."""
+    if request := context.get("request"):
+        collection_snippets.cache_tags.add_cache_tags(request, *objects)
+    return ""
+
+
+@register.simple_tag(takes_context=True)
+def render_snippet(context, snippet, template_name, **kwargs):
+    """Render a snippet with a template, cached until the snippet is published."""
+    request = context.get("request")
+    if request:
+        collection_snippets.cache_tags.add_cache_tags(request, snippet)
+    return collection_snippets.fragments.render_snippet(
+        snippet, template_name, kwargs, request
+    )
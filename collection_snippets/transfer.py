@@ -0,0 +1,273 @@
+"""Export and import of snippets in collection subtrees as JSON lines."""
+
+import json
+
+import django
+import wagtail.models
+import wagtail.search.backends
+import wagtail.search.index
+
+import collection_snippets.bulk_action
+import collection_snippets.counts
+import collection_snippets.models
+
+# Fields exported separately, or referring to rows that aren't exported.
+EXCLUDED_FIELDS = {"collection", "locale", "latest_revision", "live_revision"}
+
+
+def get_fields(model):
+    """Get the fields of a snippet type that are exported."""
+    return [
+        field
+        for field in model._meta.concrete_fields
+        if not field.primary_key
+        and not (field.remote_field and field.remote_field.parent_link)
+        and field.name not in EXCLUDED_FIELDS
+    ]
+
+
+def has_natural_key(model):
+    """Check whether objects of a model can be looked up by natural key."""
+    return hasattr(model, "natural_key") and hasattr(
+        model._default_manager, "get_by_natural_key"
+    )
+
+
+def get_export_fields(model):
+    """Get the fields of a snippet type that are exported.
+
+    Foreign keys are exported by natural key, as IDs differ between sites, and
+    foreign keys to models without natural keys aren't exported.
+    """
+    return [
+        field
+        for field in get_fields(model)
+        if not field.is_relation or has_natural_key(field.related_model)
+    ]
+
+
+def get_collection_paths(root):
+    """Get the names of every collection of a subtree, from the root down, by ID."""
+    names, paths = {}, {}
+    for collection_id, path, name in (
+        wagtail.models.Collection.objects.filter(path__startswith=root.path)
+        .order_by("path")
+        .values_list("id", "path", "name")
+    ):
+        names[path] = [*names.get(path[: -root.steplen], []), name]
+        paths[collection_id] = names[path]
+    return paths
+
+
+def export_snippets(root, chunk_size=None):
+    """Iterate over all snippets of a collection subtree as JSON lines.
+
+    Snippets are loaded in chunks by primary key, so memory use doesn't depend on
+    the size of the subtree. Collections are exported as the names of the path
+    from the root of the subtree, locales as their language code and other
+    foreign keys by natural key.
+    """
+    collection_paths = get_collection_paths(root)
+    language_codes = dict(
+        wagtail.models.Locale.objects.values_list("id", "language_code")
+    )
+    for model in collection_snippets.models.get_snippet_models():
+        fields = get_export_fields(model)
+        queryset = model._base_manager.filter(collection__path__startswith=root.path)
+        for pks in collection_snippets.bulk_action.iter_pk_chunks(queryset, chunk_size):
+            for snippet in (
+                model._base_manager.filter(pk__in=pks)
+                .select_related(*(field.name for field in fields if field.is_relation))
+                .order_by("pk")
+            ):
+                record = {
+                    "model": model._meta.label,
+                    "collection": collection_paths[snippet.collection_id],
+                    "locale": language_codes[snippet.locale_id],
+                    "fields": {
+                        field.name: get_export_value(field, snippet) for field in fields
+                    },
+                }
+                yield json.dumps(
+                    record, cls=django.core.serializers.json.DjangoJSONEncoder
+                )
+
+
+def get_field_value(field, snippet):
+    """Get the serializable value of a field, like Django's serializers."""
+    value = field.value_from_object(snippet)
+    if field.is_relation or django.utils.encoding.is_protected_type(value):
+        return value
+    return field.value_to_string(snippet)
+
+
+def get_export_value(field, snippet):
+    """Get the exported value of a field, with foreign keys as natural keys."""
+    if not field.is_relation:
+        return get_field_value(field, snippet)
+    if (related := getattr(snippet, field.name)) is None:
+        return None
+    return related.natural_key()
+
+
+class SnippetImporter:
+    """Import snippets from JSON lines into a collection subtree.
+
+    Snippets are matched by translation key and locale, updated if they exist
+    and created otherwise, in batches per snippet type. Collections missing
+    below the parent collection are created. Reference and search indexes are
+    updated once all snippets are imported.
+    """
+
+    def __init__(self, parent, batch_size=1000):
+        """Initialize the importer with the collection to import below."""
+        self.parent = parent
+        self.batch_size = batch_size
+        self.collections = {}
+        self.locales = {}
+        self.related = {}
+        self.roots = set()
+        self.models = set()
+        self.created = self.updated = 0
+
+    def get_collection(self, names):
+        """Get or create the collection at a path of names below the parent."""
+        key = tuple(names)
+        if key not in self.collections:
+            parent = self.get_collection(names[:-1]) if len(names) > 1 else self.parent
+            collection = parent.get_children().filter(name=names[-1]).first()
+            if collection is None:
+                collection = parent.add_child(name=names[-1])
+            self.collections[key] = collection
+            if len(names) == 1:
+                self.roots.add(collection)
+        return self.collections[key]
+
+    def get_locale(self, language_code):
+        """Get a locale by language code."""
+        if language_code not in self.locales:
+            self.locales[language_code] = wagtail.models.Locale.objects.get(
+                language_code=language_code
+            )
+        return self.locales[language_code]
+
+    def get_related_pk(self, model, natural_key):
+        """Get the ID of an object by natural key."""
+        key = (model, tuple(natural_key))
+        if key not in self.related:
+            self.related[key] = model._default_manager.get_by_natural_key(
+                *natural_key
+            ).pk
+        return self.related[key]
+
+    def set_field_value(self, field, snippet, value):
+        """Set the value of a field from its exported value."""
+        if not field.is_relation:
+            setattr(snippet, field.attname, field.to_python(value))
+        elif value is None:
+            setattr(snippet, field.attname, None)
+        else:
+            setattr(
+                snippet,
+                field.attname,
+                self.get_related_pk(field.related_model, value),
+            )
+
+    def import_lines(self, lines):
+        """Import snippets from JSON lines, in batches of consecutive snippet types."""
+        model, batch = None, []
+        for line in lines:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            record_model = django.apps.apps.get_model(record["model"])
+            if batch and (record_model is not model or len(batch) >= self.batch_size):
+                self.import_batch(model, batch)
+                batch = []
+            model = record_model
+            batch.append(record)
+        if batch:
+            self.import_batch(model, batch)
+
+    def import_batch(self, model, records):
+        """Create or update a batch of snippets of a type in a transaction."""
+        fields = [
+            field
+            for field in get_export_fields(model)
+            if field.name in records[0]["fields"] or field.name == "translation_key"
+        ]
+        snippets = []
+        for record in records:
+            snippet = model(
+                collection=self.get_collection(record["collection"]),
+                locale=self.get_locale(record["locale"]),
+            )
+            for field in fields:
+                if field.name in record["fields"]:
+                    self.set_field_value(field, snippet, record["fields"][field.name])
+            snippets.append(snippet)
+        with django.db.transaction.atomic():
+            existing = {
+                (str(translation_key), locale_id): pk
+                for pk, translation_key, locale_id in model._base_manager.filter(
+                    translation_key__in=[
+                        snippet.translation_key for snippet in snippets
+                    ]
+                ).values_list("pk", "translation_key", "locale_id")
+            }
+            new, changed = [], []
+            for snippet in snippets:
+                pk = existing.get((str(snippet.translation_key), snippet.locale_id))
+                if pk is None:
+                    new.append(snippet)
+                else:
+                    snippet.pk = pk
+                    changed.append(snippet)
+            if new:
+                bulk_create(model, new)
+            if changed:
+                model._base_manager.bulk_update(
+                    changed,
+                    [field.name for field in fields if field.name != "translation_key"]
+                    + ["collection", "locale"],
+                )
+            collection_snippets.counts.schedule_invalidation()
+        self.models.add(model)
+        self.created += len(new)
+        self.updated += len(changed)
+
+    def update_indexes(self, chunk_size=None):
+        """Update the reference and search indexes of all imported snippets."""
+        for model in self.models:
+            for root in self.roots:
+                queryset = model._base_manager.filter(
+                    collection__path__startswith=root.path
+                )
+                for pks in collection_snippets.bulk_action.iter_pk_chunks(
+                    queryset, chunk_size
+                ):
+                    snippets = list(model._base_manager.filter(pk__in=pks))
+                    for snippet in snippets:
+                        wagtail.models.ReferenceIndex.create_or_update_for_object(
+                            snippet
+                        )
+                    if wagtail.search.index.class_is_indexed(model):
+                        for backend in wagtail.search.backends.get_search_backends(
+                            with_auto_update=True
+                        ):
+                            backend.add_bulk(model, snippets)
+
+
+def bulk_create(model, snippets):
+    """Create snippets in bulk, saving multi-table inheritance snippets one by one.
+
+    Multi-table inheritance children can't be created in bulk, as that needs
+    the IDs of their parent rows, which not all database backends return from
+    bulk inserts.
+    """
+    base_model = collection_snippets.models.get_base_model(model)
+    if model._meta.get_ancestor_link(base_model) is None:
+        model._base_manager.bulk_create(snippets)
+        return
+    for snippet in snippets:
+        snippet.save()
@@ -2,6 +2,7 @@
 
 import django
 import wagtail.admin.auth
+import wagtail.snippets.models
 import wagtail.utils.urlpatterns
 
 import collection_snippets.views
@@ -18,3 +19,17 @@ urlpatterns = wagtail.utils.urlpatterns.decorate_urlpatterns(
     ),
     django.views.decorators.cache.never_cache,
 )
+
+# Serve snippet choosers with async views, which Wagtail's admin URLs can't.
+urlpatterns += wagtail.utils.urlpatterns.decorate_urlpatterns(
+    [
+        pattern
+        for model in wagtail.snippets.models.get_snippet_models()
+        if isinstance(
+            model.snippet_viewset.chooser_viewset,
+            collection_snippets.views.ChooserViewSet,
+        )
+        for pattern in model.snippet_viewset.chooser_viewset.get_async_urlpatterns()
+    ],
+    django.views.decorators.cache.never_cache,
+)
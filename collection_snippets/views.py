@@ -1,17 +1,40 @@
 """Custom views."""
 
+import asyncio
+import functools
+import logging
+
+import asgiref.sync
 import django
+import wagtail.admin.auth
 import wagtail.admin.ui.tables
+import wagtail.admin.forms.choosers
 import wagtail.admin.utils
-import wagtail.permission_policies
+import wagtail.admin.views.generic.base
+import wagtail.models
+import wagtail.search.index
+import wagtail.snippets.models
+import wagtail.snippets.permissions
 import wagtail.snippets.views.chooser
 import wagtail.snippets.views.snippets
+import wagtail.utils.decorators
 from django.utils.translation import gettext_lazy as _
 
+import collection_snippets.counts
+import collection_snippets.filters
+import collection_snippets.instrumentation
 import collection_snippets.models
+import collection_snippets.pagination
+import collection_snippets.permissions
+import collection_snippets.previews
+import collection_snippets.routers
+
+logger = logging.getLogger(__name__)
 
 
-class CollectionPermissionMixin:
+class CollectionPermissionMixin(
+    collection_snippets.instrumentation.InstrumentedViewMixin
+):
     """Collection mixin for views with a snippet object."""
 
     def user_has_permission(self, permission):
@@ -31,6 +54,32 @@ class CollectionPermissionMixin:
         return super().user_has_any_permission(permissions)
 
 
+class ReplicaReadMixin:
+    """Mixin for read-only views sending their queries to the read replica.
+
+    Responses are rendered within the view, so queries made while rendering
+    templates are sent to the replica as well. Requests changing data and
+    requests of users pinned to the primary stay on the primary.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        """Handle safe requests within the read replica scope."""
+        if request.method not in {"GET", "HEAD"}:
+            return super().dispatch(request, *args, **kwargs)
+        if self.view_is_async:
+            return self.dispatch_replica_async(request, *args, **kwargs)
+        with collection_snippets.routers.read_replica(request):
+            response = super().dispatch(request, *args, **kwargs)
+            if hasattr(response, "render"):
+                response.render()
+            return response
+
+    async def dispatch_replica_async(self, request, *args, **kwargs):
+        """Await the response of an async view within the read replica scope."""
+        with collection_snippets.routers.read_replica(request):
+            return await super().dispatch(request, *args, **kwargs)
+
+
 class SnippetsFormViewMixin(CollectionPermissionMixin):
     """Collection mixin for views with a snippet form."""
 
@@ -69,7 +118,11 @@ class SnippetsFormViewMixin(CollectionPermissionMixin):
         return context
 
 
-class IndexView(wagtail.snippets.views.snippets.IndexView):
+class IndexView(
+    ReplicaReadMixin,
+    collection_snippets.instrumentation.InstrumentedViewMixin,
+    wagtail.snippets.views.snippets.IndexView,
+):
     """Custom snippets list view that filters by accessible collections."""
 
     list_display = ["__str__", "collection", wagtail.admin.ui.tables.UpdatedAtColumn()]
@@ -82,30 +135,64 @@ class IndexView(wagtail.snippets.views.snippets.IndexView):
 
     def get_base_queryset(self):
         """Get snippets filtered by collection permissions."""
+        actions = self.any_permission_required or [self.permission_required]
+        if self.search_query and wagtail.search.index.class_is_indexed(self.model):
+            return self.permission_policy.indexed_instances_user_has_any_permission_for(
+                self.request.user, actions
+            )
         return self.permission_policy.instances_user_has_any_permission_for(
-            self.request.user, self.any_permission_required or [self.permission_required]
+            self.request.user, actions
         )
 
+    def get_queryset(self):
+        """Record building the filtered, searched and ordered queryset."""
+        with collection_snippets.instrumentation.phase("queryset"):
+            return super().get_queryset()
+
+    def paginate_queryset(self, queryset, page_size):
+        """Paginate by page cursor if keyset pagination is enabled."""
+        with collection_snippets.instrumentation.phase("pagination"):
+            if not collection_snippets.pagination.is_enabled():
+                return super().paginate_queryset(queryset, page_size)
+            paginator = collection_snippets.pagination.KeysetPaginator(
+                queryset, page_size
+            )
+            try:
+                page = paginator.page(self.request.GET.get(self.page_kwarg) or 1)
+            except django.core.paginator.InvalidPage as error:
+                raise django.http.Http404(str(error))
+            return paginator, page, page.object_list, page.has_other_pages()
+
 
-class ModelIndexView(wagtail.snippets.views.snippets.ModelIndexView):
+class ModelIndexView(
+    ReplicaReadMixin,
+    collection_snippets.instrumentation.InstrumentedViewMixin,
+    wagtail.snippets.views.snippets.ModelIndexView,
+):
     """Custom snippets model index view to filter count by accessible collections."""
 
     def _get_snippet_types(self):
         """Filter snippet count by accessible collections and current filter."""
-        snippet_types = super()._get_snippet_types()
-
-        # Update counts
-        for snippet in snippet_types:
-            if not hasattr(snippet["model"], "collection"):
-                continue
-            queryset = snippet[
-                "model"
-            ].snippet_viewset.permission_policy.instances_user_has_any_permission_for(
-                self.request.user, {"add", "change", "delete", "view"}
+        # Build the list without calling super(), which counts each model separately.
+        snippet_types = [
+            {
+                "name": django.utils.text.capfirst(model._meta.verbose_name_plural),
+                "model": model,
+            }
+            for model in wagtail.snippets.models.get_snippet_models()
+            if wagtail.snippets.permissions.user_can_edit_snippet_type(
+                self.request.user, model
             )
-            if collection_id := self.request.GET.get("collection_id"):
-                queryset = queryset.filter(collection_id=collection_id)
-            snippet["count"] = queryset.count()
+        ]
+        with collection_snippets.instrumentation.phase("counts"):
+            counts = collection_snippets.counts.get_snippet_counts(
+                self.request.user,
+                [snippet["model"] for snippet in snippet_types],
+                self.request.GET.get("collection_id"),
+                collection_snippets.filters.is_including_descendants(self.request.GET),
+            )
+        for snippet in snippet_types:
+            snippet["count"] = counts[snippet["model"]]
         return snippet_types
 
     def get_list_url(self, model):
@@ -115,6 +202,81 @@ class ModelIndexView(wagtail.snippets.views.snippets.ModelIndexView):
         )
 
 
+class CollectionUsageView(
+    ReplicaReadMixin,
+    collection_snippets.instrumentation.InstrumentedViewMixin,
+    wagtail.admin.views.generic.base.WagtailAdminTemplateMixin,
+    django.views.generic.TemplateView,
+):
+    """Report of the snippets of every snippet type in each collection of a subtree."""
+
+    template_name = "collectionsnippets/collection_usage.html"
+    page_title = _("Snippet usage")
+    header_icon = "folder-open-1"
+
+    @django.utils.functional.cached_property
+    def collection(self):
+        """Collection at the root of the report."""
+        return django.shortcuts.get_object_or_404(
+            wagtail.models.Collection, pk=self.kwargs["collection_id"]
+        )
+
+    def get_page_subtitle(self):
+        """Show the collection name as subtitle."""
+        return self.collection.name
+
+    def get_context_data(self, **kwargs):
+        """Count the snippets the user can access per collection and snippet type."""
+        models = [
+            model
+            for model in collection_snippets.models.get_snippet_models()
+            if wagtail.snippets.permissions.user_can_edit_snippet_type(
+                self.request.user, model
+            )
+        ]
+        with collection_snippets.instrumentation.phase("counts"):
+            rows = collection_snippets.counts.get_collection_usage_by_collection(
+                self.collection, models, self.request.user
+            )
+        list_urls = [
+            django.urls.reverse(model.snippet_viewset.get_url_name("list"))
+            for model in models
+        ]
+        return super().get_context_data(
+            **kwargs,
+            models=[
+                {
+                    "name": django.utils.text.capfirst(model._meta.verbose_name_plural),
+                    "total": sum(counts[model] for _collection, counts in rows),
+                    "url": wagtail.admin.utils.set_query_params(
+                        list_url,
+                        {
+                            "collection_id": self.collection.pk,
+                            "include_descendants": "on",
+                        },
+                    ),
+                }
+                for model, list_url in zip(models, list_urls)
+            ],
+            rows=[
+                {
+                    "collection": collection,
+                    "depth": collection.depth - self.collection.depth,
+                    "counts": [
+                        {
+                            "count": counts[model],
+                            "url": wagtail.admin.utils.set_query_params(
+                                list_url, {"collection_id": collection.pk}
+                            ),
+                        }
+                        for model, list_url in zip(models, list_urls)
+                    ],
+                }
+                for collection, counts in rows
+            ],
+        )
+
+
 class CreateView(SnippetsFormViewMixin, wagtail.snippets.views.snippets.CreateView):
     """Custom snippets model create view that pre-fills the current collection."""
 
@@ -149,10 +311,101 @@ class InspectView(
     """Custom snippets model inspect view."""
 
 
+class PreviewCacheMixin:
+    """Mixin for preview views caching rendered previews by form state."""
+
+    @django.utils.decorators.method_decorator(
+        wagtail.utils.decorators.xframe_options_sameorigin_override
+    )
+    def get(self, request, *args, **kwargs):
+        """Serve the preview of unchanged form states from the cache."""
+        post_data, _timestamp = request.session.get(self.session_key, (None, None))
+        if not isinstance(post_data, str):
+            return super().get(request, *args, **kwargs)
+        try:
+            preview_mode = request.GET.get("mode", self.object.default_preview_mode)
+        except IndexError:
+            raise django.core.exceptions.PermissionDenied
+        key = collection_snippets.previews.get_form_state_key(
+            self.model,
+            self.object.pk,
+            post_data,
+            preview_mode,
+            request.GET.get("in_preview_panel") == "true",
+            request.user,
+        )
+        return collection_snippets.previews.serve_cached_preview(
+            key, lambda: self.render_preview(request, *args, **kwargs)
+        )
+
+    def render_preview(self, request, *args, **kwargs):
+        """Render the preview of the form state."""
+        return super().get(request, *args, **kwargs)
+
+
+class PreviewOnCreateView(
+    PreviewCacheMixin, wagtail.snippets.views.snippets.PreviewOnCreateView
+):
+    """Custom snippets model preview view caching previews by form state."""
+
+
+class PreviewOnEditView(
+    PreviewCacheMixin, wagtail.snippets.views.snippets.PreviewOnEditView
+):
+    """Custom snippets model preview view caching previews by form state.
+
+    The latest revision is only loaded when a preview is rendered or the form
+    state is validated, not when a cached preview is served.
+    """
+
+    def get_object(self):
+        """Get the snippet without loading its latest revision."""
+        return django.shortcuts.get_object_or_404(
+            self.model,
+            pk=django.contrib.admin.utils.unquote(str(self.kwargs["pk"])),
+        )
+
+    def load_latest_revision(self):
+        """Replace the snippet with its latest revision."""
+        if isinstance(self.object, wagtail.models.RevisionMixin):
+            self.object = self.object.get_latest_revision_as_object()
+
+    def render_preview(self, request, *args, **kwargs):
+        """Render the preview of the form state on the latest revision."""
+        self.load_latest_revision()
+        return super().render_preview(request, *args, **kwargs)
+
+    def post(self, request, *args, **kwargs):
+        """Validate the form state on the latest revision."""
+        self.load_latest_revision()
+        return super().post(request, *args, **kwargs)
+
+
 class PreviewRevisionView(
     CollectionPermissionMixin, wagtail.snippets.views.snippets.PreviewRevisionView
 ):
-    """Custom snippets model preview revision view."""
+    """Custom snippets model preview revision view caching rendered revisions."""
+
+    def get_revision_object(self):
+        """Check the revision exists, but only load it when it is rendered."""
+        revision = django.shortcuts.get_object_or_404(
+            self.object.revisions, id=self.revision_id
+        )
+        return django.utils.functional.SimpleLazyObject(revision.as_object)
+
+    def get(self, request, *args, **kwargs):
+        """Serve previews of revisions, which never change, from the cache."""
+        try:
+            preview_mode = request.GET.get("mode", self.object.default_preview_mode)
+        except IndexError:
+            raise django.core.exceptions.PermissionDenied
+        key = collection_snippets.previews.get_revision_key(
+            self.revision_id, preview_mode, request.user
+        )
+        return collection_snippets.previews.serve_cached_preview(
+            key,
+            lambda: self.revision_object.make_preview_request(request, preview_mode),
+        )
 
 
 class RevisionsCompareView(
@@ -201,12 +454,16 @@ class UnlockView(CollectionPermissionMixin, wagtail.snippets.views.snippets.Unlo
         return has_collection_permission and has_permission
 
 
-class BaseChooseView(wagtail.snippets.views.chooser.BaseChooseView):
+class BaseChooseView(
+    ReplicaReadMixin,
+    collection_snippets.instrumentation.InstrumentedViewMixin,
+    wagtail.snippets.views.chooser.BaseChooseView,
+):
     """Custom base chooser view for snippets with collection features."""
 
     permission_policy = None
 
-    @property
+    @django.utils.functional.cached_property
     def collections(self):
         """Collections matching the current user’s permissions."""
         return self.permission_policy.collections_user_has_permission_for(
@@ -215,8 +472,62 @@ class BaseChooseView(wagtail.snippets.views.chooser.BaseChooseView):
 
     def get_object_list(self):
         """Get snippets filtered by collection permissions."""
-        return self.permission_policy.instances_user_has_any_permission_for(
-            self.request.user, ["choose"]
+        with collection_snippets.instrumentation.phase("queryset"):
+            if self.is_searching and wagtail.search.index.class_is_indexed(
+                self.model_class
+            ):
+                return self.permission_policy.indexed_instances_user_has_any_permission_for(
+                    self.request.user, ["choose"]
+                )
+            return self.permission_policy.instances_user_has_any_permission_for(
+                self.request.user, ["choose"]
+            )
+
+    @property
+    def is_searching(self):
+        """Whether the chooser's filter form has a search query."""
+        filter_form = getattr(self, "filter_form", None)
+        return bool(
+            filter_form and filter_form.is_valid() and filter_form.cleaned_data.get("q")
+        )
+
+    def filter_object_list(self, objects):
+        """Record filtering and searching the snippets."""
+        with collection_snippets.instrumentation.phase("queryset"):
+            return super().filter_object_list(objects)
+
+    def get_results_page(self, request):
+        """Paginate by page cursor if keyset pagination is enabled."""
+        with collection_snippets.instrumentation.phase("pagination"):
+            if not collection_snippets.pagination.is_enabled():
+                return super().get_results_page(request)
+            objects = self.get_object_list()
+            objects = self.apply_object_list_ordering(objects)
+            objects = self.filter_object_list(objects)
+            paginator = collection_snippets.pagination.KeysetPaginator(
+                objects, per_page=self.per_page
+            )
+            try:
+                return paginator.page(request.GET.get("p") or 1)
+            except django.core.paginator.InvalidPage:
+                raise django.http.Http404
+
+    def get_filter_form_class(self):
+        """Filter by collection including subcollections."""
+        filter_form_class = super().get_filter_form_class()
+        if self.filter_form_class:
+            return filter_form_class
+        return type(
+            filter_form_class.__name__,
+            tuple(
+                (
+                    collection_snippets.filters.CollectionFilterMixin
+                    if base is wagtail.admin.forms.choosers.CollectionFilterMixin
+                    else base
+                )
+                for base in filter_form_class.__bases__
+            ),
+            {},
         )
 
     def get_filter_form(self):
@@ -244,6 +555,11 @@ class ChooseView(
 ):
     """Choose view for snippets using custom mixin."""
 
+    def render_to_response(self):
+        """Record rendering the modal."""
+        with collection_snippets.instrumentation.phase("render"):
+            return super().render_to_response()
+
 
 class ChooseResultsView(
     wagtail.admin.views.generic.chooser.ChooseResultsViewMixin,
@@ -252,22 +568,184 @@ class ChooseResultsView(
 ):
     """Choose results view for snippets using custom mixin."""
 
+    def render_to_response(self):
+        """Record rendering the results."""
+        with collection_snippets.instrumentation.phase("render"):
+            return super().render_to_response()
+
+
+def is_async_chooser_enabled():
+    """Check whether snippet choosers are served by async views."""
+    return getattr(django.conf.settings, "COLLECTION_SNIPPETS_ASYNC_CHOOSER", False)
+
+
+def require_admin_access_async(view_func):
+    """Check admin access for async views, like Wagtail's ``require_admin_access``.
+
+    Wagtail's decorators of admin views only support synchronous views, so the
+    access check runs in a thread and the view is awaited with the user's
+    language and time zone. Wagtail's 404 page is rendered for missing pages.
+    """
+
+    @functools.wraps(view_func)
+    async def decorated_view(request, *args, **kwargs):
+        preferences = {}
+
+        def get_preferences(request):
+            preferences["language"] = django.utils.translation.get_language()
+            preferences["time_zone"] = django.utils.timezone.get_current_timezone()
+
+        response = await asgiref.sync.sync_to_async(
+            wagtail.admin.auth.require_admin_access(get_preferences)
+        )(request)
+        if response is not None:
+            return response
+        with django.utils.translation.override(
+            preferences["language"]
+        ), django.utils.timezone.override(preferences["time_zone"]):
+            try:
+                return await view_func(request, *args, **kwargs)
+            except django.http.Http404:
+                return await asgiref.sync.sync_to_async(
+                    django.views.defaults.page_not_found
+                )(request, "", template_name="wagtailadmin/404.html")
+
+    return decorated_view
+
+
+class AsyncChooseViewMixin:
+    """Mixin for chooser views handling requests asynchronously.
+
+    Collection permissions and the filter form are set up in the thread of the
+    request's synchronous code, and the results page is counted and loaded with
+    the async ORM, so no worker thread is held while waiting on other requests.
+    When the client disconnects, e.g. because the chooser aborted a search that
+    was superseded by further typing, the view is cancelled and the remaining
+    queries aren't run.
+    """
+
+    async def get(self, request):
+        """Load the results page asynchronously and render the response."""
+        try:
+            self.collections = await self.aget_collections()
+            self.filter_form = await asgiref.sync.sync_to_async(self.get_filter_form)()
+            await asgiref.sync.sync_to_async(self.filter_form.is_valid)()
+            self.results = await self.aget_results_page(request)
+            columns = self.columns
+            if self.is_multiple_choice:
+                columns.insert(0, self.checkbox_column)
+            self.table = wagtail.admin.ui.tables.Table(columns, self.results)
+            return await asgiref.sync.sync_to_async(self.get_rendered_response)()
+        except asyncio.CancelledError:
+            logger.debug("Cancelled chooser request %s", request.get_full_path())
+            raise
+
+    async def aget_collections(self):
+        """Load the collections matching the current user’s permissions."""
+        collections = await asgiref.sync.sync_to_async(
+            self.permission_policy.collections_user_has_permission_for
+        )(self.request.user, "choose")
+        return [collection async for collection in collections]
+
+    def get_filtered_object_list(self):
+        """Get the ordered and filtered snippets."""
+        objects = self.get_object_list()
+        objects = self.apply_object_list_ordering(objects)
+        return self.filter_object_list(objects)
+
+    async def aget_results_page(self, request):
+        """Count and load the results page with the async ORM.
+
+        Search results and keyset pages are loaded synchronously in a thread.
+        """
+        if self.is_searching or collection_snippets.pagination.is_enabled():
+            return await asgiref.sync.sync_to_async(self.get_results_page)(request)
+        with collection_snippets.instrumentation.phase("pagination"):
+            objects = await asgiref.sync.sync_to_async(self.get_filtered_object_list)()
+            paginator = django.core.paginator.Paginator(objects, per_page=self.per_page)
+            paginator.count = await objects.acount()
+            try:
+                page = paginator.page(request.GET.get("p", 1))
+            except django.core.paginator.InvalidPage:
+                raise django.http.Http404
+            page.object_list = [obj async for obj in page.object_list]
+            return page
+
+    def get_rendered_response(self):
+        """Render the response, so templates are rendered in a thread as well."""
+        response = self.render_to_response()
+        if hasattr(response, "render"):
+            response.render()
+        return response
+
+
+class AsyncChooseView(AsyncChooseViewMixin, ChooseView):
+    """Choose view for snippets handling requests asynchronously."""
+
+
+class AsyncChooseResultsView(AsyncChooseViewMixin, ChooseResultsView):
+    """Choose results view for snippets handling requests asynchronously."""
+
 
 class ChooserViewSet(wagtail.snippets.views.chooser.SnippetChooserViewSet):
     """Chooser view set for snippets using custom views."""
 
     choose_view_class = ChooseView
     choose_results_view_class = ChooseResultsView
+    async_choose_view_class = AsyncChooseView
+    async_choose_results_view_class = AsyncChooseResultsView
+
+    @property
+    def async_choose_view(self):
+        """Async variant of the choose view."""
+        return self.construct_view(
+            self.inject_view_methods(self.async_choose_view_class, ["get_object_list"]),
+            icon=self.icon,
+            page_title=self.page_title,
+            search_tab_label=self.search_tab_label,
+            creation_tab_label=self.creation_tab_label,
+        )
 
     @property
+    def async_choose_results_view(self):
+        """Async variant of the choose results view."""
+        return self.construct_view(
+            self.inject_view_methods(
+                self.async_choose_results_view_class, ["get_object_list"]
+            )
+        )
+
+    def get_async_urlpatterns(self):
+        """URL patterns serving the chooser with async views, if enabled.
+
+        These are added by ``collection_snippets.urls`` at the paths of the
+        synchronous views, outside Wagtail's synchronous admin view decorators.
+        """
+        if not is_async_chooser_enabled():
+            return []
+        return [
+            django.urls.path(
+                f"{self.url_prefix}/",
+                require_admin_access_async(self.async_choose_view),
+            ),
+            django.urls.path(
+                f"{self.url_prefix}/results/",
+                require_admin_access_async(self.async_choose_results_view),
+            ),
+        ]
+
+    @django.utils.functional.cached_property
     def permission_policy(self):
         """Set permission policy."""
-        return wagtail.permission_policies.collections.CollectionPermissionPolicy(
-            self.model, auth_model="collectionsnippets.Snippet"
+        return collection_snippets.permissions.CollectionPermissionPolicy(
+            self.model, auth_model=collection_snippets.models.get_base_model(self.model)
         )
 
 
-class SnippetFilter(wagtail.admin.filters.WagtailFilterSet):
+class SnippetFilter(
+    collection_snippets.filters.CollectionFilterSetMixin,
+    wagtail.admin.filters.WagtailFilterSet,
+):
     """Custom snippets model filter set."""
 
     permission_policy = collection_snippets.models.permission_policy
@@ -279,15 +757,12 @@ class SnippetFilter(wagtail.admin.filters.WagtailFilterSet):
     def __init__(self, *args, **kwargs):
         """Add collection filter if there are multiple collections."""
         super().__init__(*args, **kwargs)
+        if viewset := getattr(self.queryset.model, "snippet_viewset", None):
+            self.permission_policy = viewset.permission_policy
         collections = self.permission_policy.collections_user_has_any_permission_for(
             self.request.user, {"change", "delete"}
         )
-        if collections.count() > 1:
-            self.filters["collection_id"] = wagtail.admin.filters.CollectionFilter(
-                field_name="collection_id",
-                label=_("Collection"),
-                queryset=collections,
-            )
+        self.add_collection_filter(list(collections))
 
 
 class ViewSet(wagtail.snippets.views.snippets.SnippetViewSet):
@@ -301,6 +776,8 @@ class ViewSet(wagtail.snippets.views.snippets.SnippetViewSet):
     history_view_class = HistoryView
     inspect_view_class = InspectView
     revisions_view_class = PreviewRevisionView
+    preview_on_add_view_class = PreviewOnCreateView
+    preview_on_edit_view_class = PreviewOnEditView
     revisions_compare_view_class = RevisionsCompareView
     revisions_unschedule_view_class = RevisionsUnscheduleView
     unpublish_view_class = UnpublishView
@@ -309,9 +786,9 @@ class ViewSet(wagtail.snippets.views.snippets.SnippetViewSet):
     chooser_viewset_class = ChooserViewSet
     filterset_class = SnippetFilter
 
-    @property
+    @django.utils.functional.cached_property
     def permission_policy(self):
         """Set permission policy."""
-        return wagtail.permission_policies.collections.CollectionPermissionPolicy(
-            self.model, auth_model="collectionsnippets.Snippet"
+        return collection_snippets.permissions.CollectionPermissionPolicy(
+            self.model, auth_model=collection_snippets.models.get_base_model(self.model)
         )
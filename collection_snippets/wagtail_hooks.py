@@ -2,12 +2,14 @@
 
 import django
 import wagtail.admin.forms.collections
-import wagtail.admin.utils
 import wagtail.hooks
+import wagtail.log_actions
 from django.utils.translation import gettext_lazy as _, ngettext
 
 import collection_snippets.bulk_action
+import collection_snippets.counts
 import collection_snippets.models
+import collection_snippets.views
 
 
 @wagtail.hooks.register("register_group_permission_panel")
@@ -18,6 +20,7 @@ def register_snippet_permissions_panel():
         [
             ("add_snippet", _("Add"), _("Add/edit snippets you own")),
             ("change_snippet", _("Edit"), _("Edit any snippet")),
+            ("publish_snippet", _("Publish"), _("Publish any snippet")),
             ("choose_snippet", _("Choose"), _("Select snippets in choosers")),
         ],
         "collectionsnippets/permissions_formset.html",
@@ -26,28 +29,70 @@ def register_snippet_permissions_panel():
 
 @wagtail.hooks.register("describe_collection_contents")
 def describe_collection(collection):
-    """Count snippets belonging to a collection.
+    """Count snippets of every snippet type belonging to a collection or its descendants.
 
     Currently this happens on the confirmation before deleting a collection.
     """
-    snippets_count = collection_snippets.models.Snippet.objects.filter(
-        collection=collection
-    ).count()
-    if snippets_count:
+    usage = collection_snippets.counts.get_collection_usage(collection)
+    if snippets_count := sum(usage.values()):
         return {
             "count": snippets_count,
-            "count_text": ngettext(
-                "%(count)s snippet", "%(count)s snippets", snippets_count
-            )
-            % {"count": snippets_count},
-            "url": wagtail.admin.utils.set_query_params(
-                django.urls.reverse("wagtailsnippets:index"),
-                {"collection_id": collection.id},
+            "count_text": ", ".join(
+                ngettext("%(count)s %(name)s", "%(count)s %(name_plural)s", count)
+                % {
+                    "count": count,
+                    "name": model._meta.verbose_name,
+                    "name_plural": model._meta.verbose_name_plural,
+                }
+                for model, count in usage.items()
+                if count
+            ),
+            "url": django.urls.reverse(
+                "collectionsnippets_collection_usage", args=[collection.id]
             ),
         }
     return None
 
 
+@wagtail.hooks.register("register_admin_urls")
+def register_admin_urls():
+    """Add the snippet usage report of collections."""
+    return [
+        django.urls.path(
+            "collection-snippets/usage/<int:collection_id>/",
+            collection_snippets.views.CollectionUsageView.as_view(),
+            name="collectionsnippets_collection_usage",
+        )
+    ]
+
+
+@wagtail.hooks.register("register_log_actions")
+def register_log_actions(actions):
+    """Register the log action for snippets added to a collection."""
+
+    @actions.register_action("collectionsnippets.add_to_collection")
+    class AddToCollectionActionFormatter(wagtail.log_actions.LogFormatter):
+        """Log formatter for snippets added to a collection."""
+
+        label = _("Add to collection")
+
+        def format_message(self, log_entry):
+            """Describe the source and destination collection."""
+            try:
+                return _("Moved from collection '%(source)s' to '%(destination)s'") % {
+                    "source": log_entry.data["source"]["title"],
+                    "destination": log_entry.data["destination"]["title"],
+                }
+            except KeyError:
+                return _("Added to collection")
+
+
 wagtail.hooks.register(
     "register_bulk_action", collection_snippets.bulk_action.AddToCollectionBulkAction
 )
+wagtail.hooks.register(
+    "register_bulk_action", collection_snippets.bulk_action.PublishBulkAction
+)
+wagtail.hooks.register(
+    "register_bulk_action", collection_snippets.bulk_action.UnpublishBulkAction
+)
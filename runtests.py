@@ -0,0 +1,21 @@
+#!/usr/bin/env python
+"""Run the test suite."""
+
+import os
+import sys
+
+import django
+import django.test.utils
+
+
+def runtests():
+    """Run the tests given on the command line, or all of them."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.settings")
+    django.setup()
+    runner = django.test.utils.get_runner(django.conf.settings)()
+    failures = runner.run_tests(sys.argv[1:] or ["tests"])
+    sys.exit(bool(failures))
+
+
+if __name__ == "__main__":
+    runtests()
@@ -0,0 +1,94 @@
+"""Settings for the test suite."""
+
+import os
+
+BASE_DIR = os.path.dirname(__file__)
+
+SECRET_KEY = "collection-snippets-tests"
+
+ALLOWED_HOSTS = ["*"]
+
+INSTALLED_APPS = [
+    "wagtail.contrib.settings",
+    "wagtail.embeds",
+    "wagtail.sites",
+    "wagtail.users",
+    "wagtail.snippets",
+    "wagtail.documents",
+    "wagtail.images",
+    "wagtail.search",
+    "wagtail.admin",
+    "wagtail",
+    "modelcluster",
+    "taggit",
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+    "django.contrib.sessions",
+    "django.contrib.messages",
+    "django.contrib.staticfiles",
+    "collection_snippets",
+    "tests.testapp",
+]
+
+MIDDLEWARE = [
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+    "collection_snippets.middleware.ReplicaPinMiddleware",
+]
+
+ROOT_URLCONF = "tests.urls"
+
+TEMPLATES = [
+    {
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "APP_DIRS": True,
+        "OPTIONS": {
+            "context_processors": [
+                "django.template.context_processors.request",
+                "django.contrib.auth.context_processors.auth",
+                "django.contrib.messages.context_processors.messages",
+            ],
+        },
+    },
+]
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.path.join(BASE_DIR, "test.sqlite3"),
+    },
+    # A second database standing in for a read replica, used by tests enabling
+    # COLLECTION_SNIPPETS_REPLICA_DATABASE. It isn't kept in sync with default,
+    # so tests can tell which database was read. Its tables are created without
+    # migrations, as Wagtail's data migrations always write to default.
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.path.join(BASE_DIR, "replica.sqlite3"),
+        "TEST": {"MIGRATE": False},
+    },
+}
+
+DATABASE_ROUTERS = ["collection_snippets.routers.ReplicaRouter"]
+
+DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+STATIC_URL = "/static/"
+
+USE_TZ = True
+
+WAGTAIL_SITE_NAME = "Collection Snippets"
+
+WAGTAILADMIN_BASE_URL = "http://localhost"
+
+WAGTAILSEARCH_BACKENDS = {
+    "default": {"BACKEND": "wagtail.search.backends.database"},
+}
@@ -0,0 +1,130 @@
+"""Tests of the delivery API."""
+
+import unittest.mock
+
+import django.test
+import wagtail.models
+
+import tests.testapp.models
+
+
+class DeliveryAPITests(django.test.TestCase):
+    """Live snippets are delivered with their allowed fields only."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create live cards referring to a user and a page, and a draft card."""
+        cls.owner = django.contrib.auth.get_user_model().objects.create_user(
+            username="owner", password="password"
+        )
+        cls.collection = wagtail.models.Collection.get_first_root_node()
+        cls.cards = [
+            tests.testapp.models.Card.objects.create(
+                title=title,
+                text=f"{title} text",
+                collection=cls.collection,
+                locale=wagtail.models.Locale.get_default(),
+                owner=cls.owner,
+                page=wagtail.models.Page.objects.get(depth=2),
+                live=live,
+            )
+            for title, live in [("First", True), ("Second", True), ("Draft", False)]
+        ]
+
+    def get(self, *args, headers=None, **params):
+        """Request an API URL of cards."""
+        return self.client.get(
+            django.urls.reverse(
+                (
+                    "collectionsnippets_api_detail"
+                    if args
+                    else "collectionsnippets_api_list"
+                ),
+                args=["testapp", "card", *args],
+            ),
+            params,
+            headers=headers,
+        )
+
+    def test_list(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["items"],
+            [
+                {
+                    "id": card.pk,
+                    "collection": self.collection.pk,
+                    "locale": "en",
+                    "title": card.title,
+                    "text": card.text,
+                }
+                for card in self.cards[:2]
+            ],
+        )
+
+    def test_list_pages_by_cursor(self):
+        first = self.get(limit=1).json()
+        self.assertEqual([item["id"] for item in first["items"]], [self.cards[0].pk])
+        second = self.get(limit=1, cursor=first["meta"]["next_cursor"]).json()
+        self.assertEqual([item["id"] for item in second["items"]], [self.cards[1].pk])
+        self.assertIsNone(second["meta"]["next_cursor"])
+
+    def test_detail(self):
+        response = self.get(self.cards[0].pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["title"], "First")
+        self.assertNotIn("owner", response.json())
+        self.assertNotIn("page", response.json())
+        self.assertNotIn("translation_key", response.json())
+        self.assertEqual(self.get(self.cards[2].pk).status_code, 404)
+        self.assertEqual(self.get("missing").status_code, 404)
+
+    def test_fields(self):
+        response = self.get(self.cards[0].pk, fields="title,locale")
+        self.assertEqual(
+            response.json(), {"id": self.cards[0].pk, "locale": "en", "title": "First"}
+        )
+        for field in ["owner", "translation_key", "live"]:
+            self.assertEqual(self.get(fields=field).status_code, 400)
+
+    def test_api_fields(self):
+        with unittest.mock.patch.object(
+            tests.testapp.models.Card, "api_fields", ["text", "owner"], create=True
+        ):
+            response = self.get(self.cards[0].pk)
+        self.assertEqual(
+            response.json(),
+            {
+                "id": self.cards[0].pk,
+                "collection": self.collection.pk,
+                "locale": "en",
+                "text": "First text",
+                "owner": self.owner.pk,
+            },
+        )
+
+    def test_not_modified(self):
+        for args in [(), (self.cards[0].pk,)]:
+            response = self.get(*args)
+            etag = response["ETag"]
+            response = self.get(*args, headers={"If-None-Match": etag})
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response["ETag"], etag)
+            response = self.get(*args, fields="title", headers={"If-None-Match": etag})
+            self.assertEqual(response.status_code, 200)
+
+    def test_bad_request(self):
+        for params in [{"cursor": "tampered"}, {"limit": "many"}, {"limit": "0"}]:
+            response = self.get(**params)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("message", response.json())
+
+    def test_not_a_snippet_model(self):
+        for app_label, model_name in [("wagtailcore", "page"), ("testapp", "missing")]:
+            response = self.client.get(
+                django.urls.reverse(
+                    "collectionsnippets_api_list", args=[app_label, model_name]
+                )
+            )
+            self.assertEqual(response.status_code, 404)
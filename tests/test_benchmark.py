@@ -0,0 +1,58 @@
+"""Tests of the benchmark command."""
+
+import io
+import json
+
+import django.core.management
+import django.test
+
+import tests.testapp.models
+
+SIZES = {
+    "snippets": 60,
+    "collections": 50,
+    "groups": 3,
+    "user_groups": 2,
+    "references": 2,
+    "repeat": 1,
+}
+
+
+class BenchmarkCommandTests(django.test.TestCase):
+    """The benchmark command runs all scenarios on small datasets."""
+
+    def benchmark(self, **options):
+        """Run the benchmark command and return its report."""
+        output = io.StringIO()
+        django.core.management.call_command(
+            "benchmark_collection_snippets", **SIZES, **options, stdout=output
+        )
+        return json.loads(output.getvalue())
+
+    def test_default_branching(self):
+        report = self.benchmark()
+        self.assertEqual(report["options"]["model"], "testapp.Banner")
+        self.assertIn("index.editor.last_page", report["results"])
+        self.assertFalse(
+            tests.testapp.models.Banner.objects.filter(
+                title__startswith="Benchmark"
+            ).exists()
+        )
+
+    def test_single_branch(self):
+        report = self.benchmark(collection_branching=1)
+        self.assertIn("index.editor.last_page", report["results"])
+
+    def test_single_table_model(self):
+        report = self.benchmark(model="testapp.Card")
+        self.assertIn("index.superuser.last_page", report["results"])
+
+    def test_keep_twice(self):
+        self.benchmark(keep=True)
+        self.benchmark(keep=True)
+        self.assertEqual(
+            tests.testapp.models.Banner.objects.filter(
+                title__startswith="Benchmark"
+            ).count(),
+            2 * SIZES["snippets"],
+        )
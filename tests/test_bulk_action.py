@@ -0,0 +1,325 @@
+"""Tests of the collection snippet bulk actions."""
+
+import urllib.parse
+
+import django.test
+import wagtail.hooks
+import wagtail.models
+import wagtail.search.backends
+
+import collection_snippets.bulk_action
+import collection_snippets.instrumentation
+import tests.test_frontend_cache
+import tests.testapp.models
+
+
+class BulkActionTests(django.test.TestCase):
+    """Bulk actions update snippets and the database search backend's index."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create draft banners in a collection."""
+        root = wagtail.models.Collection.get_first_root_node()
+        cls.news = root.add_child(name="News")
+        cls.events = root.add_child(name="Events")
+        cls.news.refresh_from_db()
+        cls.banners = [
+            tests.testapp.models.Banner.objects.create(
+                title=title,
+                collection=cls.news,
+                locale=wagtail.models.Locale.get_default(),
+                live=False,
+            )
+            for title in ["First", "Second"]
+        ]
+        cls.superuser = django.contrib.auth.get_user_model().objects.create_superuser(
+            username="admin", password="password"
+        )
+
+    def setUp(self):
+        """Log in as superuser."""
+        self.client.force_login(self.superuser)
+
+    def post_bulk_action(self, action, data=None, **params):
+        """Run a bulk action on all banners."""
+        params.setdefault("id", [banner.pk for banner in self.banners])
+        url = django.urls.reverse(
+            "wagtail_bulk_action", args=["testapp", "banner", action]
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                f"{url}?{urllib.parse.urlencode(params, doseq=True)}", data or {}
+            )
+
+    def search(self, query):
+        """Search banners with the database search backend."""
+        return [
+            banner.pk
+            for banner in wagtail.search.backends.get_search_backend().search(
+                query, tests.testapp.models.Banner
+            )
+        ]
+
+    def test_update_search_index(self):
+        tests.testapp.models.Banner.objects.filter(pk=self.banners[0].pk).update(
+            title="Renamed"
+        )
+        self.assertEqual(self.search("Renamed"), [])
+        collection_snippets.bulk_action.update_search_index(
+            tests.testapp.models.Banner, [self.banners[0].pk]
+        )
+        self.assertEqual(self.search("Renamed"), [self.banners[0].pk])
+
+    def test_publish(self):
+        response = self.post_bulk_action("publish")
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            tests.testapp.models.Banner.objects.filter(live=True).count(), 2
+        )
+        self.assertEqual(self.search("First"), [self.banners[0].pk])
+
+    def test_unpublish(self):
+        collection_snippets.bulk_action.publish_snippets(
+            tests.testapp.models.Banner.objects.all()
+        )
+        response = self.post_bulk_action("unpublish")
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(tests.testapp.models.Banner.objects.filter(live=True).exists())
+
+    def test_add_to_collection(self):
+        response = self.post_bulk_action(
+            "add_to_collection", {"collection": self.events.pk}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            tests.testapp.models.Banner.objects.filter(collection=self.events).count(),
+            2,
+        )
+        self.assertEqual(self.search("Second"), [self.banners[1].pk])
+
+    def test_select_all_with_search(self):
+        response = self.client.get(
+            django.urls.reverse(
+                "wagtail_bulk_action", args=["testapp", "banner", "publish"]
+            ),
+            {"id": "all", "q": "First"},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["select_all_count"], 1)
+
+        response = self.post_bulk_action("publish", id="all", q="First")
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            list(tests.testapp.models.Banner.objects.filter(live=True)),
+            [self.banners[0]],
+        )
+
+    def test_select_all_with_filter(self):
+        self.banners[1].collection = self.events
+        self.banners[1].save()
+        response = self.post_bulk_action(
+            "publish", id="all", collection_id=self.news.pk
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            list(tests.testapp.models.Banner.objects.filter(live=True)),
+            [self.banners[0]],
+        )
+
+    @django.test.override_settings(
+        COLLECTION_SNIPPETS_INSTRUMENTATION=True,
+        COLLECTION_SNIPPETS_INSTRUMENTATION_SINKS=[
+            "collection_snippets.instrumentation.signal_sink"
+        ],
+    )
+    def test_select_all_is_recorded_once(self):
+        records = []
+
+        def receiver(record, **kwargs):
+            records.append(record)
+
+        collection_snippets.instrumentation.instrumented.connect(receiver)
+        self.addCleanup(
+            collection_snippets.instrumentation.instrumented.disconnect, receiver
+        )
+        response = self.post_bulk_action("publish", id="all", q="First")
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            [record["name"] for record in records if "path" in record],
+            ["PublishBulkAction"],
+        )
+        self.assertIsNone(collection_snippets.instrumentation._current_recorder.get())
+
+
+class PublishPermissionTests(django.test.TestCase):
+    """Editors publish snippets in collections where their groups may publish."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Let publishers publish banners in news and reviewers only edit them."""
+        root = wagtail.models.Collection.get_first_root_node()
+        cls.news = root.add_child(name="News")
+        cls.banner = tests.testapp.models.Banner.objects.create(
+            title="Banner",
+            collection=cls.news,
+            locale=wagtail.models.Locale.get_default(),
+            live=False,
+        )
+        permissions = {
+            codename: django.contrib.auth.models.Permission.objects.get(
+                content_type__app_label="collectionsnippets", codename=codename
+            )
+            for codename in ["change_snippet", "publish_snippet"]
+        }
+        admin = django.contrib.auth.models.Permission.objects.get(
+            content_type__app_label="wagtailadmin", codename="access_admin"
+        )
+        cls.users = {}
+        for name, codenames in [
+            ("publisher", ["change_snippet", "publish_snippet"]),
+            ("reviewer", ["change_snippet"]),
+        ]:
+            group = django.contrib.auth.models.Group.objects.create(name=name)
+            group.permissions.add(admin)
+            for codename in codenames:
+                wagtail.models.GroupCollectionPermission.objects.create(
+                    group=group, collection=cls.news, permission=permissions[codename]
+                )
+            cls.users[name] = django.contrib.auth.get_user_model().objects.create_user(
+                username=name, password="password"
+            )
+            cls.users[name].groups.add(group)
+
+    def publish(self, username):
+        """Publish the banner with the bulk action as a user."""
+        self.client.force_login(self.users[username])
+        url = django.urls.reverse(
+            "wagtail_bulk_action", args=["testapp", "banner", "publish"]
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"{url}?id={self.banner.pk}")
+        self.banner.refresh_from_db()
+        return self.banner.live
+
+    def test_publish_with_permission(self):
+        self.assertTrue(self.publish("publisher"))
+
+    def test_publish_without_permission(self):
+        self.assertFalse(self.publish("reviewer"))
+
+    def test_publish_permission_in_panels(self):
+        codenames = {
+            permission.codename
+            for panel in wagtail.hooks.get_hooks("register_group_permission_panel")
+            for permission in panel().permission_queryset
+        }
+        self.assertIn("publish_snippet", codenames)
+        self.assertIn("publish_card", codenames)
+
+    def test_actions_registered_for_collection_snippet_types(self):
+        models = {tests.testapp.models.Banner, tests.testapp.models.Card}
+        for action in [
+            collection_snippets.bulk_action.AddToCollectionBulkAction,
+            collection_snippets.bulk_action.PublishBulkAction,
+            collection_snippets.bulk_action.UnpublishBulkAction,
+        ]:
+            self.assertEqual(set(action.models), models)
+
+
+@django.test.override_settings(
+    WAGTAILFRONTENDCACHE={
+        "recording": {"BACKEND": "tests.test_frontend_cache.RecordingBackend"}
+    }
+)
+class MoveToCollectionTests(django.test.TestCase):
+    """Moved snippets are logged, re-referenced and purged chunk by chunk."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create banners in news, one of them displayed on a page."""
+        root = wagtail.models.Collection.get_first_root_node()
+        cls.news = root.add_child(name="News")
+        cls.events = root.add_child(name="Events")
+        cls.news.refresh_from_db()
+        cls.banners = [
+            tests.testapp.models.Banner.objects.create(
+                title=f"Banner {index}",
+                collection=cls.news,
+                locale=wagtail.models.Locale.get_default(),
+            )
+            for index in range(5)
+        ]
+        cls.banners[4].collection = cls.events
+        cls.banners[4].save()
+        home = wagtail.models.Site.objects.get(is_default_site=True).root_page
+        home.add_child(
+            instance=tests.testapp.models.SnippetPage(
+                title="Banner", slug="banner", banner=cls.banners[0]
+            )
+        )
+        cls.user = django.contrib.auth.get_user_model().objects.create_superuser(
+            username="admin", password="password"
+        )
+
+    def setUp(self):
+        """Start without purged URLs."""
+        tests.test_frontend_cache.PURGED_URLS.clear()
+
+    def move(self):
+        """Move all banners to events in chunks of two."""
+        progress = []
+        with self.captureOnCommitCallbacks(execute=True):
+            num_moved = collection_snippets.bulk_action.move_to_collection(
+                tests.testapp.models.Banner.objects.all(),
+                self.events,
+                chunk_size=2,
+                progress=progress.append,
+                user=self.user,
+            )
+        return num_moved, progress
+
+    def test_progress_per_chunk(self):
+        self.assertEqual(self.move(), (4, [2, 4, 4]))
+        self.assertEqual(
+            tests.testapp.models.Banner.objects.filter(collection=self.events).count(),
+            5,
+        )
+
+    def test_moves_are_logged(self):
+        self.move()
+        entries = wagtail.models.ModelLogEntry.objects.filter(
+            action="collectionsnippets.add_to_collection"
+        )
+        self.assertCountEqual(
+            [entry.object_id for entry in entries],
+            [str(banner.pk) for banner in self.banners[:4]],
+        )
+        self.assertEqual({entry.user for entry in entries}, {self.user})
+        self.assertEqual(len({entry.uuid for entry in entries}), 1)
+        self.assertEqual(
+            entries[0].data,
+            {
+                "source": {"id": self.news.pk, "title": "News"},
+                "destination": {"id": self.events.pk, "title": "Events"},
+            },
+        )
+
+    def test_references_are_updated(self):
+        self.move()
+        self.assertEqual(
+            set(
+                wagtail.models.ReferenceIndex.objects.filter(
+                    base_content_type=wagtail.models.ReferenceIndex._get_base_content_type(
+                        tests.testapp.models.Banner
+                    ),
+                    model_path="collection",
+                ).values_list("to_object_id", flat=True)
+            ),
+            {str(self.events.pk)},
+        )
+
+    def test_pages_are_purged(self):
+        self.move()
+        self.assertEqual(
+            tests.test_frontend_cache.PURGED_URLS, ["http://localhost/banner/"]
+        )
@@ -0,0 +1,131 @@
+"""Tests of purging cache tags of snippets."""
+
+import http.server
+import threading
+import time
+
+import django.test
+import wagtail.models
+
+import collection_snippets.bulk_action
+import collection_snippets.cache_tags
+import tests.testapp.models
+
+
+@django.test.override_settings(
+    COLLECTION_SNIPPETS_PURGE_MODE="tags",
+    COLLECTION_SNIPPETS_CACHE_TAG_BACKENDS={
+        "memory": {"BACKEND": "collection_snippets.cache_tags.InMemoryBackend"},
+        "other": {"BACKEND": "collection_snippets.cache_tags.InMemoryBackend"},
+    },
+)
+class CacheTagPurgeTests(django.test.TestCase):
+    """Publishing purges the snippet's tag, moving also its collections' tags."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create a banner in a collection."""
+        root = wagtail.models.Collection.get_first_root_node()
+        cls.news = root.add_child(name="News")
+        cls.events = root.add_child(name="Events")
+        cls.news.refresh_from_db()
+        cls.banner = tests.testapp.models.Banner.objects.create(
+            title="Banner",
+            collection=cls.news,
+            locale=wagtail.models.Locale.get_default(),
+            live=False,
+        )
+        cls.tag = collection_snippets.cache_tags.get_snippet_tag(
+            tests.testapp.models.Banner, cls.banner.pk
+        )
+
+    def setUp(self):
+        """Start with backends without purged tags."""
+        collection_snippets.cache_tags.get_backends.cache_clear()
+
+    def get_purged_tags(self, name="memory"):
+        """Get the tags purged by a backend."""
+        return collection_snippets.cache_tags.get_backends()[name].purged_tags
+
+    def test_backends_record_their_own_tags(self):
+        backends = collection_snippets.cache_tags.get_backends()
+        self.assertIs(collection_snippets.cache_tags.get_backends(), backends)
+        self.assertIsNot(backends["memory"].purged_tags, backends["other"].purged_tags)
+        collection_snippets.cache_tags.purge_tags(["a"])
+        self.assertEqual(self.get_purged_tags("memory"), ["a"])
+        self.assertEqual(self.get_purged_tags("other"), ["a"])
+
+    def test_publish_purges_snippet_tag(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.banner.save_revision().publish()
+        self.assertEqual(self.get_purged_tags(), [self.tag])
+
+    def test_unpublish_purges_snippet_tag(self):
+        self.banner.save_revision().publish()
+        self.banner.refresh_from_db()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.banner.unpublish()
+        self.assertEqual(self.get_purged_tags(), [self.tag])
+
+    def test_move_purges_collection_tags(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            collection_snippets.bulk_action.move_to_collection(
+                tests.testapp.models.Banner.objects.all(), self.events
+            )
+        self.assertCountEqual(
+            self.get_purged_tags(),
+            [self.tag, f"collection-{self.news.pk}", f"collection-{self.events.pk}"],
+        )
+
+
+class PurgeHandler(http.server.BaseHTTPRequestHandler):
+    """Handler recording the tags of PURGE requests, slowly if asked to."""
+
+    def do_PURGE(self):
+        """Record the purged tags and respond after the server's delay."""
+        self.server.purged_tags.append(self.headers["xkey-purge"])
+        time.sleep(self.server.delay)
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        """Don't log requests."""
+
+
+class HTTPBackendTests(django.test.SimpleTestCase):
+    """PURGE requests are sent with a timeout and failures are logged."""
+
+    def setUp(self):
+        """Run a cache server in a thread."""
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), PurgeHandler)
+        self.server.purged_tags = []
+        self.server.delay = 0
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def get_backend(self, **params):
+        """Create a backend purging tags from the server."""
+        host, port = self.server.server_address
+        return collection_snippets.cache_tags.HTTPBackend(
+            {"LOCATION": f"http://{host}:{port}/", **params}
+        )
+
+    def test_purge(self):
+        self.get_backend().purge_tags(["a", "b"])
+        self.assertEqual(self.server.purged_tags, ["a b"])
+
+    def test_slow_cache_times_out(self):
+        self.server.delay = 1
+        start = time.perf_counter()
+        with self.assertLogs("collection_snippets.cache_tags", "ERROR"):
+            self.get_backend(TIMEOUT=0.1).purge_tags(["a"])
+        self.assertLess(time.perf_counter() - start, 1)
+
+    def test_unreachable_cache_is_logged(self):
+        backend = self.get_backend()
+        self.server.server_close()
+        with self.assertLogs("collection_snippets.cache_tags", "ERROR"):
+            backend.purge_tags(["a"])
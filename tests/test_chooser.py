@@ -0,0 +1,86 @@
+"""Tests of the async snippet chooser views."""
+
+import importlib
+
+import asgiref.sync
+import django
+import django.test
+import wagtail.models
+
+import collection_snippets.urls
+import tests.testapp.models
+import tests.urls
+
+
+class AsyncChooserTests(django.test.TestCase):
+    """Snippet choosers are served by async views when enabled."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create banners and users with and without admin access."""
+        root = wagtail.models.Collection.get_first_root_node()
+        cls.news = root.add_child(name="News")
+        for title in ["First", "Second"]:
+            tests.testapp.models.Banner.objects.create(
+                title=title,
+                collection=cls.news,
+                locale=wagtail.models.Locale.get_default(),
+            )
+        user_model = django.contrib.auth.get_user_model()
+        cls.superuser = user_model.objects.create_superuser(
+            username="admin", password="password"
+        )
+        cls.user = user_model.objects.create_user(
+            username="visitor", password="password"
+        )
+
+    def setUp(self):
+        """Add the async chooser URLs, which are only added when enabled.
+
+        The URL modules are reloaded, as the patterns are set up on import.
+        """
+        self.addCleanup(django.urls.clear_url_caches)
+        for module in [tests.urls, collection_snippets.urls]:
+            self.addCleanup(importlib.reload, module)
+        with self.settings(COLLECTION_SNIPPETS_ASYNC_CHOOSER=True):
+            importlib.reload(collection_snippets.urls)
+        importlib.reload(tests.urls)
+        django.urls.clear_url_caches()
+
+    async def get(self, name, user=None, **params):
+        """Request a banner chooser view, checking it's served asynchronously."""
+        url = django.urls.reverse(f"wagtailsnippetchoosers_testapp_banner:{name}")
+        self.assertTrue(asgiref.sync.iscoroutinefunction(django.urls.resolve(url).func))
+        if user is not None:
+            await self.async_client.aforce_login(user)
+        return await self.async_client.get(url, params)
+
+    async def test_choose(self):
+        response = await self.get("choose", self.superuser)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "First")
+        self.assertContains(response, "Second")
+
+    async def test_choose_results(self):
+        response = await self.get("choose_results", self.superuser, q="First")
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "First")
+        self.assertNotContains(response, "Second")
+
+    async def test_anonymous(self):
+        response = await self.get("choose")
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(
+            response.url.startswith(django.urls.reverse("wagtailadmin_login"))
+        )
+
+    async def test_without_admin_access(self):
+        response = await self.get("choose", self.user)
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(
+            response.url.startswith(django.urls.reverse("wagtailadmin_login"))
+        )
+
+    async def test_page_out_of_range(self):
+        response = await self.get("choose_results", self.superuser, p=99)
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,182 @@
+"""Tests of the snippet counts across snippet types."""
+
+import django
+import django.test
+import wagtail.models
+
+import collection_snippets.bulk_action
+import collection_snippets.counts
+import tests.testapp.models
+
+
+class SnippetCountTestCase(django.test.TestCase):
+    """Banners and cards in a collection subtree and a sibling collection."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create banners and cards in a collection, its child and a sibling."""
+        root = wagtail.models.Collection.get_first_root_node()
+        cls.news = root.add_child(name="News")
+        cls.events = root.add_child(name="Events")
+        # Collections are sorted by name, so adding events moved news.
+        cls.news.refresh_from_db()
+        cls.sports = cls.news.add_child(name="Sports")
+        cls.news.refresh_from_db()
+        cls.models = [tests.testapp.models.Banner, tests.testapp.models.Card]
+        for model, collection, count in [
+            (tests.testapp.models.Banner, cls.news, 2),
+            (tests.testapp.models.Banner, cls.sports, 1),
+            (tests.testapp.models.Card, cls.sports, 3),
+            (tests.testapp.models.Card, cls.events, 1),
+        ]:
+            for index in range(count):
+                cls.create(model, collection)
+        cls.superuser = django.contrib.auth.get_user_model().objects.create_superuser(
+            username="admin", password="password"
+        )
+
+    @classmethod
+    def create(cls, model, collection):
+        """Create a snippet in a collection."""
+        return model.objects.create(
+            title=f"{model.__name__} in {collection.name}",
+            collection=collection,
+            locale=wagtail.models.Locale.get_default(),
+        )
+
+    def setUp(self):
+        """Start with an empty cache."""
+        self.cache = django.core.cache.caches["default"]
+        self.cache.clear()
+        self.addCleanup(self.cache.clear)
+
+
+class CountTests(SnippetCountTestCase):
+    """Snippets of all types are counted per collection in a single query."""
+
+    def test_collection_usage(self):
+        with self.assertNumQueries(1):
+            counts = collection_snippets.counts.get_collection_usage(
+                self.news, self.models
+            )
+        self.assertEqual(
+            counts,
+            {tests.testapp.models.Banner: 3, tests.testapp.models.Card: 3},
+        )
+
+    def test_collection_usage_without_descendants(self):
+        with self.assertNumQueries(1):
+            counts = collection_snippets.counts.get_collection_usage(
+                self.news, self.models, include_descendants=False
+            )
+        self.assertEqual(
+            counts,
+            {tests.testapp.models.Banner: 2, tests.testapp.models.Card: 0},
+        )
+
+    def test_collection_usage_of_all_collections(self):
+        with self.assertNumQueries(1):
+            counts = collection_snippets.counts.get_collection_usage(
+                None, self.models, self.superuser
+            )
+        self.assertEqual(
+            counts,
+            {tests.testapp.models.Banner: 3, tests.testapp.models.Card: 4},
+        )
+
+    def test_collection_usage_by_collection(self):
+        self.assertEqual(
+            collection_snippets.counts.get_collection_usage_by_collection(
+                self.news, self.models
+            ),
+            [
+                (
+                    self.news,
+                    {tests.testapp.models.Banner: 2, tests.testapp.models.Card: 0},
+                ),
+                (
+                    self.sports,
+                    {tests.testapp.models.Banner: 1, tests.testapp.models.Card: 3},
+                ),
+            ],
+        )
+
+    def test_snippet_counts_without_cache(self):
+        for index in range(2):
+            with self.assertNumQueries(1):
+                counts = collection_snippets.counts.get_snippet_counts(
+                    self.superuser, self.models
+                )
+        self.assertEqual(
+            counts,
+            {tests.testapp.models.Banner: 3, tests.testapp.models.Card: 4},
+        )
+
+
+@django.test.override_settings(COLLECTION_SNIPPETS_COUNT_CACHE="default")
+class CountCacheTests(SnippetCountTestCase):
+    """Cached snippet counts are invalidated when snippets are added or moved."""
+
+    def get_counts(self, collection=None):
+        """Count the snippets in a collection subtree like a new request would."""
+        return collection_snippets.counts.get_snippet_counts(
+            self.superuser,
+            self.models,
+            collection and collection.pk,
+            include_descendants=True,
+        )
+
+    def test_snippet_counts_cached(self):
+        with self.assertNumQueries(1):
+            counts = self.get_counts()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_counts(), counts)
+        self.assertEqual(
+            counts,
+            {tests.testapp.models.Banner: 3, tests.testapp.models.Card: 4},
+        )
+
+    def test_created_snippet_invalidates_after_commit(self):
+        self.get_counts()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create(tests.testapp.models.Card, self.news)
+            self.assertEqual(self.get_counts()[tests.testapp.models.Card], 4)
+        self.assertEqual(self.get_counts()[tests.testapp.models.Card], 5)
+
+    def test_edited_snippet_invalidates_after_commit(self):
+        self.get_counts(self.events)
+        card = tests.testapp.models.Card.objects.get(collection=self.events)
+        card.collection = self.news
+        with self.captureOnCommitCallbacks(execute=True):
+            card.save()
+        self.assertEqual(self.get_counts(self.events)[tests.testapp.models.Card], 0)
+
+    def test_revision_does_not_invalidate(self):
+        self.get_counts()
+        card = tests.testapp.models.Card.objects.get(collection=self.events)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            card.save_revision()
+        self.assertNotIn(collection_snippets.counts.invalidate_count_cache, callbacks)
+
+    def test_moved_snippets_invalidate_after_commit(self):
+        self.assertEqual(
+            self.get_counts(self.news),
+            {tests.testapp.models.Banner: 3, tests.testapp.models.Card: 3},
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            collection_snippets.bulk_action.move_to_collection(
+                tests.testapp.models.Card.objects.filter(collection=self.sports),
+                self.events,
+                user=self.superuser,
+            )
+        self.assertEqual(
+            self.get_counts(self.news),
+            {tests.testapp.models.Banner: 3, tests.testapp.models.Card: 0},
+        )
+        self.assertEqual(self.get_counts(self.events)[tests.testapp.models.Card], 4)
+
+    def test_deleted_snippet_invalidates_after_commit(self):
+        self.get_counts()
+        with self.captureOnCommitCallbacks(execute=True):
+            tests.testapp.models.Card.objects.filter(collection=self.events).delete()
+        self.assertEqual(self.get_counts()[tests.testapp.models.Card], 3)
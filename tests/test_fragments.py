@@ -0,0 +1,75 @@
+"""Tests of the cache of rendered snippets."""
+
+import django.template
+import django.test
+import wagtail.models
+
+import collection_snippets.fragments
+import tests.testapp.models
+
+
+@django.test.override_settings(COLLECTION_SNIPPETS_FRAGMENT_CACHE="default")
+class FragmentCacheTests(django.test.TestCase):
+    """Rendered snippets are cached per template and extra context."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create a live banner."""
+        cls.banner = tests.testapp.models.Banner.objects.create(
+            title="Banner",
+            collection=wagtail.models.Collection.get_first_root_node(),
+            locale=wagtail.models.Locale.get_default(),
+        )
+
+    def setUp(self):
+        """Start with an empty cache."""
+        self.cache = django.core.cache.caches["default"]
+        self.cache.clear()
+        self.addCleanup(self.cache.clear)
+
+    def render(self, **context):
+        """Render the banner with the template tag."""
+        return django.template.Template(
+            "{% load collectionsnippets_tags %}"
+            '{% render_snippet banner "testapp/banner.html" heading=heading %}'
+        ).render(django.template.Context({"banner": self.banner, **context}))
+
+    def test_cached_per_context(self):
+        self.assertEqual(self.render(heading="News"), "<p>News: Banner</p>\n")
+        self.assertEqual(self.render(heading="Events"), "<p>Events: Banner</p>\n")
+        tests.testapp.models.Banner.objects.filter(pk=self.banner.pk).update(
+            title="Renamed"
+        )
+        self.banner.title = "Renamed"
+        self.assertEqual(self.render(heading="News"), "<p>News: Banner</p>\n")
+        self.assertEqual(self.render(heading="Other"), "<p>Other: Renamed</p>\n")
+
+    def test_context_hash_is_stable(self):
+        self.assertEqual(
+            collection_snippets.fragments.get_context_hash({"a": 1, "b": "x"}),
+            collection_snippets.fragments.get_context_hash({"b": "x", "a": 1}),
+        )
+        self.assertEqual(
+            collection_snippets.fragments.get_context_hash(None),
+            collection_snippets.fragments.get_context_hash({}),
+        )
+        self.assertNotEqual(
+            collection_snippets.fragments.get_context_hash({"a": 1}),
+            collection_snippets.fragments.get_context_hash({"a": "1"}),
+        )
+
+    def test_rejects_context_not_serializable(self):
+        with self.assertRaisesMessage(TypeError, "serializable to JSON"):
+            self.render(heading=object())
+
+    def test_accepts_any_context_without_cache(self):
+        with self.settings(COLLECTION_SNIPPETS_FRAGMENT_CACHE=None):
+            self.assertIn(": Banner</p>", self.render(heading=object()))
+
+    def test_invalidated_when_published(self):
+        self.assertEqual(self.render(heading="News"), "<p>News: Banner</p>\n")
+        self.banner.title = "Published"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.banner.save_revision().publish()
+        self.banner.refresh_from_db()
+        self.assertEqual(self.render(heading="News"), "<p>News: Published</p>\n")
@@ -0,0 +1,143 @@
+"""Tests of purging snippets from the frontend cache."""
+
+import unittest.mock
+
+import django.test
+import wagtail.contrib.frontend_cache.backends
+import wagtail.models
+
+import collection_snippets.frontend_cache
+import tests.testapp.models
+
+PURGED_URLS = []
+
+
+class RecordingBackend(wagtail.contrib.frontend_cache.backends.BaseBackend):
+    """Frontend cache backend recording the purged URLs."""
+
+    def __init__(self, params):
+        """Ignore the backend settings."""
+
+    def purge(self, url):
+        """Record a purged URL."""
+        PURGED_URLS.append(url)
+
+
+@django.test.override_settings(
+    WAGTAILFRONTENDCACHE={"recording": {"BACKEND": f"{__name__}.RecordingBackend"}}
+)
+class PurgeQueueTests(django.test.TestCase):
+    """Snippets queued for purging are coalesced, so every URL is purged once."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Display a card and two banners on two pages."""
+        collection = wagtail.models.Collection.get_first_root_node()
+        locale = wagtail.models.Locale.get_default()
+        cls.first, cls.second = (
+            tests.testapp.models.Banner.objects.create(
+                title=title, collection=collection, locale=locale
+            )
+            for title in ["First", "Second"]
+        )
+        cls.card = tests.testapp.models.Card.objects.create(
+            title="Card", collection=collection, locale=locale
+        )
+        home = wagtail.models.Site.objects.get(is_default_site=True).root_page
+        cls.both = home.add_child(
+            instance=tests.testapp.models.SnippetPage(
+                title="Both", slug="both", banner=cls.first, card=cls.card
+            )
+        )
+        cls.one = home.add_child(
+            instance=tests.testapp.models.SnippetPage(
+                title="One", slug="one", banner=cls.second
+            )
+        )
+
+    def setUp(self):
+        """Start without purged URLs."""
+        PURGED_URLS.clear()
+        self.addCleanup(PURGED_URLS.clear)
+
+    def get_key(self, snippet):
+        """Get the key of a snippet in the queue."""
+        return (snippet.pk, snippet.locale_id)
+
+    def get_queue(self):
+        """Get a queue that is flushed by the test."""
+        queue = collection_snippets.frontend_cache.PurgeQueue()
+        self.addCleanup(queue._executor.shutdown)
+        return queue
+
+    def test_flush_purges_every_url_once(self):
+        queue = self.get_queue()
+        with unittest.mock.patch.object(queue._executor, "submit") as submit:
+            queue.add(tests.testapp.models.Banner, [self.get_key(self.first)])
+            queue.add(tests.testapp.models.Card, [self.get_key(self.card)])
+            queue.add(
+                tests.testapp.models.Banner,
+                [self.get_key(self.first), self.get_key(self.second)],
+            )
+        submit.assert_called_once_with(queue._flush_later)
+        self.assertEqual(queue.depth, 3)
+
+        queue.flush()
+
+        self.assertCountEqual(PURGED_URLS, [self.both.full_url, self.one.full_url])
+        self.assertEqual(queue.depth, 0)
+        self.assertEqual(
+            queue.get_metrics(),
+            {
+                "depth": 0,
+                "flushes": 1,
+                "purged_snippets": 3,
+                "purged_urls": 2,
+                "last_flush_seconds": unittest.mock.ANY,
+                "max_flush_seconds": unittest.mock.ANY,
+            },
+        )
+
+    def test_flush_schedules_next_flush(self):
+        queue = self.get_queue()
+        with unittest.mock.patch.object(queue._executor, "submit") as submit:
+            queue.add(tests.testapp.models.Banner, [self.get_key(self.first)])
+            queue.flush()
+            queue.add(tests.testapp.models.Banner, [self.get_key(self.second)])
+        self.assertEqual(submit.call_count, 2)
+        self.assertEqual(PURGED_URLS, [self.both.full_url])
+
+    def test_flush_without_snippets(self):
+        queue = self.get_queue()
+        queue.flush()
+        self.assertEqual(PURGED_URLS, [])
+        self.assertEqual(queue.get_metrics()["flushes"], 0)
+
+    def test_flush_later_waits_for_more_snippets(self):
+        queue = collection_snippets.frontend_cache.PurgeQueue(delay=0.2)
+        with unittest.mock.patch.object(queue, "flush") as flush:
+            for snippet in [self.first, self.second, self.first]:
+                queue.add(tests.testapp.models.Banner, [self.get_key(snippet)])
+            queue._executor.shutdown(wait=True)
+        flush.assert_called_once_with()
+        self.assertEqual(queue.depth, 2)
+
+    @django.test.override_settings(COLLECTION_SNIPPETS_PURGE_QUEUE=True)
+    def test_bulk_changes_are_queued_together_after_commit(self):
+        with unittest.mock.patch.object(
+            collection_snippets.frontend_cache.purge_queue, "add"
+        ) as add:
+            with self.captureOnCommitCallbacks() as callbacks:
+                with collection_snippets.frontend_cache.coalesce_purges():
+                    for snippet in [self.first, self.second, self.first]:
+                        collection_snippets.frontend_cache.purge_snippet(snippet)
+            add.assert_not_called()
+            for callback in callbacks:
+                callback()
+        add.assert_called_once()
+        model, keys = add.call_args.args
+        self.assertIs(model, tests.testapp.models.Banner)
+        self.assertCountEqual(
+            keys,
+            [self.get_key(self.first), self.get_key(self.second)],
+        )
@@ -0,0 +1,82 @@
+"""Tests of the query count and timing instrumentation."""
+
+import django.test
+import wagtail.models
+
+import collection_snippets.instrumentation
+import tests.testapp.models
+
+
+@django.test.override_settings(
+    COLLECTION_SNIPPETS_INSTRUMENTATION=True,
+    COLLECTION_SNIPPETS_INSTRUMENTATION_SINKS=[
+        "collection_snippets.instrumentation.signal_sink"
+    ],
+)
+class InstrumentedViewTests(django.test.TestCase):
+    """Requests to snippet views are recorded, and recording always stops."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create a banner with a revision."""
+        cls.banner = tests.testapp.models.Banner.objects.create(
+            title="Banner",
+            collection=wagtail.models.Collection.get_first_root_node(),
+            locale=wagtail.models.Locale.get_default(),
+        )
+        cls.revision = cls.banner.save_revision()
+        cls.superuser = django.contrib.auth.get_user_model().objects.create_superuser(
+            username="admin", password="password"
+        )
+
+    def setUp(self):
+        """Log in as superuser and collect records."""
+        self.client.force_login(self.superuser)
+        self.records = []
+        collection_snippets.instrumentation.instrumented.connect(self.receiver)
+        self.addCleanup(
+            collection_snippets.instrumentation.instrumented.disconnect, self.receiver
+        )
+
+    def receiver(self, record, **kwargs):
+        """Collect a record."""
+        self.records.append(record)
+
+    def preview_revision(self, revision_id):
+        """Request the preview of a revision of the banner."""
+        return self.client.get(
+            django.urls.reverse(
+                tests.testapp.models.Banner.snippet_viewset.get_url_name(
+                    "revisions_view"
+                ),
+                args=[self.banner.pk, revision_id],
+            )
+        )
+
+    def assertNotRecording(self):
+        """Check no recording is left running on this thread."""
+        self.assertIsNone(collection_snippets.instrumentation._current_recorder.get())
+        for connection in django.db.connections.all():
+            self.assertFalse(
+                any(
+                    isinstance(wrapper, collection_snippets.instrumentation.Recorder)
+                    for wrapper in connection.execute_wrappers
+                )
+            )
+
+    def test_request_is_recorded(self):
+        response = self.preview_revision(self.revision.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotRecording()
+        self.assertEqual(
+            [record["name"] for record in self.records], ["PreviewRevisionView"]
+        )
+        self.assertIn("setup", self.records[0]["phases"])
+
+    def test_recording_stops_when_setup_fails(self):
+        response = self.preview_revision(self.revision.pk + 1)
+        self.assertEqual(response.status_code, 404)
+        self.assertNotRecording()
+        self.assertEqual(
+            [record["name"] for record in self.records], ["PreviewRevisionView"]
+        )
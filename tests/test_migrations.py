@@ -0,0 +1,78 @@
+"""Tests of the migrations and indexes of collection snippets."""
+
+import io
+import unittest
+
+import django.core.management
+import django.test
+import django.utils.timezone
+
+import collection_snippets.models
+
+INDEXES = [
+    "collsnip_collection_locale_idx",
+    "collsnip_go_live_at_idx",
+    "collsnip_live_expire_at_idx",
+]
+
+
+class MigrationTests(django.test.TestCase):
+    """The migrations match the models and create the indexes."""
+
+    # makemigrations checks the migration history of every database.
+    databases = {"default", "replica"}
+
+    def test_no_missing_migrations(self):
+        output = io.StringIO()
+        try:
+            django.core.management.call_command(
+                "makemigrations", "--check", "--dry-run", stdout=output
+            )
+        except SystemExit:
+            self.fail(f"Missing migrations:\n{output.getvalue()}")
+
+    def test_indexes_exist(self):
+        with django.db.connection.cursor() as cursor:
+            constraints = django.db.connection.introspection.get_constraints(
+                cursor, collection_snippets.models.Snippet._meta.db_table
+            )
+        for name in INDEXES:
+            self.assertIn(name, constraints)
+            self.assertTrue(constraints[name]["index"])
+
+
+@unittest.skipUnless(
+    django.db.connection.vendor == "sqlite", "Query plans are checked on SQLite."
+)
+class QueryPlanTests(django.test.TestCase):
+    """Listings and scheduled publishing are planned with the indexes."""
+
+    def assertUsesIndex(self, queryset, name):
+        """Check the query planner uses an index for a queryset."""
+        self.assertIn(f"USING INDEX {name} ", queryset.explain())
+
+    def test_listing_by_collection_and_locale(self):
+        self.assertUsesIndex(
+            collection_snippets.models.Snippet.objects.filter(
+                collection_id=1, locale_id=1
+            ).order_by("pk"),
+            "collsnip_collection_locale_idx",
+        )
+
+    def test_snippets_to_go_live(self):
+        self.assertUsesIndex(
+            collection_snippets.models.Snippet.objects.filter(
+                go_live_at__isnull=False, go_live_at__lte=django.utils.timezone.now()
+            ),
+            "collsnip_go_live_at_idx",
+        )
+
+    def test_snippets_to_expire(self):
+        self.assertUsesIndex(
+            collection_snippets.models.Snippet.objects.filter(
+                live=True,
+                expire_at__isnull=False,
+                expire_at__lte=django.utils.timezone.now(),
+            ),
+            "collsnip_live_expire_at_idx",
+        )
@@ -0,0 +1,59 @@
+"""Tests of the collection snippet models."""
+
+import django.db.migrations.loader
+import django.test
+
+import collection_snippets.models
+import tests.testapp.models
+
+
+class SnippetModelTests(django.test.TestCase):
+    """Snippet types get their uniqueness and permissions from the right base."""
+
+    def test_multi_table_snippet_types_pass_checks(self):
+        self.assertEqual(tests.testapp.models.Banner.check(), [])
+        self.assertEqual(tests.testapp.models.Banner._meta.unique_together, ())
+        self.assertEqual(
+            collection_snippets.models.Snippet._meta.unique_together,
+            (("translation_key", "locale"),),
+        )
+
+    def test_single_table_snippet_types_are_unique_per_locale(self):
+        self.assertEqual(tests.testapp.models.Card.check(), [])
+        self.assertEqual(
+            tests.testapp.models.Card._meta.unique_together,
+            (("translation_key", "locale"),),
+        )
+
+    def test_choose_permission_is_migrated(self):
+        state = django.db.migrations.loader.MigrationLoader(
+            django.db.connection
+        ).project_state()
+        self.assertIn(
+            "choose", state.models["testapp", "card"].options["default_permissions"]
+        )
+        self.assertTrue(
+            django.contrib.auth.models.Permission.objects.filter(
+                content_type__app_label="testapp",
+                codename="choose_card",
+                name="Can choose card",
+            ).exists()
+        )
+
+    def test_multi_table_snippet_types_share_choose_permission(self):
+        self.assertEqual(tests.testapp.models.Banner._meta.permissions, [])
+        self.assertNotIn(
+            "choose", tests.testapp.models.Banner._meta.default_permissions
+        )
+        self.assertTrue(
+            django.contrib.auth.models.Permission.objects.filter(
+                content_type__app_label="collectionsnippets",
+                codename="choose_snippet",
+                name="Can choose snippet",
+            ).exists()
+        )
+        self.assertFalse(
+            django.contrib.auth.models.Permission.objects.filter(
+                content_type__app_label="testapp", codename="choose_banner"
+            ).exists()
+        )
@@ -0,0 +1,143 @@
+"""Tests of keyset pagination."""
+
+import datetime
+
+import django.core.paginator
+import django.test
+import django.utils.timezone
+import wagtail.models
+
+import collection_snippets.pagination
+import tests.testapp.models
+
+ORDERINGS = [
+    ["pk"],
+    ["-pk"],
+    ["title", "pk"],
+    ["go_live_at"],
+    ["-go_live_at"],
+    ["-go_live_at", "-pk"],
+]
+
+
+class KeysetPaginatorTests(django.test.TestCase):
+    """Pages sought by cursor match the pages of offset pagination."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create cards with duplicate and missing go live times."""
+        now = django.utils.timezone.now().replace(microsecond=0)
+        times = [None, 1, 1, None, 2, 3, 1, None]
+        for index, days in enumerate(times):
+            tests.testapp.models.Card.objects.create(
+                title=f"Card {index % 3}",
+                collection=wagtail.models.Collection.get_first_root_node(),
+                locale=wagtail.models.Locale.get_default(),
+                go_live_at=None if days is None else now + datetime.timedelta(days),
+            )
+
+    def get_offset_pages(self, ordering, per_page):
+        """Get the primary keys of every page paginated by offset."""
+        paginator = collection_snippets.pagination.KeysetPaginator(
+            tests.testapp.models.Card.objects.order_by(*ordering), per_page
+        )
+        name, descending = paginator.key
+        offset_paginator = django.core.paginator.Paginator(
+            tests.testapp.models.Card.objects.order_by(
+                *collection_snippets.pagination.order_by(name, descending)
+            ),
+            per_page,
+        )
+        return [
+            [card.pk for card in offset_paginator.page(number)]
+            for number in offset_paginator.page_range
+        ]
+
+    def test_walk_forward_and_back(self):
+        for ordering in ORDERINGS:
+            for per_page in [1, 3]:
+                with self.subTest(ordering=ordering, per_page=per_page):
+                    paginator = collection_snippets.pagination.KeysetPaginator(
+                        tests.testapp.models.Card.objects.order_by(*ordering),
+                        per_page,
+                    )
+                    self.assertIsNotNone(paginator.key)
+                    pages = [paginator.page(1)]
+                    while pages[-1].has_next():
+                        pages.append(paginator.page(pages[-1].next_page_number()))
+                    expected = self.get_offset_pages(ordering, per_page)
+                    self.assertEqual(
+                        [[card.pk for card in page] for page in pages], expected
+                    )
+                    self.assertEqual(
+                        [page.number for page in pages],
+                        list(range(1, len(expected) + 1)),
+                    )
+
+                    backwards = [pages[-1]]
+                    while backwards[-1].has_previous():
+                        backwards.append(
+                            paginator.page(backwards[-1].previous_page_number())
+                        )
+                    self.assertEqual(
+                        [[card.pk for card in page] for page in backwards],
+                        expected[::-1],
+                    )
+
+    def test_nulls_sort_lowest(self):
+        for ordering, nulls_first in [("go_live_at", True), ("-go_live_at", False)]:
+            with self.subTest(ordering=ordering):
+                pages = self.get_offset_pages([ordering], 3)
+                cards = tests.testapp.models.Card.objects.in_bulk()
+                times = [cards[pk].go_live_at for page in pages for pk in page]
+                self.assertEqual(times[0] is None, nulls_first)
+                self.assertEqual(times[-1] is None, not nulls_first)
+
+    def test_page_numbers(self):
+        paginator = collection_snippets.pagination.KeysetPaginator(
+            tests.testapp.models.Card.objects.order_by("pk"), 3
+        )
+        self.assertEqual(
+            [card.pk for card in paginator.page(2)],
+            self.get_offset_pages(["pk"], 3)[1],
+        )
+        with self.assertRaises(django.core.paginator.EmptyPage):
+            paginator.page(4)
+
+    def test_tampered_cursor(self):
+        paginator = collection_snippets.pagination.KeysetPaginator(
+            tests.testapp.models.Card.objects.order_by("title", "pk"), 3
+        )
+        cursor = paginator.page(1).next_page_number()
+        value, signature = cursor.split(":")
+        other = collection_snippets.pagination.encode_cursor(2, "after", "Card 2", 1)
+        for token in [
+            f"{value}:{signature[:-1]}{'B' if signature[-1] == 'A' else 'A'}",
+            # The position of another cursor with this cursor's signature.
+            f"{other.split(':')[0]}:{signature}",
+            "garbage",
+            collection_snippets.pagination.encode_cursor(2, "sideways", "Card 1", 1),
+            collection_snippets.pagination.encode_cursor("2", "after", "Card 1", 1),
+        ]:
+            with self.subTest(token=token):
+                with self.assertRaises(django.core.paginator.PageNotAnInteger):
+                    paginator.page(token)
+
+    def test_unsupported_orderings_fall_back_to_offset(self):
+        for object_list in [
+            tests.testapp.models.Card.objects.order_by("collection", "pk"),
+            tests.testapp.models.Card.objects.order_by("title", "text"),
+            tests.testapp.models.Card.objects.order_by(
+                django.db.models.functions.Lower("title")
+            ),
+            list(tests.testapp.models.Card.objects.order_by("pk")),
+        ]:
+            with self.subTest(object_list=object_list):
+                paginator = collection_snippets.pagination.KeysetPaginator(
+                    object_list, 3
+                )
+                self.assertIsNone(paginator.key)
+                page = paginator.page(2)
+                self.assertEqual(page.number, 2)
+                self.assertEqual(len(page), 3)
+                self.assertEqual(paginator.num_pages, 3)
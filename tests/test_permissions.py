@@ -0,0 +1,240 @@
+"""Tests of the shared collection permission cache."""
+
+import django
+import django.test
+import wagtail.models
+
+import collection_snippets.models
+import collection_snippets.permissions
+
+
+@django.test.override_settings(COLLECTION_SNIPPETS_PERMISSION_CACHE="default")
+class PermissionCacheTests(django.test.TestCase):
+    """Group collection permissions are shared through the cache until they change."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Let an editor change snippets in the first of two collections."""
+        root = wagtail.models.Collection.get_first_root_node()
+        cls.news = root.add_child(name="News")
+        cls.events = root.add_child(name="Events")
+        # Collections are sorted by name, so adding events moved news.
+        cls.news.refresh_from_db()
+        cls.editors = django.contrib.auth.models.Group.objects.create(
+            name="News editors"
+        )
+        cls.reviewers = django.contrib.auth.models.Group.objects.create(
+            name="Event editors"
+        )
+        cls.change = django.contrib.auth.models.Permission.objects.get(
+            content_type__app_label="collectionsnippets", codename="change_snippet"
+        )
+        wagtail.models.GroupCollectionPermission.objects.create(
+            group=cls.editors, collection=cls.news, permission=cls.change
+        )
+        wagtail.models.GroupCollectionPermission.objects.create(
+            group=cls.reviewers, collection=cls.events, permission=cls.change
+        )
+        cls.user = django.contrib.auth.get_user_model().objects.create_user(
+            username="editor", password="password"
+        )
+        cls.user.groups.add(cls.editors)
+        cls.superuser = django.contrib.auth.get_user_model().objects.create_superuser(
+            username="admin", password="password"
+        )
+
+    def setUp(self):
+        """Start with an empty cache."""
+        self.cache = django.core.cache.caches["default"]
+        self.cache.clear()
+        self.addCleanup(self.cache.clear)
+
+    def get_collection_ids(self):
+        """Look up the editor's collections like a new request would."""
+        collection_snippets.permissions.clear_cache(self.user)
+        policy = collection_snippets.permissions.CollectionPermissionPolicy(
+            collection_snippets.models.Snippet
+        )
+        return policy.get_collection_ids(self.user, ["change"])
+
+    def get_version(self):
+        """Get the token namespacing the valid cache entries."""
+        return collection_snippets.permissions.get_cache_version(self.cache)
+
+    def test_shared_across_requests(self):
+        self.assertEqual(self.get_collection_ids(), {self.news.pk})
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_collection_ids(), {self.news.pk})
+
+    def test_disabled_without_cache(self):
+        with self.settings(COLLECTION_SNIPPETS_PERMISSION_CACHE=None):
+            self.assertEqual(self.get_collection_ids(), {self.news.pk})
+        self.assertIsNone(
+            self.cache.get(f"{collection_snippets.permissions.CACHE_PREFIX}:version")
+        )
+
+    def test_group_permission_change_invalidates_after_commit(self):
+        self.assertEqual(self.get_collection_ids(), {self.news.pk})
+        version = self.get_version()
+        with self.captureOnCommitCallbacks() as callbacks:
+            wagtail.models.GroupCollectionPermission.objects.create(
+                group=self.editors, collection=self.events, permission=self.change
+            )
+        self.assertEqual(self.get_version(), version)
+        self.assertEqual(self.get_collection_ids(), {self.news.pk})
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(self.get_version(), version)
+        self.assertEqual(self.get_collection_ids(), {self.news.pk, self.events.pk})
+
+    def test_group_permission_delete_invalidates_after_commit(self):
+        self.assertEqual(self.get_collection_ids(), {self.news.pk})
+        with self.captureOnCommitCallbacks(execute=True):
+            wagtail.models.GroupCollectionPermission.objects.filter(
+                group=self.editors
+            ).delete()
+        self.assertEqual(self.get_collection_ids(), set())
+
+    def test_collection_move_invalidates_after_commit(self):
+        self.assertEqual(self.get_collection_ids(), {self.news.pk})
+        version = self.get_version()
+        self.client.force_login(self.superuser)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                django.urls.reverse(
+                    "wagtailadmin_collections:edit", args=[self.events.pk]
+                ),
+                {"name": "Events", "parent": self.news.pk},
+            )
+        self.assertEqual(response.status_code, 302)
+        self.events.refresh_from_db()
+        self.assertEqual(self.events.get_parent(), self.news)
+        self.assertNotEqual(self.get_version(), version)
+        self.assertEqual(self.get_collection_ids(), {self.news.pk, self.events.pk})
+
+    def test_new_subcollection_invalidates_after_commit(self):
+        self.assertEqual(self.get_collection_ids(), {self.news.pk})
+        with self.captureOnCommitCallbacks(execute=True):
+            sports = self.news.add_child(name="Sports")
+        self.assertEqual(self.get_collection_ids(), {self.news.pk, sports.pk})
+
+    def test_group_membership_invalidates_after_commit(self):
+        self.assertEqual(self.get_collection_ids(), {self.news.pk})
+        version = self.get_version()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.user.groups.add(self.reviewers)
+        self.assertEqual(self.get_version(), version)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.get_collection_ids(), {self.news.pk, self.events.pk})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.remove(self.editors)
+        self.assertEqual(self.get_collection_ids(), {self.events.pk})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.clear()
+        self.assertEqual(self.get_collection_ids(), set())
+
+    def test_reverse_group_membership_invalidates_after_commit(self):
+        self.assertEqual(self.get_collection_ids(), {self.news.pk})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reviewers.user_set.add(self.user)
+        self.assertEqual(self.get_collection_ids(), {self.news.pk, self.events.pk})
+
+
+class PermissionMemoTests(django.test.TestCase):
+    """Collection permissions are looked up once per user and request."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Let an editor change snippets in one of two collections."""
+        root = wagtail.models.Collection.get_first_root_node()
+        cls.news = root.add_child(name="News")
+        cls.events = root.add_child(name="Events")
+        cls.news.refresh_from_db()
+        cls.editors = django.contrib.auth.models.Group.objects.create(
+            name="News editors"
+        )
+        wagtail.models.GroupCollectionPermission.objects.create(
+            group=cls.editors,
+            collection=cls.news,
+            permission=django.contrib.auth.models.Permission.objects.get(
+                content_type__app_label="collectionsnippets",
+                codename="change_snippet",
+            ),
+        )
+        cls.user = django.contrib.auth.get_user_model().objects.create_user(
+            username="editor", password="password"
+        )
+        cls.user.groups.add(cls.editors)
+
+    def setUp(self):
+        """Start each test like a new request for the editor."""
+        collection_snippets.permissions.clear_cache(self.user)
+
+    def get_policy(self):
+        """Get a new permission policy, as each view and filter creates its own."""
+        return collection_snippets.permissions.CollectionPermissionPolicy(
+            collection_snippets.models.Snippet
+        )
+
+    def check_permissions(self):
+        """Check the editor's permissions like the views of a request do."""
+        policy = self.get_policy()
+        snippet = collection_snippets.models.Snippet(collection=self.news)
+        self.assertTrue(policy.user_has_permission(self.user, "change"))
+        self.assertTrue(policy.user_has_any_permission(self.user, ["change"]))
+        self.assertTrue(
+            policy.user_has_permission_for_instance(self.user, "change", snippet)
+        )
+        self.assertFalse(policy.user_has_permission(self.user, "delete"))
+        self.assertEqual(
+            policy.get_permission_signature(self.user, ["change"]),
+            policy.get_permission_signature(self.user, ["change"]),
+        )
+
+    def test_repeated_lookups_query_once(self):
+        with self.assertNumQueries(2):
+            self.check_permissions()
+        with self.assertNumQueries(0):
+            for index in range(3):
+                self.check_permissions()
+
+    def test_collection_ids_query_once(self):
+        with self.assertNumQueries(2):
+            self.assertEqual(
+                self.get_policy().get_collection_ids(self.user, ["change"]),
+                {self.news.pk},
+            )
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self.get_policy().get_collection_ids(self.user, ["change"]),
+                {self.news.pk},
+            )
+            self.assertFalse(
+                self.get_policy().user_has_permission_for_instance(
+                    self.user,
+                    "change",
+                    collection_snippets.models.Snippet(collection=self.events),
+                )
+            )
+
+    def test_clear_cache(self):
+        with self.assertNumQueries(2):
+            self.check_permissions()
+        collection_snippets.permissions.clear_cache(self.user)
+        with self.assertNumQueries(2):
+            self.check_permissions()
+
+    def test_not_shared_between_users(self):
+        self.check_permissions()
+        user = django.contrib.auth.get_user_model().objects.get(pk=self.user.pk)
+        with self.assertNumQueries(2):
+            self.assertTrue(
+                self.get_policy().user_has_permission_for_instance(
+                    user,
+                    "change",
+                    collection_snippets.models.Snippet(collection=self.news),
+                )
+            )
@@ -0,0 +1,151 @@
+"""Tests of the in-process cache of rendered snippet previews."""
+
+import unittest.mock
+
+import django
+import django.test
+import wagtail.models
+
+import collection_snippets.previews
+import collection_snippets.views
+import tests.testapp.models
+
+
+class PreviewCacheTests(django.test.TestCase):
+    """Previews are cached per revision or form state and user."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create a banner with a revision and two editors."""
+        root = wagtail.models.Collection.get_first_root_node()
+        cls.news = root.add_child(name="News")
+        cls.banner = tests.testapp.models.Banner.objects.create(
+            title="First",
+            collection=cls.news,
+            locale=wagtail.models.Locale.get_default(),
+        )
+        cls.revision = cls.banner.save_revision()
+        user_model = django.contrib.auth.get_user_model()
+        cls.superuser = user_model.objects.create_superuser(
+            username="admin", password="password"
+        )
+        cls.other_superuser = user_model.objects.create_superuser(
+            username="other", password="password"
+        )
+
+    def setUp(self):
+        """Start with an empty cache and log in."""
+        collection_snippets.previews.preview_cache.clear()
+        self.addCleanup(collection_snippets.previews.preview_cache.clear)
+        self.client.force_login(self.superuser)
+
+    def get_url(self, name, *args):
+        """Get the URL of a banner view."""
+        return django.urls.reverse(
+            tests.testapp.models.Banner.snippet_viewset.get_url_name(name), args=args
+        )
+
+    def get_revision_preview(self):
+        """Request the preview of the banner's revision."""
+        return self.client.get(
+            self.get_url("revisions_view", self.banner.pk, self.revision.pk)
+        )
+
+    def get_edit_preview(self, title):
+        """Submit a form state of the banner and request its preview."""
+        url = self.get_url("preview_on_edit", self.banner.pk)
+        response = self.client.post(
+            url, {"title": title, "text": "", "collection": self.news.pk}
+        )
+        self.assertEqual(response.json()["is_valid"], True)
+        return self.client.get(url)
+
+    def test_keys(self):
+        self.assertEqual(
+            collection_snippets.previews.get_revision_key(1, "", self.superuser),
+            ("revision", 1, "", self.superuser.pk),
+        )
+        key = collection_snippets.previews.get_form_state_key(
+            tests.testapp.models.Banner, 1, "title=First", "", False, self.superuser
+        )
+        self.assertNotEqual(
+            key,
+            collection_snippets.previews.get_form_state_key(
+                tests.testapp.models.Banner,
+                1,
+                "title=Second",
+                "",
+                False,
+                self.superuser,
+            ),
+        )
+        self.assertNotEqual(
+            key,
+            collection_snippets.previews.get_form_state_key(
+                tests.testapp.models.Banner,
+                1,
+                "title=First",
+                "",
+                False,
+                self.other_superuser,
+            ),
+        )
+
+    def test_least_recently_used_dropped(self):
+        cache = collection_snippets.previews.LRUCache()
+        cache.set("first", 1, maxsize=2)
+        cache.set("second", 2, maxsize=2)
+        self.assertEqual(cache.get("first"), 1)
+        cache.set("third", 3, maxsize=2)
+        self.assertIsNone(cache.get("second"))
+        self.assertEqual(cache.get("first"), 1)
+        self.assertEqual(cache.get("third"), 3)
+
+    def test_revision_preview_cached(self):
+        response = self.get_revision_preview()
+        self.assertContains(response, "First")
+        wagtail.models.Revision.objects.filter(pk=self.revision.pk).update(
+            content={**self.revision.content, "title": "Changed"}
+        )
+        self.assertContains(self.get_revision_preview(), "First")
+        self.assertIsNotNone(
+            collection_snippets.previews.preview_cache.get(
+                collection_snippets.previews.get_revision_key(
+                    self.revision.pk,
+                    self.banner.default_preview_mode,
+                    self.superuser,
+                )
+            )
+        )
+
+    def test_revision_preview_not_shared_between_users(self):
+        self.assertContains(self.get_revision_preview(), "First")
+        wagtail.models.Revision.objects.filter(pk=self.revision.pk).update(
+            content={**self.revision.content, "title": "Changed"}
+        )
+        self.client.force_login(self.other_superuser)
+        self.assertContains(self.get_revision_preview(), "Changed")
+
+    def test_revision_preview_cache_disabled(self):
+        with self.settings(COLLECTION_SNIPPETS_PREVIEW_CACHE_SIZE=0):
+            self.assertContains(self.get_revision_preview(), "First")
+            wagtail.models.Revision.objects.filter(pk=self.revision.pk).update(
+                content={**self.revision.content, "title": "Changed"}
+            )
+            self.assertContains(self.get_revision_preview(), "Changed")
+
+    def test_edit_preview_cached(self):
+        with unittest.mock.patch.object(
+            collection_snippets.views.PreviewOnEditView,
+            "render_preview",
+            autospec=True,
+            side_effect=collection_snippets.views.PreviewOnEditView.render_preview,
+        ) as render_preview:
+            self.assertContains(self.get_edit_preview("Draft"), "Draft")
+            self.assertContains(self.get_edit_preview("Draft"), "Draft")
+            self.assertEqual(render_preview.call_count, 1)
+            self.assertContains(self.get_edit_preview("Changed"), "Changed")
+            self.assertEqual(render_preview.call_count, 2)
+            self.client.force_login(self.other_superuser)
+            self.assertContains(self.get_edit_preview("Draft"), "Draft")
+            self.assertEqual(render_preview.call_count, 3)
@@ -0,0 +1,113 @@
+"""Tests of pruning old snippet revisions."""
+
+import datetime
+import io
+
+import django.core.management
+import django.test
+import django.utils.timezone
+import wagtail.models
+
+import tests.testapp.models
+
+
+class PruneRevisionsTests(django.test.TestCase):
+    """Old revisions are deleted, unless they are still needed."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create a live banner and a draft banner, each with several revisions."""
+        cls.live = cls.create_banner("Live")
+        cls.live_revisions = [cls.live.save_revision() for _ in range(8)]
+        cls.live_revisions[0].publish()
+        cls.live.refresh_from_db()
+        wagtail.models.Revision.objects.filter(pk=cls.live_revisions[2].pk).update(
+            approved_go_live_at=django.utils.timezone.now() + datetime.timedelta(days=1)
+        )
+        workflow_state = wagtail.models.WorkflowState.objects.create(
+            content_type=cls.live_revisions[4].content_type,
+            base_content_type=cls.live_revisions[4].base_content_type,
+            object_id=str(cls.live.pk),
+            workflow=wagtail.models.Workflow.objects.create(name="Review"),
+            status=wagtail.models.WorkflowState.STATUS_IN_PROGRESS,
+        )
+        wagtail.models.TaskState.objects.create(
+            workflow_state=workflow_state,
+            revision=cls.live_revisions[4],
+            task=wagtail.models.Task.objects.create(name="Approve"),
+            status=wagtail.models.TaskState.STATUS_IN_PROGRESS,
+        )
+        cls.draft = cls.create_banner("Draft")
+        cls.draft_revisions = [cls.draft.save_revision() for _ in range(5)]
+
+    @classmethod
+    def create_banner(cls, title):
+        """Create a banner without revisions."""
+        return tests.testapp.models.Banner.objects.create(
+            title=title,
+            collection=wagtail.models.Collection.get_first_root_node(),
+            locale=wagtail.models.Locale.get_default(),
+            live=False,
+        )
+
+    def prune(self, *args, **options):
+        """Run the command on banners and return its output."""
+        output = io.StringIO()
+        django.core.management.call_command(
+            "prune_snippet_revisions",
+            "testapp.Banner",
+            *args,
+            **options,
+            stdout=output,
+            stderr=io.StringIO(),
+        )
+        return output.getvalue()
+
+    def get_remaining(self, revisions):
+        """Get the indexes of the revisions still existing."""
+        existing = set(
+            wagtail.models.Revision.objects.filter(
+                pk__in=[revision.pk for revision in revisions]
+            ).values_list("pk", flat=True)
+        )
+        return [
+            index for index, revision in enumerate(revisions) if revision.pk in existing
+        ]
+
+    def test_needed_revisions_are_kept(self):
+        self.prune(keep=0)
+        # Live, scheduled, in moderation and latest.
+        self.assertEqual(self.get_remaining(self.live_revisions), [0, 2, 4, 7])
+        self.assertEqual(self.get_remaining(self.draft_revisions), [4])
+        self.live.refresh_from_db()
+        self.assertEqual(self.live.live_revision, self.live_revisions[0])
+        self.assertEqual(self.live.latest_revision, self.live_revisions[7])
+
+    def test_keep_per_snippet(self):
+        output = self.prune(keep=3, chunk_size=1)
+        self.assertEqual(self.get_remaining(self.live_revisions), [0, 2, 4, 5, 6, 7])
+        self.assertEqual(self.get_remaining(self.draft_revisions), [2, 3, 4])
+        self.assertIn("deleted 4 revisions", output)
+
+    def test_retention_setting_overrides_keep(self):
+        with self.settings(
+            COLLECTION_SNIPPETS_REVISION_RETENTION={"testapp.Banner": 4}
+        ):
+            self.prune(keep=0)
+        self.assertEqual(self.get_remaining(self.draft_revisions), [1, 2, 3, 4])
+
+    def test_dry_run_deletes_nothing(self):
+        output = self.prune("--dry-run", keep=0)
+        self.assertIn("8 revisions would be deleted", output)
+        self.assertEqual(self.get_remaining(self.live_revisions), list(range(8)))
+        self.assertEqual(self.get_remaining(self.draft_revisions), list(range(5)))
+
+    def test_skipped_without_retention(self):
+        self.prune()
+        self.assertEqual(self.get_remaining(self.draft_revisions), list(range(5)))
+
+    def test_rejects_other_models(self):
+        with self.assertRaisesMessage(
+            django.core.management.CommandError, "not a collection snippet model"
+        ):
+            self.prune("wagtailcore.Page")
@@ -0,0 +1,111 @@
+"""Tests of routing snippet listing queries to a read replica."""
+
+import django.test
+import wagtail.models
+
+import collection_snippets.routers
+import tests.testapp.models
+
+
+@django.test.override_settings(COLLECTION_SNIPPETS_REPLICA_DATABASE="replica")
+class ReplicaRouterTests(django.test.TransactionTestCase):
+    """Reads go to the replica within its scope unless they need the primary.
+
+    The replica database isn't kept in sync with the primary, so each of them
+    holds a banner with a different title. Tests run outside of transactions,
+    as reads within transactions stay on the primary, so both databases are
+    flushed after each test.
+    """
+
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        """Create a banner on the primary and another one on the replica.
+
+        The primary keeps the root collection and locale of its migrations until
+        the first test flushes it.
+        """
+        for alias, title in [("default", "Primary"), ("replica", "Replica")]:
+            tests.testapp.models.Banner.objects.using(alias).create(
+                title=title,
+                collection=wagtail.models.Collection.objects.using(alias).get_or_create(
+                    depth=1, defaults={"name": "Root", "path": "0001"}
+                )[0],
+                locale=wagtail.models.Locale.objects.using(alias).get_or_create(
+                    language_code="en"
+                )[0],
+            )
+        self.superuser = django.contrib.auth.get_user_model().objects.create_superuser(
+            username="admin", password="password"
+        )
+
+    def get_titles(self):
+        """Read the titles of all banners."""
+        return list(tests.testapp.models.Banner.objects.values_list("title", flat=True))
+
+    def test_reads_within_scope_go_to_replica(self):
+        self.assertEqual(self.get_titles(), ["Primary"])
+        with collection_snippets.routers.read_replica():
+            self.assertEqual(self.get_titles(), ["Replica"])
+            with collection_snippets.routers.use_primary():
+                self.assertEqual(self.get_titles(), ["Primary"])
+            self.assertEqual(self.get_titles(), ["Replica"])
+        self.assertEqual(self.get_titles(), ["Primary"])
+
+    def test_reads_in_transactions_stay_on_primary(self):
+        with collection_snippets.routers.read_replica():
+            with django.db.transaction.atomic():
+                self.assertEqual(self.get_titles(), ["Primary"])
+
+    def test_replica_disabled(self):
+        with self.settings(COLLECTION_SNIPPETS_REPLICA_DATABASE=None):
+            with collection_snippets.routers.read_replica():
+                self.assertEqual(self.get_titles(), ["Primary"])
+
+    def test_replica_objects_are_written_to_primary(self):
+        with collection_snippets.routers.read_replica():
+            banner = tests.testapp.models.Banner.objects.get()
+        self.assertEqual(banner._state.db, "replica")
+        self.assertEqual(
+            collection_snippets.routers.ReplicaRouter().db_for_write(
+                tests.testapp.models.Banner, instance=banner
+            ),
+            "default",
+        )
+
+    def test_pinned_requests_read_from_primary(self):
+        request = django.test.RequestFactory().get("/")
+        self.assertFalse(collection_snippets.routers.is_pinned(request))
+        response = django.http.HttpResponse()
+        collection_snippets.routers.pin_to_primary(response)
+        request.COOKIES = {
+            name: cookie.value for name, cookie in response.cookies.items()
+        }
+        self.assertTrue(collection_snippets.routers.is_pinned(request))
+        with collection_snippets.routers.read_replica(request):
+            self.assertEqual(self.get_titles(), ["Primary"])
+        request.COOKIES[collection_snippets.routers.COOKIE_NAME] = "forged"
+        self.assertFalse(collection_snippets.routers.is_pinned(request))
+
+    def test_listing_reads_replica_until_data_changes(self):
+        self.client.force_login(self.superuser)
+        url = django.urls.reverse(
+            tests.testapp.models.Banner.snippet_viewset.get_url_name("list")
+        )
+        response = self.client.get(url)
+        self.assertContains(response, "Replica")
+        self.assertNotContains(response, "Primary")
+
+        banner = tests.testapp.models.Banner.objects.get()
+        response = self.client.post(
+            django.urls.reverse(
+                tests.testapp.models.Banner.snippet_viewset.get_url_name("unpublish"),
+                args=[banner.pk],
+            )
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(collection_snippets.routers.COOKIE_NAME, response.cookies)
+
+        response = self.client.get(url)
+        self.assertContains(response, "Primary")
+        self.assertNotContains(response, "Replica")
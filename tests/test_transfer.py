@@ -0,0 +1,135 @@
+"""Tests of exporting and importing snippets."""
+
+import io
+import json
+import os
+import tempfile
+
+import django.core.management
+import django.test
+import wagtail.models
+
+import collection_snippets.transfer
+import tests.testapp.models
+
+
+class TransferTests(django.test.TestCase):
+    """Snippets are exported and imported with foreign keys by natural key."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create a banner and a card in a subcollection."""
+        root = wagtail.models.Collection.get_first_root_node()
+        cls.source = root.add_child(name="Source")
+        cls.target = root.add_child(name="Target")
+        cls.source.refresh_from_db()
+        cls.news = cls.source.add_child(name="News")
+        cls.owner = django.contrib.auth.get_user_model().objects.create_user(
+            username="owner", password="password"
+        )
+        locale = wagtail.models.Locale.get_default()
+        cls.banner = tests.testapp.models.Banner.objects.create(
+            title="Banner", text="Text", collection=cls.news, locale=locale
+        )
+        cls.card = tests.testapp.models.Card.objects.create(
+            title="Card",
+            collection=cls.news,
+            locale=locale,
+            owner=cls.owner,
+            page=wagtail.models.Page.objects.get(depth=2),
+        )
+
+    def export(self):
+        """Export the source collection as records."""
+        return [
+            json.loads(line)
+            for line in collection_snippets.transfer.export_snippets(self.source)
+        ]
+
+    def import_records(self, records):
+        """Import records below the target collection with the management command."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "snippets.jsonl")
+            with open(path, "w") as file:
+                file.writelines(json.dumps(record) + "\n" for record in records)
+            django.core.management.call_command(
+                "import_collection_snippets",
+                path,
+                parent=self.target.pk,
+                verbosity=0,
+                stdout=io.StringIO(),
+            )
+
+    def test_export_foreign_keys_by_natural_key(self):
+        records = {record["model"]: record for record in self.export()}
+        self.assertEqual(records["testapp.Card"]["collection"], ["Source", "News"])
+        self.assertEqual(records["testapp.Card"]["fields"]["owner"], ["owner"])
+        self.assertNotIn("page", records["testapp.Card"]["fields"])
+        self.assertEqual(records["testapp.Banner"]["fields"]["text"], "Text")
+
+    def test_import_creates_and_updates(self):
+        records = self.export()
+        for record in records:
+            record["locale"] = "fr"
+        wagtail.models.Locale.objects.create(language_code="fr")
+        self.import_records(records)
+
+        news = self.target.get_descendants().get(name="News")
+        banner = tests.testapp.models.Banner.objects.get(locale__language_code="fr")
+        self.assertEqual(banner.collection, news)
+        self.assertEqual(banner.translation_key, self.banner.translation_key)
+        self.assertEqual(banner.text, "Text")
+        card = tests.testapp.models.Card.objects.get(locale__language_code="fr")
+        self.assertEqual(card.owner, self.owner)
+        self.assertIsNone(card.page)
+
+        records[0]["fields"]["title"] = "Renamed"
+        self.import_records(records)
+        self.assertEqual(
+            django.apps.apps.get_model(records[0]["model"])
+            .objects.get(locale__language_code="fr")
+            .title,
+            "Renamed",
+        )
+        self.assertEqual(
+            tests.testapp.models.Banner.objects.filter(
+                locale__language_code="fr"
+            ).count(),
+            1,
+        )
+        self.assertEqual(
+            tests.testapp.models.Card.objects.filter(
+                locale__language_code="fr"
+            ).count(),
+            1,
+        )
+
+    def test_import_multi_table_snippets(self):
+        records = [
+            {
+                "model": "testapp.Banner",
+                "collection": ["News"],
+                "locale": "en",
+                "fields": {"title": f"Banner {number}", "text": ""},
+            }
+            for number in range(3)
+        ]
+        self.import_records(records)
+        banners = tests.testapp.models.Banner.objects.filter(
+            collection__path__startswith=self.target.path
+        )
+        self.assertEqual(banners.count(), 3)
+        self.assertEqual(
+            {banner.snippet_ptr_id for banner in banners},
+            set(banners.values_list("pk", flat=True)),
+        )
+
+    def test_import_missing_natural_key(self):
+        records = [
+            record for record in self.export() if record["model"] == "testapp.Card"
+        ]
+        records[0]["fields"]["owner"] = ["missing"]
+        with self.assertRaisesMessage(
+            django.core.management.CommandError, "missing object"
+        ):
+            self.import_records(records)
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:36
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("testapp", "0002_snippetpage"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="card",
+            options={"permissions": [("choose_card", "Can choose card")]},
+        ),
+    ]
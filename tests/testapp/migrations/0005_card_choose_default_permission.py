@@ -0,0 +1,19 @@
+# Generated by Django 5.0.14 on 2026-10-17 03:22
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("testapp", "0004_card_owner_page"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="card",
+            options={
+                "default_permissions": ("add", "change", "delete", "view", "choose")
+            },
+        ),
+    ]
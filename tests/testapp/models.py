@@ -0,0 +1,53 @@
+"""Snippet types and pages used by the test suite."""
+
+import django
+import wagtail.models
+
+import collection_snippets.models
+
+
+@collection_snippets.models.register_snippet
+class Banner(collection_snippets.models.Snippet):
+    """Snippet type sharing the table of collection snippets."""
+
+    text = django.db.models.TextField(blank=True)
+
+
+@collection_snippets.models.register_snippet
+class Card(collection_snippets.models.AbstractSnippet):
+    """Snippet type with its own table."""
+
+    text = django.db.models.TextField(blank=True)
+    owner = django.db.models.ForeignKey(
+        django.conf.settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=django.db.models.SET_NULL,
+        related_name="+",
+    )
+    page = django.db.models.ForeignKey(
+        wagtail.models.Page,
+        null=True,
+        blank=True,
+        on_delete=django.db.models.SET_NULL,
+        related_name="+",
+    )
+
+
+class SnippetPage(wagtail.models.Page):
+    """Page displaying snippets."""
+
+    banner = django.db.models.ForeignKey(
+        Banner,
+        null=True,
+        blank=True,
+        on_delete=django.db.models.SET_NULL,
+        related_name="+",
+    )
+    card = django.db.models.ForeignKey(
+        Card,
+        null=True,
+        blank=True,
+        on_delete=django.db.models.SET_NULL,
+        related_name="+",
+    )
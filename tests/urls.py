@@ -0,0 +1,16 @@
+"""URLs for the test suite."""
+
+import django
+import wagtail.admin.urls
+import wagtail.urls
+
+import collection_snippets.urls
+
+urlpatterns = [
+    django.urls.path("admin/", django.urls.include(collection_snippets.urls)),
+    django.urls.path("admin/", django.urls.include(wagtail.admin.urls)),
+    django.urls.path(
+        "api/snippets/", django.urls.include("collection_snippets.api_urls")
+    ),
+    django.urls.path("", django.urls.include(wagtail.urls)),
+]